@@ -0,0 +1,450 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的离线性能基准（解压、状态解析、路径转换、构建产物识别、端到端流程）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+
+用法：
+    python BenchFuzzTool/benchmark.py                          # 运行全部基准，结果写入 BenchFuzzTool/BenchResult.json
+    python BenchFuzzTool/benchmark.py -savebaseline base.json  # 同时保存为基线
+    python BenchFuzzTool/benchmark.py -baseline base.json      # 与基线比较，有退化时退出码为1
+    python BenchFuzzTool/benchmark.py -quick -groups extract -filter zip  # 小规模数据，只运行解压组中名称匹配的基准
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+from typing import Callable, Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from OpenFuzzTool.preprocessor import FilePreprocessor
+from OpenFuzzTool.config import ConfigLoader
+from OpenFuzzTool.fuzzer import AFLRunner
+from OpenFuzzTool.analyzer import ReportGenerator
+from OpenFuzzTool.artifacts import ArtifactIndexer
+from OpenFuzzTool.build import BuildExecutor
+from fake_container import FakeContainer, FakePool, fuzzer_stats_text
+
+RESULT_VERSION = 1
+BENCH_GROUPS = ['extract', 'stats', 'config', 'build', 'e2e']
+# 构建产物识别用的ELF样本
+ELF_SAMPLE = '/bin/true'
+
+
+class Case:
+    def __init__(self, name: str, fn: Callable, setup: Callable = None, params: Dict = None, repeat: int = None):
+        """
+        :param fn: 被计时的函数
+        :param setup: 每次计时前执行（不计入耗时），用于恢复初始状态
+        :param repeat: 覆盖全局的重复次数（端到端等耗时较长的基准）
+        """
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.params = params or {}
+        self.repeat = repeat
+        self.extra = None
+
+
+def measure(case: Case, repeat: int, warmup: int = 1) -> Dict:
+    samples = []
+    for index in range(warmup + repeat):
+        if case.setup is not None:
+            case.setup()
+        start = time.perf_counter()
+        extra = case.fn()
+        elapsed = time.perf_counter() - start
+        if index >= warmup:
+            samples.append(elapsed)
+            if isinstance(extra, dict):
+                case.extra = extra
+    result = {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'repeat': len(samples),
+        'params': case.params,
+    }
+    if case.extra:
+        result['extra'] = case.extra
+    return result
+
+
+# ---------------------------------------------------------------- 合成数据
+
+def make_source_tree(root: str, files: int, file_size: int, seed: int = 0) -> str:
+    """生成带 Build.sh 的源码目录：一半内容随机、一半重复，接近真实源码的压缩率"""
+    rng = random.Random(seed)
+    project = os.path.join(root, 'project')
+    os.makedirs(project, exist_ok=True)
+    with open(os.path.join(project, 'Build.sh'), 'w') as f:
+        f.write("#!/bin/bash\nmake -j$(nproc)\n")
+    for index in range(files):
+        directory = os.path.join(project, 'src', f"dir_{index // 100:04d}")
+        os.makedirs(directory, exist_ok=True)
+        half = file_size // 2
+        data = rng.randbytes(half) + (b'int value = 0;\n' * (file_size // 15 + 1))[:file_size - half]
+        with open(os.path.join(directory, f"file_{index:06d}.c"), 'wb') as f:
+            f.write(data)
+    return project
+
+
+def _tar_stream(source: str, path: str, mode: str):
+    with tarfile.open(path, mode) as tf:
+        tf.add(source, arcname=os.path.basename(source))
+
+
+def _build_zip(source, path):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for root, dirs, files in os.walk(source):
+            for name in files:
+                full = os.path.join(root, name)
+                zf.write(full, os.path.relpath(full, os.path.dirname(source)))
+
+
+def _build_7z(source, path):
+    import py7zr
+    with py7zr.SevenZipFile(path, 'w') as sz:
+        sz.writeall(source, os.path.basename(source))
+
+
+def _build_cli(*commands):
+    def build(source, path):
+        parent, name = os.path.dirname(source), os.path.basename(source)
+        for command in commands:
+            subprocess.run(command.format(path=path, parent=parent, name=name, source=source),
+                           shell=True, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return build
+
+
+# 格式名: (扩展名, 生成函数, 依赖的外部工具)；没有对应工具时跳过该格式
+ARCHIVE_BUILDERS = {
+    'zip': ('.zip', _build_zip, None),
+    'tar': ('.tar', lambda s, p: _tar_stream(s, p, 'w'), None),
+    'tar.gz': ('.tar.gz', lambda s, p: _tar_stream(s, p, 'w:gz'), 'tar'),
+    'tar.xz': ('.tar.xz', lambda s, p: _tar_stream(s, p, 'w:xz'), 'xz'),
+    'tar.bz2': ('.tar.bz2', lambda s, p: _tar_stream(s, p, 'w:bz2'), 'bzip2'),
+    '7z': ('.7z', _build_7z, None),
+    'tar.zst': ('.tar.zst', _build_cli("tar -C {parent} --zstd -cf {path} {name}"), 'zstd'),
+    'rar': ('.rar', _build_cli("cd {parent} && rar a -r -idq {path} {name}"), 'rar'),
+    'iso': ('.iso', _build_cli("genisoimage -quiet -R -o {path} {source}"), 'genisoimage'),
+    'cab': ('.cab', _build_cli("cd {parent} && lcab -r {name} {path}"), 'lcab'),
+}
+
+
+def archive_available(fmt: str) -> Optional[str]:
+    """返回无法生成该格式的原因，可以生成时返回 None"""
+    ext, builder, tool = ARCHIVE_BUILDERS[fmt]
+    if tool and shutil.which(tool) is None:
+        return f"缺少 {tool}"
+    if fmt == '7z':
+        try:
+            import py7zr  # noqa: F401
+        except ImportError:
+            return "缺少 py7zr"
+    return None
+
+
+# ---------------------------------------------------------------- 基准用例
+
+def extraction_cases(work_dir: str, quick: bool, skipped: Dict[str, str]) -> List[Case]:
+    shapes = {'many_small': (300, 2048), 'few_large': (2, 1024 * 1024)} if quick else \
+             {'many_small': (3000, 2048), 'few_large': (4, 16 * 1024 * 1024)}
+    processor = FilePreprocessor()
+    cases = []
+    for shape, (files, file_size) in shapes.items():
+        source_root = os.path.join(work_dir, 'src', shape)
+        source = make_source_tree(source_root, files, file_size)
+        for fmt, (ext, builder, tool) in ARCHIVE_BUILDERS.items():
+            reason = archive_available(fmt)
+            if reason:
+                skipped[f"extract.{fmt}"] = reason
+                continue
+            archive = os.path.join(work_dir, 'archives', f"{shape}{ext}")
+            os.makedirs(os.path.dirname(archive), exist_ok=True)
+            try:
+                builder(source, archive)
+            except Exception as e:
+                skipped[f"extract.{fmt}"] = f"生成失败: {e}"
+                continue
+            target = os.path.join(work_dir, 'extract', f"{shape}_{fmt}")
+
+            def setup(target=target):
+                processor.clean_workspace(target)
+
+            def run(archive=archive, target=target):
+                if processor.extract_to_workspace(archive, target) is None:
+                    raise RuntimeError(f"解压失败: {archive}")
+
+            cases.append(Case(f"extract.{fmt}.{shape}", run, setup,
+                              {'files': files, 'file_size': file_size, 'archive_bytes': os.path.getsize(archive)}))
+    return cases
+
+
+def stats_cases(work_dir: str, quick: bool) -> List[Case]:
+    cases = []
+    runner = AFLRunner('fuzzgoat @@', 60, os.path.join(work_dir, 'stats', 'FuzzStatus.json'))
+    for instances in ((1, 8) if quick else (1, 16, 64)):
+        host_dir = os.path.join(work_dir, 'stats', f"x{instances}")
+        for index in range(instances):
+            instance_dir = os.path.join(host_dir, 'output', 'main' if index == 0 else f"secondary{index}")
+            os.makedirs(instance_dir, exist_ok=True)
+            with open(os.path.join(instance_dir, 'fuzzer_stats'), 'w') as f:
+                f.write(fuzzer_stats_text())
+        container = FakeContainer({host_dir: '/tmp'})
+        status_file = os.path.join(host_dir, 'FuzzStatus.json')
+
+        def run(container=container, status_file=status_file):
+            status = runner.get_fuzzing_status(container, status_file)
+            if 'error' in status:
+                raise RuntimeError(status['error'])
+
+        cases.append(Case(f"stats.get_fuzzing_status.x{instances}", run, params={'instances': instances}))
+
+    stats_file = os.path.join(work_dir, 'stats', 'x1', 'output', 'main', 'fuzzer_stats')
+    report = ReportGenerator()
+    loops = 200 if quick else 2000
+
+    def parse():
+        for _ in range(loops):
+            report._parse_stats(stats_file)
+
+    cases.append(Case(f"stats.report_parse_stats.x{loops}", parse, params={'loops': loops}))
+    return cases
+
+
+def convert_path_cases(quick: bool) -> List[Case]:
+    loader = ConfigLoader(ROOT_DIR)
+    bind_mount = {'/data/FuzzWorkDir/fuzzgoat_AbCd': '/tmp',
+                  '/data/FuzzWorkDir/.ccache/gcc-afl': '/ccache',
+                  '/data/FuzzWorkDir/.corpus_pool/fuzzgoat': '/pool'}
+    count = 10000 if quick else 100000
+    host_paths = [f"/data/FuzzWorkDir/fuzzgoat_AbCd/output/main/crashes/id:{i:06d},sig:11" for i in range(count)]
+    docker_paths = [f"/tmp/output/main/crashes/id:{i:06d},sig:11" for i in range(count)]
+
+    def to_docker():
+        for path in host_paths:
+            loader.convert_path(path, bind_mount, to_docker=True)
+
+    def to_host():
+        for path in docker_paths:
+            loader.convert_path(path, bind_mount)
+
+    return [Case(f"config.convert_path.to_docker.x{count}", to_docker, params={'paths': count}),
+            Case(f"config.convert_path.to_host.x{count}", to_host, params={'paths': count})]
+
+
+def build_detect_cases(work_dir: str, quick: bool) -> List[Case]:
+    cases = []
+    for files in ((2000,) if quick else (10000, 50000)):
+        root = os.path.join(work_dir, 'build_tree', f"n{files}")
+        tree = make_source_tree(root, files, 256, seed=files)
+        # 构建树中常见的其他ELF（目标文件、测试程序），与目标同名的只有一个
+        for index in range(20):
+            shutil.copyfile(ELF_SAMPLE, os.path.join(tree, 'src', f"helper_{index}"))
+        target = os.path.join(tree, 'build', 'fuzzgoat')
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        buildexe = BuildExecutor()
+        state = {}
+
+        def full_setup(target=target):
+            shutil.copyfile(ELF_SAMPLE, target)
+
+        def full_scan(tree=tree):
+            if buildexe.check_buildsuccess(None, tree, 'fuzzgoat') is None:
+                raise RuntimeError("未找到目标")
+
+        def diff_setup(tree=tree, target=target):
+            if os.path.exists(target):
+                os.remove(target)
+            state['indexer'] = ArtifactIndexer(tree)
+            state['indexer'].take_snapshot()
+            shutil.copyfile(ELF_SAMPLE, target)
+
+        def snapshot_diff(tree=tree):
+            if buildexe.check_buildsuccess(None, tree, 'fuzzgoat', state['indexer']) is None:
+                raise RuntimeError("未找到目标")
+
+        cases.append(Case(f"build.check_buildsuccess.full_scan.n{files}", full_scan, full_setup, {'files': files}))
+        cases.append(Case(f"build.check_buildsuccess.snapshot_diff.n{files}", snapshot_diff, diff_setup,
+                          {'files': files}))
+    return cases
+
+
+def end_to_end_cases(work_dir: str, quick: bool) -> List[Case]:
+    import start
+    source = make_source_tree(os.path.join(work_dir, 'e2e_src'), 200 if quick else 1000, 2048, seed=7)
+    os.makedirs(os.path.join(source, 'input'), exist_ok=True)
+    with open(os.path.join(source, 'input', 'seed.json'), 'w') as f:
+        f.write('{"a": 1}')
+    archive = os.path.join(work_dir, 'e2e_task.zip')
+    _build_zip(source, archive)
+    cases = []
+    for parallel in ((1,) if quick else (1, 4)):
+        config_path = os.path.join(work_dir, f"e2e_task_p{parallel}.json")
+        with open(config_path, 'w') as f:
+            json.dump({'program_name': f"bench_e2e_p{parallel}", 'source_code_path': archive,
+                       'afl_fuzz_args': {'fuzz_time': '1 s', 'fuzz_target': 'fuzzgoat @@',
+                                         'parallel': parallel}}, f)
+        pool = FakePool(binary=ELF_SAMPLE, target_name='fuzzgoat', output_lines=500 if quick else 5000)
+
+        def run(config_path=config_path, pool=pool):
+            summary = start.AutoFuzzMain(config_path, pool=pool)
+            # 工作目录在 FuzzWorkDir 下，每次运行后删除，不计入耗时之外的部分也不留痕迹
+            shutil.rmtree(summary['workpath'], ignore_errors=True)
+            if summary['status'] != 'success':
+                raise RuntimeError("端到端流程失败")
+            profile = summary.get('profile', {})
+            return {'stage_seconds': profile.get('stage_seconds'), 'counters': profile.get('counters')}
+
+        cases.append(Case(f"e2e.autofuzz_main.p{parallel}", run, params={'parallel': parallel},
+                          repeat=3 if quick else 5))
+    return cases
+
+
+# ---------------------------------------------------------------- 结果与比较
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, min_delta: float = 0.0005) -> List[Dict]:
+    """按中位数比较，变慢超过 threshold（比例）且绝对差大于 min_delta（秒）时视为退化"""
+    rows = []
+    for name, result in sorted(current['results'].items()):
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            rows.append({'name': name, 'median': result['median'], 'baseline': None, 'ratio': None,
+                         'status': 'new'})
+            continue
+        ratio = result['median'] / base['median'] if base['median'] else float('inf')
+        delta = result['median'] - base['median']
+        if ratio > 1 + threshold and delta > min_delta:
+            status = 'regression'
+        elif ratio < 1 - threshold and -delta > min_delta:
+            status = 'improvement'
+        else:
+            status = 'same'
+        rows.append({'name': name, 'median': result['median'], 'baseline': base['median'], 'ratio': ratio,
+                     'status': status})
+    for name in sorted(set(baseline.get('results', {})) - set(current['results'])):
+        rows.append({'name': name, 'median': None, 'baseline': baseline['results'][name]['median'], 'ratio': None,
+                     'status': 'missing'})
+    return rows
+
+
+def print_comparison(rows: List[Dict]):
+    width = max([len(row['name']) for row in rows] + [10])
+    print(f"{'benchmark':<{width}}  {'median':>10}  {'baseline':>10}  {'ratio':>7}  status")
+    for row in rows:
+        median = f"{row['median'] * 1000:.2f}ms" if row['median'] is not None else '-'
+        base = f"{row['baseline'] * 1000:.2f}ms" if row['baseline'] is not None else '-'
+        ratio = f"{row['ratio']:.2f}x" if row['ratio'] is not None else '-'
+        print(f"{row['name']:<{width}}  {median:>10}  {base:>10}  {ratio:>7}  {row['status']}")
+
+
+def run_suite(args) -> Dict:
+    pattern = re.compile(args.filter) if args.filter else None
+    work_dir = tempfile.mkdtemp(prefix='autofuzz_bench_')
+    skipped: Dict[str, str] = {}
+    results = {}
+    try:
+        groups = [
+            ('extract', lambda: extraction_cases(work_dir, args.quick, skipped)),
+            ('stats', lambda: stats_cases(work_dir, args.quick)),
+            ('config', lambda: convert_path_cases(args.quick)),
+            ('build', lambda: build_detect_cases(work_dir, args.quick)),
+            ('e2e', lambda: end_to_end_cases(work_dir, args.quick)),
+        ]
+        for group, make_cases in groups:
+            # 未选中的组不生成合成数据
+            if group not in args.groups:
+                continue
+            for case in make_cases():
+                if pattern and not pattern.search(case.name):
+                    continue
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[case.name] = measure(case, case.repeat or args.repeat)
+                print(f"{case.name}: {results[case.name]['median'] * 1000:.2f}ms "
+                      f"(min {results[case.name]['min'] * 1000:.2f}ms, n={results[case.name]['repeat']})",
+                      file=sys.stderr)
+    finally:
+        if args.keep:
+            print(f"合成数据保留在 {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        'version': RESULT_VERSION,
+        'meta': {'timestamp': time.time(), 'git_revision': git_revision(), 'python': platform.python_version(),
+                 'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'quick': args.quick,
+                 'repeat': args.repeat},
+        'results': results,
+        'skipped': skipped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-output', help='结果JSON文件', type=str,
+                        default=os.path.join(ROOT_DIR, 'BenchFuzzTool', 'BenchResult.json'))
+    parser.add_argument('-baseline', help='与该基线结果比较，有退化时退出码为1', type=str, default=None)
+    parser.add_argument('-savebaseline', help='把本次结果另存为基线', type=str, default=None)
+    parser.add_argument('-threshold', help='判定退化的中位数变慢比例', type=float, default=0.10)
+    parser.add_argument('-repeat', help='每个基准的计时次数（不含1次预热）', type=int, default=5)
+    parser.add_argument('-groups', help='运行的基准组', nargs='+', choices=BENCH_GROUPS, default=BENCH_GROUPS)
+    parser.add_argument('-filter', help='只运行名称匹配该正则的基准', type=str, default=None)
+    parser.add_argument('-quick', help='使用小规模合成数据', action='store_true', default=False)
+    parser.add_argument('-keep', help='保留合成数据目录', action='store_true', default=False)
+    parser.add_argument('-verbose', help='输出被测代码的INFO/WARNING日志', action='store_true', default=False)
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+    current = run_suite(args)
+    for name, reason in sorted(current['skipped'].items()):
+        print(f"跳过 {name}: {reason}", file=sys.stderr)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=4, ensure_ascii=False)
+    if args.savebaseline:
+        shutil.copyfile(args.output, args.savebaseline)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('quick') != current['meta']['quick']:
+            print("警告：基线与本次运行的数据规模（-quick）不同，同名基准不可比", file=sys.stderr)
+        rows = compare(current, baseline, args.threshold)
+        print_comparison(rows)
+        if any(row['status'] == 'regression' for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：性能基准用的假容器（不需要Docker，exec_run按命令返回预先准备的构建结果和AFL输出）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Dict, List
+from OpenFuzzTool.executor import ExecResult
+
+# afl-fuzz启动和状态界面的典型输出（含终端控制序列），按行循环生成
+AFL_BANNER = [
+    b"afl-fuzz++4.21c based on afl by Michal Zalewski and a large online community\n",
+    b"[+] AFL++ is maintained by Marc \"van Hauser\" Heuse, Dominik Maier, Andrea Fioraldi and Heiko \"hexcoder\" Eissfeldt\n",
+    b"[*] Getting to work...\n",
+    b"[+] Using exponential power schedule (FAST)\n",
+    b"[*] Checking core_pattern...\n",
+    b"[*] Setting up output directories...\n",
+    b"[*] Loading input files from './input'...\n",
+    b"[*] Spinning up the fork server...\n",
+    b"[+] All right - fork server is up.\n",
+    b"[*] Target map size: 65536\n",
+    b"[+] All test cases processed.\n",
+    b"[*] Entering queue cycle 1\n",
+]
+AFL_STATUS_LINE = (b"\x1b[?25l\x1b[H\x1b[1;90m  american fuzzy lop \x1b[1;93m++4.21c \x1b[0m{main}"
+                   b"\x1b[1;37m run time : 0 days, 0 hrs, 0 min, %d sec \x1b[0m exec speed : %d/sec\r")
+
+FUZZER_STATS = """start_time        : {start}
+last_update       : {now}
+run_time          : 60
+fuzzer_pid        : 4242
+cycles_done       : 3
+cycles_wo_finds   : 0
+time_wo_finds     : 1
+execs_done        : 123456
+execs_per_sec     : 2057.60
+execs_ps_last_min : 2100.10
+corpus_count      : 150
+corpus_favored    : 30
+corpus_found      : 120
+corpus_imported   : 4
+corpus_variable   : 0
+max_depth         : 6
+cur_item          : 17
+pending_favs      : 2
+pending_total     : 80
+stability         : 100.00%
+bitmap_cvg        : 5.32%
+saved_crashes     : 1
+saved_hangs       : 0
+last_find         : {now}
+last_crash        : {now}
+last_hang         : 0
+execs_since_crash : 1000
+exec_timeout      : 40
+slowest_exec_ms   : 0
+peak_rss_mb       : 12
+cpu_affinity      : 0
+edges_found       : 420
+total_edges       : 65536
+var_byte_count    : 0
+havoc_expansion   : 0
+auto_dict_entries : 0
+testcache_size    : 4096
+testcache_count   : 150
+testcache_evict   : 0
+afl_banner        : fuzzgoat
+afl_version       : ++4.21c
+target_mode       : shmem_testcase default
+command_line      : afl-fuzz -i ./input -o ./output -- /tmp/fuzzgoat @@
+"""
+
+PLOT_HEADER = ("# relative_time, cycles_done, cur_item, corpus_count, pending_total, pending_favs, map_size, "
+               "saved_crashes, saved_hangs, max_depth, execs_per_sec, total_execs, edges_found\n")
+
+ASAN_REPORT = b"""=================================================================
+==4242==ERROR: AddressSanitizer: heap-buffer-overflow on address 0x602000000011 at pc 0x55d4 bp 0x7ffc sp 0x7ffc
+READ of size 1 at 0x602000000011 thread T0
+    #0 0x55d4a1 in json_parse_ex /tmp/fuzzgoat.c:410:13
+    #1 0x55d4b2 in json_parse /tmp/fuzzgoat.c:786:11
+    #2 0x55d4c3 in main /tmp/main.c:71:12
+    #3 0x7f00d4 in __libc_start_main (/lib/x86_64-linux-gnu/libc.so.6+0x21b96)
+SUMMARY: AddressSanitizer: heap-buffer-overflow /tmp/fuzzgoat.c:410:13 in json_parse_ex
+==4242==ABORTING
+"""
+
+
+def fuzzer_stats_text(now: int = None) -> str:
+    now = int(now or time.time())
+    return FUZZER_STATS.format(start=now - 60, now=now)
+
+
+class FakeContainer:
+    """模拟 docker Container 的 exec_run：
+    - bash Build.sh：把 binary 复制到工作目录中作为构建产物
+    - afl-fuzz（stream=True）：在宿主机输出目录写 fuzzer_stats/plot_data/队列/崩溃样本，并流式返回预置输出
+    - 读取 fuzzer_stats：返回与容器内 sh 循环相同格式的拼接结果
+    - 回放崩溃样本：返回ASAN报告
+    其他命令直接成功。所有调用记录在 calls 中。
+    """
+
+    def __init__(self, bind_mount: Dict[str, str], binary: str = '/bin/true', target_name: str = 'fuzzgoat',
+                 output_lines: int = 2000, chunk_lines: int = 20, crashes: int = 1, queue_entries: int = 20):
+        """
+        :param bind_mount: {宿主机目录: 容器内路径}，与 DockerManager 使用的一致
+        :param binary: 构建时复制到工作目录的ELF文件
+        :param target_name: 构建产物的文件名（fuzz_target 的可执行文件名）
+        :param output_lines: 每个afl-fuzz实例流式输出的状态行数
+        :param chunk_lines: 每个输出块包含的行数（docker按块返回输出）
+        """
+        self.bind_mount = dict(bind_mount)
+        self.binary = binary
+        self.target_name = target_name
+        self.output_lines = output_lines
+        self.chunk_lines = chunk_lines
+        self.crashes = crashes
+        self.queue_entries = queue_entries
+        self.calls: List[str] = []
+        self.id = f"fake-{id(self):x}"
+        self.name = self.id
+        self.status = 'running'
+        self._lock = threading.Lock()
+
+    def reload(self):
+        pass
+
+    def host_path(self, path: str) -> str:
+        for host_dir, container_dir in self.bind_mount.items():
+            if path == container_dir or path.startswith(container_dir.rstrip('/') + '/'):
+                return host_dir + path[len(container_dir.rstrip('/')):]
+        return path
+
+    def exec_run(self, cmd, workdir=None, environment=None, stream=False, detach=False, **kwargs):
+        text = cmd if isinstance(cmd, str) else ' '.join(cmd)
+        with self._lock:
+            self.calls.append(text)
+        if 'afl-fuzz' in text and stream:
+            return ExecResult(None, self._fuzz(text, workdir or '/tmp'))
+        if 'bash Build.sh' in text:
+            exit_code, output = 0, self._build(workdir or '/tmp')
+        elif 'fuzzer_stats' in text:
+            exit_code, output = 0, self._read_stats()
+        elif text.startswith('timeout -s KILL') and ' sh -c ' in text:
+            exit_code, output = 1, ASAN_REPORT
+        else:
+            exit_code, output = 0, b''
+        # 与docker SDK一致：返回 ExecResult，流式执行时退出码为None、输出为按块的迭代器
+        if stream:
+            return ExecResult(None, iter([output] if output else []))
+        return ExecResult(exit_code, output)
+
+    def _build(self, workdir: str) -> bytes:
+        target = os.path.join(self.host_path(workdir), self.target_name)
+        shutil.copyfile(self.binary, target)
+        os.chmod(target, 0o755)
+        return b"gcc -o fuzzgoat fuzzgoat.c main.c\n"
+
+    def _read_stats(self) -> bytes:
+        output_dir = self.host_path('/tmp/output')
+        chunks = []
+        for name in sorted(os.listdir(output_dir)) if os.path.isdir(output_dir) else []:
+            stats_file = os.path.join(output_dir, name, 'fuzzer_stats')
+            if os.path.isfile(stats_file):
+                with open(stats_file, 'rb') as f:
+                    chunks.append(f"==> /tmp/output/{name}/fuzzer_stats\n".encode() + f.read())
+        return b''.join(chunks)
+
+    def _write_instance(self, instance_dir: str):
+        for sub in ('queue', 'crashes', 'hangs'):
+            os.makedirs(os.path.join(instance_dir, sub), exist_ok=True)
+        for index in range(self.queue_entries):
+            with open(os.path.join(instance_dir, 'queue', f"id:{index:06d},time:0,execs:{index},op:havoc"), 'wb') as f:
+                f.write(b'{"a":%d}' % index)
+        for index in range(self.crashes):
+            with open(os.path.join(instance_dir, 'crashes', f"id:{index:06d},sig:11,src:000000,op:havoc"), 'wb') as f:
+                f.write(b'{"a":[' + b'1,' * index + b'}')
+        with open(os.path.join(instance_dir, 'plot_data'), 'w') as f:
+            f.write(PLOT_HEADER)
+            for second in range(60):
+                f.write(f"{second}, 0, 0, {second + 1}, 10, 1, 5.32%, 0, 0, 2, 2000.00, {second * 2000}, 420\n")
+        with open(os.path.join(instance_dir, 'fuzzer_stats'), 'w') as f:
+            f.write(fuzzer_stats_text())
+
+    def _fuzz(self, command: str, workdir: str):
+        match = re.search(r'\s-[MS]\s+(\S+)', command)
+        instance = match.group(1) if match else 'default'
+        output_dir = re.search(r'\s-o\s+(\S+)', command).group(1)
+        instance_dir = os.path.join(self.host_path(os.path.normpath(os.path.join(workdir, output_dir))), instance)
+
+        def output():
+            for line in AFL_BANNER:
+                yield line
+            self._write_instance(instance_dir)
+            for start in range(0, self.output_lines, self.chunk_lines):
+                yield b''.join(AFL_STATUS_LINE % (index, 2000 + index)
+                               for index in range(start, min(start + self.chunk_lines, self.output_lines)))
+            yield b"\n+++ Testing aborted by user +++\n[+] We're done here. Have a nice day!\n"
+
+        return output()
+
+
+class FakePool:
+    """与 ContainerPool 接口相同（lease/owns/release），让 AutoFuzzMain 在不连接Docker的情况下完整运行"""
+
+    def __init__(self, **container_kwargs):
+        self.container_kwargs = container_kwargs
+        self.leased: List[FakeContainer] = []
+
+    def lease(self, bind_mount: Dict[str, str]):
+        container = FakeContainer(bind_mount, **self.container_kwargs)
+        self.leased.append(container)
+        return container
+
+    def owns(self, container) -> bool:
+        return container in self.leased
+
+    def release(self, container):
+        container.status = 'exited'
@@ -0,0 +1,307 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的容器内常驻代理模块（一次docker exec启动，之后所有命令经unix socket复用）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import json
+import time
+import queue
+import socket
+import struct
+import logging
+import threading
+from typing import Dict, Optional
+from OpenFuzzTool.executor import DockerExecutor, ExecResult
+
+# 帧格式：请求ID(uint32) + 类型(uint8) + 负载长度(uint32)，后跟负载
+HEADER = struct.Struct('>IBI')
+FRAME_EXEC, FRAME_OUT, FRAME_EXIT, FRAME_SIGNAL, FRAME_SHUTDOWN = 1, 2, 3, 4, 5
+
+SOCKET_NAME = '.autofuzz_agent.sock'
+# AF_UNIX 路径长度上限（含结尾的\0）
+UNIX_PATH_MAX = 107
+
+# 容器内运行的代理程序，只依赖python3标准库（AFL++镜像自带python3）
+AGENT_SCRIPT = r'''
+import os, sys, json, shlex, signal, socket, struct, threading, subprocess
+
+HEADER = struct.Struct('>IBI')
+EXEC, OUT, EXIT, SIGNAL, SHUTDOWN = 1, 2, 3, 4, 5
+procs = {}
+
+
+def recv_exact(conn, size):
+    data = b''
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+
+def killpg(proc, sig):
+    try:
+        os.killpg(proc.pid, sig)
+    except OSError:
+        pass
+
+
+def serve(conn):
+    lock = threading.Lock()
+
+    def send(req_id, kind, payload=b''):
+        with lock:
+            conn.sendall(HEADER.pack(req_id, kind, len(payload)) + payload)
+
+    def signal_matching(req_id, request):
+        # 与 pkill 相同的匹配规则：exact 按进程名，否则按完整命令行；只作用于代理启动的进程组
+        sig = getattr(signal, 'SIG' + request['sig'])
+        killed = 0
+        for proc, cmd in list(procs.values()):
+            if request['exact']:
+                matched = any(os.path.basename(arg) == request['pattern'] for arg in cmd)
+            else:
+                matched = request['pattern'] in ' '.join(cmd)
+            if matched and proc.poll() is None:
+                killpg(proc, sig)
+                killed += 1
+        send(req_id, EXIT, b'0' if killed else b'1')
+
+    def run(req_id, request):
+        cmd = request['cmd']
+        if isinstance(cmd, str):
+            cmd = shlex.split(cmd)
+        env = dict(os.environ)
+        env.update(request.get('env') or {})
+        try:
+            proc = subprocess.Popen(cmd, cwd=request.get('workdir') or '/', env=env, stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, start_new_session=True)
+        except OSError as e:
+            send(req_id, OUT, str(e).encode())
+            send(req_id, EXIT, b'127')
+            return
+        procs[req_id] = (proc, cmd)
+        timer = None
+        if request.get('timeout'):
+            timer = threading.Timer(request['timeout'], killpg, (proc, signal.SIGKILL))
+            timer.start()
+        while True:
+            chunk = os.read(proc.stdout.fileno(), 65536)
+            if not chunk:
+                break
+            send(req_id, OUT, chunk)
+        code = proc.wait()
+        if timer is not None:
+            timer.cancel()
+        procs.pop(req_id, None)
+        send(req_id, EXIT, str(128 - code if code < 0 else code).encode())
+
+    try:
+        while True:
+            req_id, kind, size = HEADER.unpack(recv_exact(conn, HEADER.size))
+            payload = recv_exact(conn, size) if size else b''
+            if kind == EXEC:
+                threading.Thread(target=run, args=(req_id, json.loads(payload)), daemon=True).start()
+            elif kind == SIGNAL:
+                signal_matching(req_id, json.loads(payload))
+            elif kind == SHUTDOWN:
+                for proc, _ in list(procs.values()):
+                    killpg(proc, signal.SIGKILL)
+                os._exit(0)
+    except (EOFError, OSError):
+        pass
+
+
+def main(path):
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    # 只允许挂载目录的属主（宿主机上运行AutoFuzz的用户）连接
+    st = os.stat(os.path.dirname(path))
+    os.chown(path, st.st_uid, st.st_gid)
+    os.chmod(path, 0o600)
+    server.listen(8)
+    while True:
+        conn, _ = server.accept()
+        threading.Thread(target=serve, args=(conn,), daemon=True).start()
+
+
+main(sys.argv[1])
+'''
+
+
+class AgentExecutor(DockerExecutor):
+    """通过容器内常驻代理执行命令：代理用一次docker exec启动，监听挂载目录中的unix socket，
+    之后每条命令只是socket上的一帧请求，多条命令可以并发执行并各自流式返回输出和退出码。
+    代理不可用时退回到逐条docker exec。
+    """
+
+    AGENT_PATH = '/opt/autofuzz_agent.py'
+
+    def __init__(self, container, host_dir: str, container_dir: str = '/tmp'):
+        """
+        :param container: docker容器对象
+        :param host_dir: 挂载到容器内 container_dir 的宿主机目录，socket文件通过它在两侧可见
+        """
+        super().__init__(container)
+        self.host_socket = os.path.join(host_dir, SOCKET_NAME)
+        self.container_socket = f"{container_dir.rstrip('/')}/{SOCKET_NAME}"
+        self._sock: Optional[socket.socket] = None
+        self._pending: Dict[int, queue.Queue] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self.requests = 0
+
+    def start(self, wait: float = 5.0) -> bool:
+        """写入并启动代理，连接socket；失败返回False（之后的命令走docker exec）"""
+        if len(self.host_socket) > UNIX_PATH_MAX:
+            logging.warning(f"socket路径过长（{len(self.host_socket)}），不启用容器内代理")
+            return False
+        try:
+            if os.path.lexists(self.host_socket):
+                os.unlink(self.host_socket)
+            self.write_file(self.AGENT_PATH, AGENT_SCRIPT.encode(), 0o755)
+            self.container.exec_run(['python3', self.AGENT_PATH, self.container_socket], detach=True)
+            deadline = time.time() + wait
+            while not os.path.exists(self.host_socket):
+                if time.time() > deadline:
+                    raise TimeoutError("代理socket未出现")
+                time.sleep(0.05)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.host_socket)
+        except Exception as e:
+            logging.warning(f"容器内代理启动失败，使用docker exec: {e}")
+            return False
+        self._sock = sock
+        threading.Thread(target=self._reader, name="AgentReader", daemon=True).start()
+        logging.info(f"容器内代理已启动: {self.container_socket}")
+        return True
+
+    def _recv_exact(self, size: int) -> bytes:
+        data = b''
+        while len(data) < size:
+            chunk = self._sock.recv(size - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        return data
+
+    def _reader(self):
+        """按请求ID把输出帧和退出帧分发到各自的队列"""
+        try:
+            while True:
+                req_id, kind, size = HEADER.unpack(self._recv_exact(HEADER.size))
+                payload = self._recv_exact(size) if size else b''
+                with self._lock:
+                    pending = self._pending.get(req_id)
+                if pending is not None:
+                    pending.put((kind, payload))
+        except (EOFError, OSError):
+            pass
+        # 连接断开：结束所有等待中的请求，后续命令走docker exec
+        logging.warning("容器内代理连接已断开")
+        with self._lock:
+            self._sock = None
+            pending, self._pending = list(self._pending.values()), {}
+        for item in pending:
+            item.put((FRAME_EXIT, b'-1'))
+
+    def _send(self, req_id: int, kind: int, payload: bytes = b''):
+        with self._send_lock:
+            self._sock.sendall(HEADER.pack(req_id, kind, len(payload)) + payload)
+
+    def _submit(self, command, workdir, env, timeout=None, kind=FRAME_EXEC, request=None):
+        with self._lock:
+            if self._sock is None:
+                return None, None
+            req_id = self._next_id
+            self._next_id += 1
+            pending = self._pending[req_id] = queue.Queue()
+            self.requests += 1
+        if request is None:
+            request = {'cmd': command, 'workdir': workdir, 'env': env or {}, 'timeout': timeout}
+        try:
+            self._send(req_id, kind, json.dumps(request).encode())
+        except (OSError, AttributeError):
+            with self._lock:
+                self._pending.pop(req_id, None)
+            return None, None
+        return req_id, pending
+
+    def _finish(self, req_id: int):
+        with self._lock:
+            self._pending.pop(req_id, None)
+
+    def run(self, command, workdir='/tmp', env=None, timeout=None):
+        req_id, pending = self._submit(command, workdir, env, timeout)
+        if req_id is None:
+            return super().run(command, workdir, env, timeout)
+        chunks = []
+        try:
+            while True:
+                kind, payload = pending.get()
+                if kind == FRAME_OUT:
+                    chunks.append(payload)
+                elif kind == FRAME_EXIT:
+                    return ExecResult(int(payload), b''.join(chunks))
+        finally:
+            self._finish(req_id)
+
+    def stream(self, command, workdir='/tmp', env=None):
+        req_id, pending = self._submit(command, workdir, env)
+        if req_id is None:
+            return super().stream(command, workdir, env)
+
+        def output():
+            try:
+                while True:
+                    kind, payload = pending.get()
+                    if kind == FRAME_OUT:
+                        yield payload
+                    elif kind == FRAME_EXIT:
+                        return
+            finally:
+                self._finish(req_id)
+
+        # 与docker一致，流式执行不返回退出码
+        return ExecResult(None, output())
+
+    def kill(self, pattern, sig='TERM', exact=False):
+        """由代理向它启动的匹配进程组发送信号，不再为每次终止单独 docker exec 一个 pkill"""
+        req_id, pending = self._submit(None, None, None, kind=FRAME_SIGNAL,
+                                       request={'pattern': pattern, 'sig': sig, 'exact': exact})
+        if req_id is None:
+            return super().kill(pattern, sig, exact)
+        try:
+            while True:
+                kind, payload = pending.get()
+                if kind == FRAME_EXIT:
+                    return payload == b'0'
+        finally:
+            self._finish(req_id)
+
+    def close(self):
+        """关闭代理（杀掉它启动的所有进程）"""
+        with self._lock:
+            sock = self._sock
+            self._sock = None
+        if sock is None:
+            return
+        try:
+            with self._send_lock:
+                sock.sendall(HEADER.pack(0, FRAME_SHUTDOWN, 0))
+            sock.close()
+        except OSError:
+            pass
+        logging.info(f"容器内代理已关闭，共处理 {self.requests} 条命令")
@@ -11,64 +11,287 @@
 """
 
 import os
+import re
+import glob
+import shlex
+import hashlib
+import time
+import logging
+import threading
 import subprocess
 import json
-from typing import Dict
+import concurrent.futures
+from typing import Callable, Dict, List, Optional
+from OpenFuzzTool.timeseries import TimeSeriesStore
+from OpenFuzzTool.crash_db import CrashDatabase
+from OpenFuzzTool.minimizer import CorpusMinimizer
+
+# 回放崩溃样本时的sanitizer选项：出错即终止，不做泄漏检测
+SANITIZER_ENV = {
+    'ASAN_OPTIONS': 'abort_on_error=1:symbolize=1:detect_leaks=0:allocator_may_return_null=1',
+    'UBSAN_OPTIONS': 'print_stacktrace=1:halt_on_error=1:abort_on_error=1',
+    'MSAN_OPTIONS': 'abort_on_error=1:symbolize=1',
+}
+
+SANITIZER_ERROR_RE = re.compile(r'==\d+==ERROR: (\w+Sanitizer): ([\w-]+)(.*)')
+SANITIZER_SUMMARY_RE = re.compile(r'SUMMARY: (\w+Sanitizer): (.*)')
+UBSAN_RE = re.compile(r'^(\S+:\d+:\d+): runtime error: (.*)$', re.M)
+FRAME_RE = re.compile(r'^\s*#(\d+)\s+0x[0-9a-fA-F]+\s+(?:in\s+(.+?)\s+)?(\S+)\s*$')
+# 回放时运行时库/拦截器的栈帧，不作为出错位置
+RUNTIME_FRAME_PREFIXES = ('__asan', '__interceptor_', '__sanitizer', '__ubsan', '__msan', 'asan_', '___interceptor_',
+                          '__GI_', 'raise', 'abort', '__libc_', '__pthread_kill')
+# fuzz期间只分诊修改时间早于该秒数的样本，避免读到afl-fuzz尚未写完的文件
+MIN_CRASH_AGE = 1.0
+SIGNALS = {4: 'SIGILL', 6: 'SIGABRT', 7: 'SIGBUS', 8: 'SIGFPE', 9: 'SIGKILL', 11: 'SIGSEGV'}
+
+
+def parse_sanitizer_output(text: str, exit_code: Optional[int] = None) -> Dict:
+    """把sanitizer输出解析成结构化记录：bug类型、出错栈帧和调用栈"""
+    record = {'sanitizer': None, 'bug_type': None, 'summary': None, 'faulting_frame': None, 'stack': []}
+    match = SANITIZER_ERROR_RE.search(text)
+    if match:
+        record['sanitizer'] = match.group(1)
+        record['bug_type'] = match.group(2)
+    else:
+        match = UBSAN_RE.search(text)
+        if match:
+            record['sanitizer'] = 'UndefinedBehaviorSanitizer'
+            record['bug_type'] = 'undefined-behavior'
+            record['summary'] = f"{match.group(2)} at {match.group(1)}"
+    summary = SANITIZER_SUMMARY_RE.search(text)
+    if summary:
+        record['summary'] = summary.group(2).strip()
+
+    # 只取第一段调用栈（出错位置），后面的 allocated/freed by 栈不计入
+    for line in text.splitlines():
+        frame = FRAME_RE.match(line)
+        if frame is None:
+            if record['stack'] and not line.strip():
+                break
+            continue
+        index = int(frame.group(1))
+        if index == 0 and record['stack']:
+            break
+        record['stack'].append({'index': index, 'function': frame.group(2) or '', 'location': frame.group(3)})
+
+    for frame in record['stack']:
+        if frame['function'] and not frame['function'].startswith(RUNTIME_FRAME_PREFIXES):
+            record['faulting_frame'] = frame
+            break
+    if record['faulting_frame'] is None and record['stack']:
+        record['faulting_frame'] = record['stack'][0]
+
+    if record['bug_type'] is None and exit_code is not None:
+        # 没有sanitizer报告时按信号分类（shell中 128+N 表示被信号N杀死）
+        signal = exit_code - 128 if exit_code > 128 else (-exit_code if exit_code < 0 else None)
+        if signal in SIGNALS:
+            record['bug_type'] = SIGNALS[signal].lower()
+    return record
+
+
+class CrashTriager:
+    def __init__(self, container, target_cmd: str, path_mapper: Callable[[str], str], results_dir: str,
+                 max_workers: int = 4, timeout: int = 10, env: Dict[str, str] = None,
+                 crash_db: CrashDatabase = None, program: str = None, run_id: int = None):
+        """回放崩溃样本并生成结构化的sanitizer报告
+        Args:
+            container: Docker容器实例
+            target_cmd: 容器内的目标命令（sanitizer构建），@@ 会被替换为样本路径，没有 @@ 时从stdin输入
+            path_mapper: 宿主机路径 -> 容器内路径
+            results_dir: 宿主机上保存分诊结果的目录，每个样本一个JSON
+            max_workers: 同时回放的样本数（每个样本是容器内一个独立进程）
+            timeout: 单个样本的回放超时（秒）
+            crash_db: 可选的 CrashDatabase，内容哈希已知的样本不再回放，结果按调用栈哈希去重
+            program: 写入崩溃数据库时使用的程序名
+            run_id: 本次运行在崩溃数据库中的ID
+        """
+        self.container = container
+        self.target_cmd = target_cmd
+        self.path_mapper = path_mapper
+        self.results_dir = results_dir
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.env = dict(SANITIZER_ENV, **(env or {}))
+        self.crash_db = crash_db
+        self.program = program
+        self.run_id = run_id
+        self.skipped = 0
+        self.replayed = 0
+        self._done = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        os.makedirs(self.results_dir, exist_ok=True)
+
+    def result_path(self, crash_file: str) -> str:
+        """结果文件名包含实例名，避免多个实例的同名样本冲突"""
+        instance = os.path.basename(os.path.dirname(os.path.dirname(crash_file)))
+        return os.path.join(self.results_dir, f"{instance}_{os.path.basename(crash_file)}.json")
+
+    @staticmethod
+    def input_sha256(crash_file: str) -> str:
+        with open(crash_file, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def replay(self, crash_file: str) -> Dict:
+        """在容器内回放单个样本，返回结构化记录"""
+        container_path = shlex.quote(self.path_mapper(crash_file))
+        if '@@' in self.target_cmd:
+            command = self.target_cmd.replace('@@', container_path)
+        else:
+            command = f"{self.target_cmd} < {container_path}"
+        exit_code, output = self.container.exec_run(
+            ['timeout', '-s', 'KILL', str(self.timeout), 'sh', '-c', command],
+            workdir='/tmp', environment=self.env)
+        text = output.decode(errors='replace') if output else ''
+        record = parse_sanitizer_output(text, exit_code)
+        record['input_sha256'] = self.input_sha256(crash_file)
+        record.update({
+            'input': crash_file,
+            'exit_code': exit_code,
+            'timed_out': exit_code == 137,
+            'output_tail': text[-4000:],
+        })
+        return record
+
+    def triage_one(self, crash_file: str) -> Optional[Dict]:
+        result_path = self.result_path(crash_file)
+        if os.path.exists(result_path):
+            return None
+        try:
+            if self.crash_db is not None and self.crash_db.known_input(self.program, self.input_sha256(crash_file)):
+                # 其他实例或之前的运行已经分诊过相同内容的样本
+                with self._lock:
+                    self.skipped += 1
+                return None
+            record = self.replay(crash_file)
+        except Exception as e:
+            logging.error(f"回放崩溃样本失败 {crash_file}: {str(e)}")
+            # 失败的样本不算已处理，下一轮（或结束时的最后一轮）重试
+            with self._lock:
+                self._done.discard(crash_file)
+            return None
+        with self._lock:
+            self.replayed += 1
+        if self.crash_db is not None:
+            record['bug_id'], record['new_bug'] = self.crash_db.record(self.program, record, self.run_id)
+        with open(result_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, indent=4, ensure_ascii=False)
+        logging.info(f"崩溃分诊 {os.path.basename(crash_file)}: {record['bug_type']} @ "
+                     f"{(record['faulting_frame'] or {}).get('function')}")
+        return record
+
+    def triage(self, crash_files: List[str], min_age: float = 0) -> List[Dict]:
+        """在有界的线程池中并行回放尚未分诊的样本
+        Args:
+            min_age: 只处理修改时间早于该秒数的样本，更新的样本留到下一轮
+        """
+        now = time.time()
+        with self._lock:
+            pending = [f for f in crash_files if f not in self._done and self._settled(f, now, min_age)]
+            self._done.update(pending)
+        records = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for record in executor.map(self.triage_one, pending):
+                if record is not None:
+                    records.append(record)
+        return records
+
+    @staticmethod
+    def _settled(crash_file: str, now: float, min_age: float) -> bool:
+        if min_age <= 0:
+            return True
+        try:
+            return now - os.path.getmtime(crash_file) >= min_age
+        except OSError:
+            return False
+
+    @staticmethod
+    def find_crashes(output_dir: str) -> List[str]:
+        """AFL输出目录下所有实例的崩溃样本"""
+        return sorted(glob.glob(os.path.join(output_dir, '*', 'crashes', 'id:*')))
+
+    def start_watching(self, output_dir: str, interval: float = 10.0):
+        """fuzz进行期间在后台周期性地分诊新出现的崩溃样本"""
+        def run():
+            while not self._stop_event.wait(interval):
+                self.triage(self.find_crashes(output_dir), min_age=MIN_CRASH_AGE)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name="CrashTriager", daemon=True)
+        self._thread.start()
+
+    def stop_watching(self, output_dir: str):
+        """停止后台分诊，并处理剩余的样本"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.triage(self.find_crashes(output_dir))
+
 
 class ResultAnalyzer:
-    def __init__(self, container=None):
+    def __init__(self, container=None, triager: CrashTriager = None, minimizer: CorpusMinimizer = None):
         """初始化分析器
         Args:
             container: Docker容器实例
+            triager: 可选的 CrashTriager，用于回放崩溃样本生成ASAN报告
+            minimizer: 可选的 CorpusMinimizer，用于afl-cmin去重
         """
         self.container = container
+        self.triager = triager
+        self.minimizer = minimizer
 
     def process_crashes(self, output_dir: str):
         """处理crash样本"""
         crash_dir = os.path.join(output_dir, 'crashes')
-        self._deduplicate(crash_dir)
+        crash_dir = self._deduplicate(crash_dir) or crash_dir
         self._generate_reports(crash_dir)
 
-    def _deduplicate(self, directory: str):
+    def _deduplicate(self, directory: str) -> Optional[str]:
         """使用afl-cmin去重
         Args:
             directory: crash目录的本地路径
+        Returns:
+            去重后的目录，未配置minimizer或afl-cmin失败时返回 None
         """
-        if not self.container:
-            raise RuntimeError("需要Docker容器实例来执行afl-cmin命令")
-        
-        # 假设本地目录已经被挂载到容器的/workspace目录下
-        container_dir = os.path.join('/workspace', os.path.basename(directory))
-        container_dir_min = container_dir + '_min'
-        
-        # 在容器内执行afl-cmin命令
-        result = self.container.exec_run(
-            cmd=["afl-cmin", "-i", container_dir, "-o", container_dir_min],
-            workdir="/workspace"
-        )
-        
-        if result.exit_code != 0:
-            raise RuntimeError(f"afl-cmin命令执行失败: {result.output.decode()}")
+        if self.minimizer is None:
+            logging.warning("未配置CorpusMinimizer，跳过afl-cmin去重")
+            return None
+        return self.minimizer.cmin(directory, directory + '_min', crash_mode=True)
 
     def _generate_reports(self, crash_dir: str):
-        """生成ASAN报告"""
-        for crash in os.listdir(crash_dir):
-            if crash.startswith('id:'):
-                self._analyze_crash(os.path.join(crash_dir, crash))
+        """生成ASAN报告：并行回放目录下所有 id:* 样本"""
+        crash_files = sorted(os.path.join(crash_dir, crash) for crash in os.listdir(crash_dir)
+                             if crash.startswith('id:'))
+        if self.triager is None:
+            for crash_file in crash_files:
+                self._analyze_crash(crash_file)
+            return []
+        return self.triager.triage(crash_files)
 
     def _analyze_crash(self, crash_file: str):
         """分析单个崩溃样本"""
-        # 实现具体的崩溃分析逻辑
-        pass
+        if self.triager is None:
+            logging.warning(f"未配置CrashTriager，跳过崩溃样本 {crash_file}")
+            return None
+        return self.triager.triage_one(crash_file)
 
 class ReportGenerator:
-    def create_summary(self, output_dir: str) -> Dict:
-        """生成结构化报告"""
-        return {
+    def create_summary(self, output_dir: str, timeseries_dir: str = None) -> Dict:
+        """生成结构化报告
+        Args:
+            output_dir: AFL实例的输出目录
+            timeseries_dir: 可选，TimeSeriesStore的保存目录，提供时附加时间序列统计
+        """
+        summary = {
             "crashes": self._count_files(os.path.join(output_dir, 'crashes')),
             "hangs": self._count_files(os.path.join(output_dir, 'hangs')),
             "stats": self._parse_stats(os.path.join(output_dir, 'fuzzer_stats'))
         }
+        if timeseries_dir and os.path.isdir(timeseries_dir):
+            summary["timeseries"] = TimeSeriesStore.load(timeseries_dir).summary()
+        return summary
 
     def _count_files(self, directory: str) -> int:
         """统计目录中的文件数量"""
@@ -0,0 +1,200 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的构建产物索引模块（进程内解析ELF，识别AFL插桩与sanitizer）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import json
+import struct
+import logging
+from typing import Dict, List, Optional, Tuple
+from OpenFuzzTool.build_cache import BuildCache
+
+ARTIFACT_INDEX_NAME = 'ArtifactIndex.json'
+
+ELF_MACHINES = {3: 'x86', 8: 'mips', 20: 'ppc', 21: 'ppc64', 40: 'arm', 62: 'x86_64',
+                183: 'aarch64', 243: 'riscv'}
+ET_EXEC, ET_DYN = 2, 3
+PT_INTERP = 3
+SHT_SYMTAB, SHT_DYNSYM = 2, 11
+
+# 符号表字符串中的特征符号
+AFL_MARKERS = {
+    'instrumented': [b'__afl_area_ptr'],
+    'forkserver': [b'__afl_start_forkserver', b'__afl_auto_init', b'__afl_manual_init'],
+    'deferred_forkserver': [b'__afl_manual_init'],
+    'persistent': [b'__afl_persistent_loop'],
+    'cmplog': [b'__cmplog_ins_hook1', b'__afl_cmp_map'],
+}
+SANITIZER_MARKERS = {
+    'asan': [b'__asan_init'],
+    'msan': [b'__msan_init'],
+    'ubsan': [b'__ubsan_handle_'],
+    'tsan': [b'__tsan_init'],
+    'lsan': [b'__lsan_do_leak_check'],
+}
+
+
+def parse_elf(path: str) -> Optional[Dict]:
+    """解析ELF头、程序头和符号字符串表，返回产物信息；不是ELF时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            ident = f.read(16)
+            if len(ident) < 16 or ident[:4] != b'\x7fELF':
+                return None
+            is64 = ident[4] == 2
+            endian = '<' if ident[5] == 1 else '>'
+            if is64:
+                header = struct.unpack(endian + 'HHIQQQIHHHHHH', f.read(48))
+            else:
+                header = struct.unpack(endian + 'HHIIIIIHHHHHH', f.read(36))
+            (e_type, e_machine, _, _, e_phoff, e_shoff, _, _,
+             e_phentsize, e_phnum, e_shentsize, e_shnum, _) = header
+
+            has_interp = False
+            for i in range(e_phnum):
+                f.seek(e_phoff + i * e_phentsize)
+                if struct.unpack(endian + 'I', f.read(4))[0] == PT_INTERP:
+                    has_interp = True
+                    break
+
+            # 读取所有节头，找到 .symtab/.dynsym 关联的字符串表
+            sections = []
+            for i in range(e_shnum):
+                f.seek(e_shoff + i * e_shentsize)
+                if is64:
+                    _, sh_type, _, _, sh_offset, sh_size, sh_link, _, _, _ = \
+                        struct.unpack(endian + 'IIQQQQIIQQ', f.read(64))
+                else:
+                    _, sh_type, _, _, sh_offset, sh_size, sh_link, _, _, _ = \
+                        struct.unpack(endian + 'IIIIIIIIII', f.read(40))
+                sections.append((sh_type, sh_offset, sh_size, sh_link))
+            strtab = b''
+            # 动态链接的程序strip后仍保留 .dynsym，是否strip只看 .symtab
+            has_symtab = any(sh_type == SHT_SYMTAB and sh_size > 0 for sh_type, _, sh_size, _ in sections)
+            for sh_type, _, _, sh_link in sections:
+                if sh_type in (SHT_SYMTAB, SHT_DYNSYM) and sh_link < len(sections):
+                    _, str_offset, str_size, _ = sections[sh_link]
+                    f.seek(str_offset)
+                    strtab += f.read(str_size)
+    except (OSError, struct.error) as e:
+        logging.info(f"解析ELF失败 {path}: {e}")
+        return None
+
+    if e_type == ET_EXEC:
+        kind = 'executable'
+    elif e_type == ET_DYN:
+        kind = 'executable' if has_interp else 'shared_library'
+    else:
+        kind = 'other'
+    return {
+        'kind': kind,
+        'arch': ELF_MACHINES.get(e_machine, str(e_machine)),
+        'bits': 64 if is64 else 32,
+        'pie': e_type == ET_DYN and has_interp,
+        'stripped': not has_symtab,
+        'afl': {name: any(marker in strtab for marker in markers) for name, markers in AFL_MARKERS.items()},
+        'sanitizers': [name for name, markers in SANITIZER_MARKERS.items()
+                       if any(marker in strtab for marker in markers)],
+    }
+
+
+class ArtifactIndexer:
+    def __init__(self, workspace: str):
+        self.workspace = os.path.abspath(workspace)
+        self.before: Optional[Dict[str, Tuple[int, int]]] = None
+        self.after: Optional[Dict[str, Tuple[int, int]]] = None
+        self.records: List[Dict] = []
+        # records 是否来自全部文件（而不只是构建后变化的文件）
+        self.full_index = False
+        # 构建前后快照遍历的文件总数
+        self.files_walked = 0
+
+    def take_snapshot(self):
+        """构建前记录工作目录中每个文件的 (mtime_ns, size)，跳过 output 等目录"""
+        self.before = BuildCache.snapshot(self.workspace)
+        self.files_walked += len(self.before)
+        return self.before
+
+    def changed_paths(self) -> List[str]:
+        """构建后新增或修改的文件；没有构建前快照时返回全部文件"""
+        after = self.after = BuildCache.snapshot(self.workspace)
+        self.files_walked += len(after)
+        if self.before is None:
+            return sorted(after)
+        return sorted(rel_path for rel_path, sig in after.items() if self.before.get(rel_path) != sig)
+
+    def index(self, rel_paths: List[str] = None) -> List[Dict]:
+        """解析给定文件（默认为构建后变化的文件），记录可执行产物"""
+        if rel_paths is None:
+            rel_paths = self.changed_paths()
+            self.full_index = self.before is None
+        records = []
+        for rel_path in rel_paths:
+            full_path = os.path.join(self.workspace, rel_path)
+            if os.path.islink(full_path) or not os.path.isfile(full_path):
+                continue
+            info = parse_elf(full_path)
+            if info is None:
+                if os.access(full_path, os.X_OK) and self._is_script(full_path):
+                    info = {'kind': 'script'}
+                else:
+                    continue
+            info['path'] = full_path
+            info['name'] = os.path.basename(full_path)
+            records.append(info)
+        self.records = records
+        return records
+
+    @staticmethod
+    def _is_script(path: str) -> bool:
+        try:
+            with open(path, 'rb') as f:
+                return f.read(2) == b'#!'
+        except OSError:
+            return False
+
+    def select_target(self, filename: str) -> Optional[Dict]:
+        """确定性地选择目标：同名的可执行产物中优先AFL插桩的ELF，其次普通ELF，最后脚本；
+        同等条件下选路径层级最浅、字典序最小的；
+        构建后变化的文件中没有目标时（压缩包自带的预编译程序、增量构建未改动的产物），回退到索引全部文件"""
+        candidates = self._candidates(filename)
+        if not candidates and not self.full_index:
+            if self.after is None:
+                self.after = BuildCache.snapshot(self.workspace)
+                self.files_walked += len(self.after)
+            logging.info(f"构建后变化的文件中没有 {filename}，索引工作目录中的全部文件")
+            self.index(sorted(self.after))
+            self.full_index = True
+            candidates = self._candidates(filename)
+        if not candidates:
+            return None
+
+        def rank(record):
+            instrumented = record.get('afl', {}).get('instrumented', False)
+            kind_rank = 0 if instrumented else (1 if record['kind'] == 'executable' else 2)
+            return kind_rank, record['path'].count(os.sep), record['path']
+
+        return sorted(candidates, key=rank)[0]
+
+    def _candidates(self, filename: str) -> List[Dict]:
+        return [r for r in self.records if r['name'] == filename and r['kind'] in ('executable', 'script')]
+
+    def save(self, target: Optional[Dict] = None) -> str:
+        """把索引保存到工作目录，供后续阶段（校准、分诊等）读取"""
+        index_path = os.path.join(self.workspace, ARTIFACT_INDEX_NAME)
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump({'target': target, 'artifacts': self.records}, f, indent=4, ensure_ascii=False)
+        return index_path
+
+    @staticmethod
+    def load(workspace: str) -> Dict:
+        with open(os.path.join(workspace, ARTIFACT_INDEX_NAME), encoding='utf-8') as f:
+            return json.load(f)
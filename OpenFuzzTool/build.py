@@ -14,15 +14,21 @@ import os
 import logging
 import concurrent.futures
 import time
-import subprocess
 from typing import List, Dict, Any
-from docker.models.containers import Container
+try:
+    from docker.models.containers import Container
+except ImportError:  # local后端不需要docker SDK
+    Container = Any
+from OpenFuzzTool.artifacts import ArtifactIndexer
 
 class BuildExecutor:
     def __init__(self):
         self.max_retries = 3
         self.timeout = 600  # 10分钟超时
         self.parallel_jobs = 4
+        self.cache_hit = False
+        self.compiler_cache_stats = None
+        self.artifact = None
 
     def execute_command(self, container: Container, command: str, workdir: str = "/tmp", env: Dict[str, str] = {}) -> bool:
         """执行单个命令并处理结果"""
@@ -82,8 +88,10 @@ class BuildExecutor:
                 return False
         return True
 
-    def inital_build(self, container: Container) -> bool:
-        """在容器内执行构建过程"""
+    def inital_build(self, container: Container, compiler_cache=None) -> bool:
+        """在容器内执行构建过程
+        :param compiler_cache: 可选的 CompilerCache，设置后编译器调用经过挂载在容器内的ccache
+        """
         try:
             commands =[
                 'chmod -R 777 /tmp/',
@@ -94,24 +102,67 @@ class BuildExecutor:
                 logging.warning("No commands found in build script")
                 return True
 
-            logging.info(f"Executing {len(commands)} initialization commands...")
+            env: Dict[str, str] = {}
+            stats_before = {}
+            if compiler_cache is not None and not compiler_cache.available(container):
+                logging.warning("AFL++镜像中没有ccache，本次构建不使用编译缓存（-ccache 需要在镜像中预装ccache）")
+            elif compiler_cache is not None:
+                if self.sequential_execute(container, compiler_cache.setup_commands()):
+                    env = compiler_cache.build_env(compiler_cache.container_path(container))
+                    stats_before = self.read_compiler_cache_stats(container, compiler_cache, env)
+                else:
+                    logging.warning("ccache setup failed, building without compiler cache")
+
+            logging.info(f"Executing {len(commands)} build commands...")
             start_time = time.time()
 
             # 并行执行命令
-            success = self.sequential_execute(container, commands)
+            success = self.sequential_execute(container, commands, env=env)
 
             execution_time = time.time() - start_time
-            logging.info(f"Initialization completed in {execution_time:.2f} seconds")
+            logging.info(f"Build completed in {execution_time:.2f} seconds")
+
+            if env:
+                stats_after = self.read_compiler_cache_stats(container, compiler_cache, env)
+                self.compiler_cache_stats = compiler_cache.hit_rate(stats_before, stats_after)
 
             if not success:
-                raise RuntimeError("One or more initialization commands failed")
+                raise RuntimeError("One or more build commands failed")
 
             return True
 
         except Exception as e:
-            logging.error(f"Initialization failed: {str(e)}")
+            logging.error(f"Build failed: {str(e)}")
             return False
 
+    def read_compiler_cache_stats(self, container: Container, compiler_cache, env: Dict[str, str]) -> Dict[str, int]:
+        """读取容器内ccache的统计计数"""
+        try:
+            result = container.exec_run(compiler_cache.stats_command(), environment=env)
+            if result.exit_code not in (0, None):
+                return {}
+            return compiler_cache.parse_stats(result.output.decode(errors='replace'))
+        except Exception as e:
+            logging.error(f"读取ccache统计失败: {str(e)}")
+            return {}
+
+    def cached_build(self, container: Container, workspace: str, build_cache, cache_key: str,
+                     compiler_cache=None, before=None) -> bool:
+        """带构建缓存的构建：命中时直接恢复构建产物，未命中时构建并缓存新增/修改的文件
+        :param before: 可选的构建前快照（与 ArtifactIndexer 共用，避免重复遍历工作目录）
+        """
+        self.cache_hit = False
+        if build_cache.restore(cache_key, workspace):
+            self.cache_hit = True
+            return True
+
+        if before is None:
+            before = build_cache.snapshot(workspace)
+        success = self.inital_build(container, compiler_cache)
+        if success:
+            build_cache.store(cache_key, workspace, build_cache.changed_files(workspace, before))
+        return success
+
     def inital_env(self, container: Container) -> bool:
         """在容器内执行构建过程"""
         try:
@@ -141,31 +192,29 @@ class BuildExecutor:
             logging.error(f"Initialization failed: {str(e)}")
             return False
 
-    def check_buildsuccess(self, container: Container,directory:str,filename:str) -> bool:
-        matching_files = []
-        
-        # 遍历目录下的所有文件和子目录
-        for root, dirs, files in os.walk(directory):
-            if filename in files:
-                full_path = os.path.join(root, filename)
-                # 使用 'file' 命令来检测文件类型
-                try:
-                    result = subprocess.run(['file', full_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                    if result.returncode == 0:
-                        file_info = result.stdout.decode('utf-8')
-                        if 'executable' in file_info or 'script' in file_info:
-                            matching_files.append(full_path)
-                except Exception as e:
-                    logging.info(f"错误：无法执行 'file' 命令，原因: {e}")
-        
+    def check_buildsuccess(self, container: Container,directory:str,filename:str, indexer=None) -> bool:
+        """在构建产物中查找目标可执行文件
+        只解析构建前后发生变化的文件（需要 indexer 在构建前拍过快照，否则扫描整个工作目录），
+        进程内解析ELF并按确定的优先级选择目标，索引保存到工作目录的 ArtifactIndex.json。
+        """
+        if indexer is None:
+            indexer = ArtifactIndexer(directory)
+        records = indexer.index()
+        target = indexer.select_target(filename)
+        indexer.save(target)
+
+        matching_files = [r['path'] for r in records if r['name'] == filename]
         if len(matching_files) > 1:
-            logging.info(f"警告：在目录 {directory} 中找到了多个可执行文件：")
+            logging.info(f"警告：在目录 {directory} 中找到了多个同名文件，选择 {target['path'] if target else None}：")
             for f in matching_files:
                 logging.info(f)
-        
-        if matching_files:
-            self.binpath = matching_files[0]
-            return matching_files[0]
+
+        if target:
+            self.binpath = target['path']
+            self.artifact = target
+            logging.info(f"目标可执行文件: {target['path']}，架构 {target.get('arch')}，"
+                         f"AFL插桩 {target.get('afl', {}).get('instrumented')}，sanitizer {target.get('sanitizers')}")
+            return target['path']
         else:
             logging.error(f"未找到可执行文件 {filename}。")
-            return None
\ No newline at end of file
+            return None
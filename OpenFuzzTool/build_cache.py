@@ -0,0 +1,171 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的构建产物缓存模块（按内容寻址，LRU淘汰）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+# 计算源码哈希和构建前后快照时跳过的目录/文件（压缩包解压目录、fuzz输出等）
+SKIP_DIRS = {'extractdir', 'output', 'timeseries', 'triage', 'minimize', 'seeds', 'seeds_dedup', 'seeds_cmin', 'logs',
+             '.tmpfs_staging'}
+SKIP_FILES = {'FuzzStatus.json', 'TaskSummary.json', 'FileInfo.json', 'ArtifactIndex.json',
+              '.autofuzz_agent.sock', 'Profile.trace.json', 'Profile.prom'}
+
+
+class BuildCache:
+    def __init__(self, cache_root: str, max_bytes: int = 10 * 1024 ** 3):
+        """
+        :param cache_root: 缓存根目录，每个缓存项是其中以key命名的子目录
+        :param max_bytes: 缓存总大小上限，超过时按最近使用时间淘汰
+        """
+        self.cache_root = cache_root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_root, exist_ok=True)
+
+    @staticmethod
+    def iter_files(workspace: str):
+        """按固定顺序遍历工作目录中参与缓存的文件，返回相对路径"""
+        for root, dirs, files in os.walk(workspace):
+            if root == workspace:
+                dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            dirs.sort()
+            for name in sorted(files):
+                if root == workspace and name in SKIP_FILES:
+                    continue
+                yield os.path.relpath(os.path.join(root, name), workspace)
+
+    def compute_key(self, workspace: str, compiler_settings: dict, image_digest: str,
+                    compiler_modules: dict = None) -> str:
+        """缓存key = sha256(源码树 + Build.sh + 编译器设置 + AFL编译模式 + 镜像digest)
+        :param compiler_modules: CC_module/CXX_module 等AFL++编译模式（LTO、classic等），切换后产物不能复用
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps({'compiler': compiler_settings or {}, 'modules': compiler_modules or {}},
+                                 sort_keys=True).encode())
+        digest.update((image_digest or '').encode())
+        build_sh = os.path.join(workspace, 'Build.sh')
+        if os.path.exists(build_sh):
+            with open(build_sh, 'rb') as f:
+                digest.update(b'Build.sh\0' + hashlib.sha256(f.read()).digest())
+        for rel_path in self.iter_files(workspace):
+            full_path = os.path.join(workspace, rel_path)
+            if os.path.islink(full_path):
+                digest.update(f"L{rel_path}\0{os.readlink(full_path)}\0".encode())
+                continue
+            file_hash = hashlib.sha256()
+            with open(full_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    file_hash.update(chunk)
+            digest.update(f"F{rel_path}\0".encode() + file_hash.digest())
+        return digest.hexdigest()
+
+    @staticmethod
+    def snapshot(workspace: str) -> Dict[str, Tuple[int, int]]:
+        """记录构建前每个文件的 (mtime_ns, size)，用于找出构建产生或修改的文件"""
+        result = {}
+        for rel_path in BuildCache.iter_files(workspace):
+            try:
+                st = os.lstat(os.path.join(workspace, rel_path))
+            except OSError:
+                continue
+            result[rel_path] = (st.st_mtime_ns, st.st_size)
+        return result
+
+    def changed_files(self, workspace: str, before: Dict[str, Tuple[int, int]]) -> List[str]:
+        after = self.snapshot(workspace)
+        return [rel_path for rel_path, sig in after.items() if before.get(rel_path) != sig]
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_root, key)
+
+    def lookup(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self._entry_dir(key), 'manifest.json'))
+
+    def restore(self, key: str, workspace: str) -> bool:
+        """命中时把缓存的构建产物复制回工作目录"""
+        manifest_path = os.path.join(self._entry_dir(key), 'manifest.json')
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        files_dir = os.path.join(self._entry_dir(key), 'files')
+        try:
+            for rel_path in manifest['files']:
+                src = os.path.join(files_dir, rel_path)
+                dst = os.path.join(workspace, rel_path)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                if os.path.lexists(dst):
+                    os.remove(dst)
+                shutil.copy2(src, dst, follow_symlinks=False)
+        except Exception as e:
+            logging.error(f"恢复构建缓存失败 {key}: {str(e)}")
+            return False
+        # 更新使用时间，供LRU淘汰使用
+        os.utime(manifest_path)
+        logging.info(f"构建缓存命中 {key[:12]}，恢复 {len(manifest['files'])} 个文件")
+        return True
+
+    def store(self, key: str, workspace: str, rel_paths: List[str]) -> bool:
+        """保存构建产物；先写临时目录再rename，多个任务同时写同一key时只保留一份"""
+        entry_dir = self._entry_dir(key)
+        if self.lookup(key):
+            return True
+        tmp_dir = f"{entry_dir}.tmp.{os.getpid()}.{threading.get_ident()}"
+        total_size = 0
+        try:
+            for rel_path in rel_paths:
+                src = os.path.join(workspace, rel_path)
+                dst = os.path.join(tmp_dir, 'files', rel_path)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                shutil.copy2(src, dst, follow_symlinks=False)
+                total_size += os.lstat(dst).st_size
+            with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'files': rel_paths, 'size': total_size,
+                           'created': time.time()}, f, indent=4)
+            os.rename(tmp_dir, entry_dir)
+        except OSError as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if self.lookup(key):
+                return True
+            logging.error(f"写入构建缓存失败 {key}: {str(e)}")
+            return False
+        logging.info(f"构建产物已缓存 {key[:12]}：{len(rel_paths)} 个文件，{total_size} 字节")
+        self.evict()
+        return True
+
+    def evict(self):
+        """总大小超过上限时，按manifest最近使用时间淘汰最旧的缓存项"""
+        with self._lock:
+            entries = []
+            total = 0
+            for key in os.listdir(self.cache_root):
+                manifest_path = os.path.join(self._entry_dir(key), 'manifest.json')
+                try:
+                    with open(manifest_path, encoding='utf-8') as f:
+                        size = json.load(f).get('size', 0)
+                    entries.append((os.path.getmtime(manifest_path), key, size))
+                    total += size
+                except (OSError, ValueError):
+                    continue
+            entries.sort()
+            while total > self.max_bytes and entries:
+                _, key, size = entries.pop(0)
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+                total -= size
+                logging.info(f"淘汰构建缓存 {key[:12]}（{size} 字节）")
@@ -0,0 +1,201 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的目标校准模块（探测插桩map大小、persistent/deferred模式、单次执行耗时，生成afl-fuzz参数）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import json
+import math
+import mmap
+import shlex
+import logging
+import statistics
+from typing import Callable, Dict, List, Optional
+
+# 探测失败时沿用原来的固定值，保证大map（如LTO插桩）的目标仍能启动
+FALLBACK_MAP_SIZE = 10000000
+# AFL++ 要求map大小按64字节对齐
+MAP_SIZE_ALIGN = 64
+# 与afl-fuzz的EXEC_TM_ROUND一致，超时按20ms取整
+EXEC_TM_ROUND = 20
+MIN_TIMEOUT_MS = 20
+# 单次执行超过该耗时（毫秒）视为慢目标，启用 AFL_FAST_CAL 缩短校准阶段
+SLOW_EXEC_MS = 10
+
+# AFL++编译器写入二进制的模式签名，符号被strip后仍然存在（afl-fuzz同样按此识别）
+PERSISTENT_SIG = b'##SIG_AFL_PERSISTENT##'
+DEFERRED_SIG = b'##SIG_AFL_DEFER_FORKSRV##'
+
+# 在容器内运行的探测程序：先用 AFL_DUMP_MAP_SIZE 读取插桩map大小，再逐个种子执行目标，
+# 用 wait4 取得每次执行的墙钟耗时和峰值RSS；参数和结果都是JSON
+PROBE_SCRIPT = r'''
+import os, re, sys, json, time, signal, threading, subprocess
+args = json.loads(sys.argv[1])
+result = {'map_size': None, 'runs': []}
+try:
+    out = subprocess.run([args['argv'][0]], env=dict(os.environ, AFL_DUMP_MAP_SIZE='1'), stdin=subprocess.DEVNULL,
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=10).stdout
+    match = re.search(rb'^\s*(\d+)\s*$', out, re.M)
+    if match:
+        result['map_size'] = int(match.group(1))
+except Exception:
+    pass
+for seed in args['seeds']:
+    argv = [seed if arg == '@@' else arg for arg in args['argv']]
+    stdin = subprocess.DEVNULL if '@@' in args['argv'] else open(seed, 'rb')
+    start = time.perf_counter()
+    try:
+        proc = subprocess.Popen(argv, stdin=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        break
+    killed = []
+    timer = threading.Timer(args['timeout'], lambda: (killed.append(True), proc.send_signal(signal.SIGKILL)))
+    timer.start()
+    # 直接wait4以取得子进程的rusage，再把状态交还给Popen避免重复回收
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    timer.cancel()
+    proc.returncode = status
+    if stdin is not subprocess.DEVNULL:
+        stdin.close()
+    result['runs'].append({'us': int(elapsed * 1e6), 'rss_kb': usage.ru_maxrss, 'timed_out': bool(killed),
+                           'status': status})
+print(json.dumps(result))
+'''
+
+
+class TargetCalibrator:
+    def __init__(self, container, target_cmd: str, path_mapper: Callable[[str], str], max_seeds: int = 50,
+                 exec_timeout: int = 10, memory_limit: str = ''):
+        """
+        Args:
+            container: 命令执行后端（容器或 Executor）
+            target_cmd: 容器内的目标命令，@@ 表示输入文件，没有 @@ 时从stdin输入
+            path_mapper: 宿主机路径 -> 容器内路径
+            max_seeds: 最多执行的种子数，种子更多时按大小均匀抽样（包含最大的种子）
+            exec_timeout: 探测时单次执行的超时（秒）
+            memory_limit: 显式配置的 afl-fuzz -m 值（MB 或 none），为空时不限制（与AFL++缺省一致）
+        """
+        self.container = container
+        self.target_cmd = target_cmd
+        self.path_mapper = path_mapper
+        self.max_seeds = max_seeds
+        self.exec_timeout = exec_timeout
+        self.memory_limit = memory_limit
+
+    @staticmethod
+    def detect_modes(binary_path: str, artifact: Dict = None) -> Dict:
+        """识别persistent/deferred forkserver：优先用构建产物索引的符号信息，符号被strip时搜索模式签名"""
+        afl = dict((artifact or {}).get('afl') or {})
+        modes = {'instrumented': afl.get('instrumented', False), 'persistent': afl.get('persistent', False),
+                 'deferred_forkserver': afl.get('deferred_forkserver', False), 'cmplog': afl.get('cmplog', False),
+                 'sanitizers': list((artifact or {}).get('sanitizers') or [])}
+        try:
+            with open(binary_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                modes['persistent'] = modes['persistent'] or data.find(PERSISTENT_SIG) != -1
+                modes['deferred_forkserver'] = modes['deferred_forkserver'] or data.find(DEFERRED_SIG) != -1
+        except (OSError, ValueError) as e:
+            logging.warning(f"读取目标二进制失败 {binary_path}: {e}")
+        return modes
+
+    def sample_seeds(self, seed_dir: str) -> List[str]:
+        """按大小排序后均匀抽样，最大的种子一定在内（它通常决定超时）"""
+        seeds = []
+        for name in os.listdir(seed_dir) if os.path.isdir(seed_dir) else []:
+            path = os.path.join(seed_dir, name)
+            if os.path.isfile(path) and not name.startswith('.'):
+                seeds.append((os.path.getsize(path), path))
+        seeds.sort()
+        if len(seeds) > self.max_seeds:
+            step = (len(seeds) - 1) / (self.max_seeds - 1)
+            seeds = [seeds[round(index * step)] for index in range(self.max_seeds)]
+        return [path for _, path in seeds]
+
+    def probe(self, seeds: List[str]) -> Optional[Dict]:
+        """在容器内运行探测程序，失败返回 None"""
+        args = {'argv': shlex.split(self.target_cmd), 'seeds': [self.path_mapper(seed) for seed in seeds],
+                'timeout': self.exec_timeout}
+        timeout = 30 + self.exec_timeout * len(seeds)
+        exit_code, output = self.container.exec_run(
+            ['timeout', '-s', 'KILL', str(timeout), 'python3', '-c', PROBE_SCRIPT, json.dumps(args)], workdir='/tmp')
+        text = output.decode(errors='replace') if output else ''
+        for line in reversed(text.splitlines()):
+            if line.startswith('{'):
+                try:
+                    return json.loads(line)
+                except ValueError:
+                    break
+        logging.warning(f"目标校准探测失败（退出码 {exit_code}）: {text[-500:]}")
+        return None
+
+    @staticmethod
+    def derive(modes: Dict, probe: Optional[Dict], memory_limit: str = '') -> Dict:
+        """根据探测结果生成 afl-fuzz 参数和环境变量"""
+        probe = probe or {}
+        runs = probe.get('runs') or []
+        profile = {'modes': modes, 'seeds_probed': len(runs), 'args': [], 'env': {}}
+
+        map_size = probe.get('map_size')
+        if map_size:
+            profile['map_size'] = int(math.ceil(map_size / MAP_SIZE_ALIGN) * MAP_SIZE_ALIGN)
+            profile['map_size_source'] = 'AFL_DUMP_MAP_SIZE'
+        else:
+            profile['map_size'] = FALLBACK_MAP_SIZE
+            profile['map_size_source'] = 'fallback'
+        profile['env']['AFL_MAP_SIZE'] = str(profile['map_size'])
+
+        completed = [run for run in runs if not run['timed_out']]
+        if completed:
+            exec_ms = [run['us'] / 1000 for run in completed]
+            profile['exec_ms'] = {'avg': round(statistics.fmean(exec_ms), 3), 'max': round(max(exec_ms), 3),
+                                  'median': round(statistics.median(exec_ms), 3)}
+            profile['peak_rss_mb'] = round(max(run['rss_kb'] for run in completed) / 1024, 1)
+            # 与afl-fuzz自身的校准规则相近：平均耗时的5倍，且不低于最慢种子的2倍
+            timeout_ms = max(MIN_TIMEOUT_MS, profile['exec_ms']['avg'] * 5, profile['exec_ms']['max'] * 2)
+            timeout_ms = int(math.ceil(timeout_ms / EXEC_TM_ROUND) * EXEC_TM_ROUND)
+            # 有种子在探测中超时：用 "+" 让afl-fuzz跳过超时的种子而不是直接退出
+            suffix = '+' if len(completed) < len(runs) else ''
+            profile['timeout_ms'] = timeout_ms
+            profile['args'] += ['-t', f"{timeout_ms}{suffix}"]
+            if profile['exec_ms']['avg'] > SLOW_EXEC_MS:
+                profile['env']['AFL_FAST_CAL'] = '1'
+        elif runs:
+            # 所有种子都超时：使用探测的超时上限并跳过超时种子，避免afl-fuzz用默认的1秒直接退出
+            timeout_ms = int(math.ceil(max(run['us'] for run in runs) / 1000 / EXEC_TM_ROUND) * EXEC_TM_ROUND)
+            profile['timeout_ms'] = timeout_ms
+            profile['args'] += ['-t', f"{timeout_ms}+"]
+            profile['env']['AFL_FAST_CAL'] = '1'
+
+        # -m 限制的是虚拟内存（RLIMIT_AS），峰值RSS无法反映多线程arena、大块mmap和sanitizer的预留，
+        # 只在显式配置时传递；peak_rss_mb 仅作参考
+        if memory_limit:
+            profile['memory_limit'] = str(memory_limit)
+            profile['args'] += ['-m', profile['memory_limit']]
+
+        if not modes.get('instrumented') and probe.get('map_size') is None:
+            logging.warning("目标似乎没有AFL++插桩，afl-fuzz可能无法启动（需要 -Q/-n 模式）")
+        return profile
+
+    def calibrate(self, binary_path: str, seed_dir: str, artifact: Dict = None) -> Dict:
+        """
+        :param binary_path: 宿主机上的目标二进制
+        :param seed_dir: 宿主机上的种子目录（afl-fuzz -i 使用的目录）
+        :param artifact: ArtifactIndexer 对目标的索引记录
+        :return: 校准结果，args/env 直接用于afl-fuzz
+        """
+        modes = self.detect_modes(binary_path, artifact)
+        seeds = self.sample_seeds(seed_dir)
+        # 没有种子时仍然探测map大小
+        probe = self.probe(seeds)
+        profile = self.derive(modes, probe, self.memory_limit)
+        logging.info(f"目标校准: map {profile['map_size']}（{profile['map_size_source']}），"
+                     f"persistent {modes['persistent']}，deferred {modes['deferred_forkserver']}，"
+                     f"单次执行 {profile.get('exec_ms')}，参数 {' '.join(profile['args'])}")
+        return profile
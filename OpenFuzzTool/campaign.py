@@ -0,0 +1,133 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的campaign断点续跑模块（保存AFL输出目录，下次运行时恢复）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+
+CAMPAIGN_INFO_NAME = 'campaign.json'
+# 每次运行都会重新生成的临时文件，不需要保存
+SKIP_FILES = {'.cur_input', '.cur_input_asan'}
+
+
+class CampaignStore:
+    def __init__(self, store_root: str, checkpoint_interval: int = 300):
+        """
+        :param store_root: 保存所有campaign状态的根目录，每个campaign一个子目录
+        :param checkpoint_interval: fuzz期间周期性保存检查点的间隔（秒），0 表示只在结束时保存
+        """
+        self.store_root = store_root
+        self.checkpoint_interval = checkpoint_interval
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.store_root, exist_ok=True)
+
+    @staticmethod
+    def campaign_id(program_name: str, source_hash: str, fuzz_cmd: str = '') -> str:
+        """稳定的campaign标识：程序名 + 源码哈希（+ fuzz命令），同一目标的多次运行得到同一个ID"""
+        digest = hashlib.sha256(f"{source_hash}|{fuzz_cmd}".encode()).hexdigest()
+        return f"{program_name}_{digest[:12]}"
+
+    def _lock(self, campaign_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(campaign_id, threading.Lock())
+
+    def campaign_dir(self, campaign_id: str) -> str:
+        return os.path.join(self.store_root, campaign_id)
+
+    def info(self, campaign_id: str) -> Dict:
+        try:
+            with open(os.path.join(self.campaign_dir(campaign_id), CAMPAIGN_INFO_NAME), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'campaign_id': campaign_id, 'runs': 0, 'fuzz_seconds': 0, 'checkpoints': 0}
+
+    def _write_info(self, campaign_id: str, info: Dict):
+        info_path = os.path.join(self.campaign_dir(campaign_id), CAMPAIGN_INFO_NAME)
+        tmp_path = f"{info_path}.tmp.{threading.get_ident()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, info_path)
+
+    # ---------------- 恢复 ----------------
+
+    def restore(self, campaign_id: str, output_dir: str) -> bool:
+        """把保存的AFL输出目录复制到新的工作目录，返回是否恢复了已有状态"""
+        saved = os.path.join(self.campaign_dir(campaign_id), 'output')
+        if not os.path.isdir(saved) or not os.listdir(saved):
+            return False
+        with self._lock(campaign_id):
+            shutil.rmtree(output_dir, ignore_errors=True)
+            # 必须复制而不是硬链接：afl-fuzz 会原地改写 fuzzer_stats 等文件
+            shutil.copytree(saved, output_dir, symlinks=True)
+        info = self.info(campaign_id)
+        logging.info(f"campaign {campaign_id} 从检查点恢复（已运行 {info['runs']} 次，"
+                     f"累计 {info['fuzz_seconds']:.0f} 秒）")
+        return True
+
+    # ---------------- 检查点 ----------------
+
+    def checkpoint(self, campaign_id: str, output_dir: str, fuzz_seconds: float = 0, finished: bool = False) -> int:
+        """增量保存AFL输出目录：只复制大小或mtime变化的文件，返回复制的文件数"""
+        if not os.path.isdir(output_dir):
+            return 0
+        saved = os.path.join(self.campaign_dir(campaign_id), 'output')
+        copied = 0
+        with self._lock(campaign_id):
+            for root, dirs, names in os.walk(output_dir):
+                rel_root = os.path.relpath(root, output_dir)
+                os.makedirs(os.path.join(saved, rel_root), exist_ok=True)
+                for name in names:
+                    if name in SKIP_FILES:
+                        continue
+                    src = os.path.join(root, name)
+                    dst = os.path.join(saved, rel_root, name)
+                    try:
+                        st = os.lstat(src)
+                        dst_st = os.lstat(dst) if os.path.lexists(dst) else None
+                        if dst_st is not None and dst_st.st_size == st.st_size \
+                                and dst_st.st_mtime_ns == st.st_mtime_ns:
+                            continue
+                        tmp_path = f"{dst}.tmp.{threading.get_ident()}"
+                        shutil.copy2(src, tmp_path, follow_symlinks=False)
+                        os.replace(tmp_path, dst)
+                        copied += 1
+                    except OSError as e:
+                        # fuzz进行中文件可能被AFL替换，下一次检查点会重新复制
+                        logging.info(f"检查点跳过 {src}: {e}")
+            info = self.info(campaign_id)
+            info['checkpoints'] += 1
+            info['last_checkpoint'] = time.time()
+            if finished:
+                info['runs'] += 1
+                info['fuzz_seconds'] += fuzz_seconds
+            self._write_info(campaign_id, info)
+        logging.info(f"campaign {campaign_id} 检查点已保存（复制 {copied} 个文件）")
+        return copied
+
+    def start_periodic(self, campaign_id: str, output_dir: str) -> Optional[threading.Event]:
+        """fuzz期间在后台周期性保存检查点，返回用于停止的Event"""
+        if self.checkpoint_interval <= 0:
+            return None
+        stop_event = threading.Event()
+
+        def run():
+            while not stop_event.wait(self.checkpoint_interval):
+                self.checkpoint(campaign_id, output_dir)
+
+        threading.Thread(target=run, name=f"Checkpoint-{campaign_id}", daemon=True).start()
+        return stop_event
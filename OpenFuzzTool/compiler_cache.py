@@ -0,0 +1,117 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的编译缓存模块（容器内构建使用持久化的ccache目录）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, List
+
+# 通过ccache伪装目录包装的AFL++编译器，Build.sh调用这些名字时会自动经过ccache
+AFL_COMPILERS = ['afl-clang-fast', 'afl-clang-fast++', 'afl-clang-lto', 'afl-clang-lto++',
+                 'afl-cc', 'afl-c++', 'afl-gcc-fast', 'afl-g++-fast']
+
+# 读取不到容器PATH时使用的默认值
+DEFAULT_PATH = '/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin'
+
+
+class CompilerCache:
+    CONTAINER_DIR = '/ccache'
+    MASQUERADE_DIR = '/opt/ccache-bin'
+
+    def __init__(self, cache_root: str, max_size: str = '5G'):
+        """
+        :param cache_root: 宿主机上的缓存根目录，每种编译器/插桩组合一个子目录
+        :param max_size: 每个子目录的ccache大小上限（ccache的 max_size 格式，例如 5G）
+        """
+        self.cache_root = cache_root
+        self.max_size = max_size
+
+    def variant_dir(self, compiler_settings: dict, image_digest: str, extra_env: Dict[str, str] = None) -> str:
+        """按编译器设置、镜像和插桩相关环境变量区分缓存目录，返回宿主机路径"""
+        key = json.dumps({'compiler': compiler_settings or {}, 'image': image_digest or '',
+                          'env': extra_env or {}}, sort_keys=True)
+        variant = hashlib.sha256(key.encode()).hexdigest()[:16]
+        host_dir = os.path.join(self.cache_root, variant)
+        os.makedirs(host_dir, exist_ok=True)
+        return host_dir
+
+    @staticmethod
+    def container_path(container) -> str:
+        """读取容器内命令的PATH（镜像可能添加了LLVM等工具链目录），失败时返回默认值"""
+        try:
+            exit_code, output = container.exec_run(['printenv', 'PATH'])
+            path = output.decode(errors='replace').strip() if output else ''
+            if exit_code in (0, None) and path:
+                return path
+        except Exception as e:
+            logging.warning(f"读取容器PATH失败: {str(e)}")
+        return DEFAULT_PATH
+
+    def build_env(self, base_path: str = DEFAULT_PATH) -> Dict[str, str]:
+        """Build.sh 的环境变量：伪装目录放在容器原有PATH的最前面，编译器调用经过ccache"""
+        return {
+            'PATH': f"{self.MASQUERADE_DIR}:{base_path}",
+            'CCACHE_DIR': self.CONTAINER_DIR,
+            'CCACHE_MAXSIZE': self.max_size,
+            # 工作目录固定挂载在/tmp，使用相对路径让不同任务之间也能命中
+            'CCACHE_BASEDIR': '/tmp',
+            'CCACHE_NOHASHDIR': '1',
+            'CCACHE_COMPILERCHECK': 'content',
+        }
+
+    @staticmethod
+    def available(container) -> bool:
+        """镜像中是否预装了ccache（构建时不安装：需要联网且会拖慢首次构建）"""
+        try:
+            exit_code, _ = container.exec_run(['sh', '-c', 'command -v ccache'])
+            return exit_code in (0, None)
+        except Exception as e:
+            logging.warning(f"检查ccache失败: {str(e)}")
+            return False
+
+    def setup_commands(self) -> List[str]:
+        """容器内建立ccache伪装目录（需要镜像中已安装ccache，见 available）"""
+        links = ' && '.join(f'ln -sfn "$(command -v ccache)" {self.MASQUERADE_DIR}/{name}'
+                            for name in AFL_COMPILERS)
+        return [f"sh -c 'mkdir -p {self.MASQUERADE_DIR} && {links}'"]
+
+    @staticmethod
+    def stats_command() -> str:
+        return 'ccache --print-stats'
+
+    @staticmethod
+    def parse_stats(text: str) -> Dict[str, int]:
+        """解析 ccache --print-stats 的输出（每行 "名称<TAB>数值"）"""
+        stats = {}
+        for line in text.splitlines():
+            parts = line.split('\t')
+            if len(parts) == 2 and parts[1].strip().isdigit():
+                stats[parts[0].strip()] = int(parts[1])
+        return stats
+
+    @staticmethod
+    def hit_rate(before: Dict[str, int], after: Dict[str, int]) -> dict:
+        """根据构建前后的统计差值计算本次构建的命中率"""
+        def delta(key):
+            return after.get(key, 0) - before.get(key, 0)
+
+        hits = delta('direct_cache_hit') + delta('preprocessed_cache_hit')
+        misses = delta('cache_miss')
+        total = hits + misses
+        result = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else 0.0,
+        }
+        logging.info(f"编译缓存命中 {hits}/{total}（{result['hit_rate']:.1%}）")
+        return result
@@ -29,7 +29,21 @@ class ConfigLoader:
         # 生成4个字符的随机字符串作为ProjectID
         ProjectID = ''.join(random.choices(string.ascii_letters + string.digits, k=4))
         self.currentworkpath = Path(os.path.abspath(self.ALLFuzzWorkPath)).joinpath(f"{Inputconfig['program_name']}_{ProjectID}")
+        self.program_name = Inputconfig['program_name']
+        self.afl_fuzz_args = Inputconfig["afl_fuzz_args"]
+        self.default_compiler = Inputconfig["afl_fuzz_args"].get('Default_compiler', {})
+        # 崩溃分诊使用的sanitizer构建命令（格式同fuzz_target），缺省时用fuzz目标本身回放
+        self.sanitizer_cmd = Inputconfig["afl_fuzz_args"].get('sanitizer_target', '')
+        self.triage_workers = int(Inputconfig["afl_fuzz_args"].get('triage_workers', 2))
+        # 单个种子的大小上限（字节），缺省与AFL++的MAX_FILE一致
+        self.seed_max_size = int(Inputconfig["afl_fuzz_args"].get('seed_max_size', 1024 * 1024))
+        # afl-fuzz -m 的内存上限（MB 或 none），缺省不限制
+        self.memory_limit = str(Inputconfig["afl_fuzz_args"].get('memory_limit', ''))
+        # tmpfs模式下AFL输出目录的内存预算（如 512m、2g），缺省使用命令行 -tmpfssize
+        self.tmpfs_size = Inputconfig["afl_fuzz_args"].get('tmpfs_size', '')
         self.fuzz_time = self.parse_fuzz_time(Inputconfig["afl_fuzz_args"]['fuzz_time'])
+        # 并行fuzz实例数量（1个 -M 主实例 + N-1 个 -S 从实例），缺省为单实例
+        self.fuzz_parallel = max(1, int(Inputconfig["afl_fuzz_args"].get('parallel', 1)))
         self.UpladFile = Inputconfig['source_code_path']
         self.bin_cmd = Inputconfig["afl_fuzz_args"]['fuzz_target']
         self.extractdir = Path(os.path.abspath(self.ALLFuzzWorkPath)).joinpath(f"{Inputconfig['program_name']}_{ProjectID}").joinpath("extractdir")#压缩包解压目录
@@ -89,6 +103,11 @@ class ConfigLoader:
         newbinary_cmd = f"{dokcertargetbinpath} {self.bin_cmd[len(self.executable):]}"
         self.bin_cmd = newbinary_cmd
 
+    def convert_cmd(self,binpath,cmd,bind_mount):
+        """把命令中的可执行文件名替换为构建产物在容器内的路径，保留参数"""
+        dokcertargetbinpath = self.convert_path(binpath,bind_mount,to_docker=True)
+        return f"{dokcertargetbinpath} {cmd[len(cmd.split()[0]):]}"
+
     def load_Inputconfig(self, file_path: str) -> dict:
         """加载并预处理配置文件"""
         with open(file_path) as f:
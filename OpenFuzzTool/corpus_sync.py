@@ -0,0 +1,149 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的语料交换模块（同一目标的多个campaign之间共享队列样本）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import glob
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Dict, Set
+
+# 注入到每个campaign同步目录中的伪实例名，afl-fuzz把它当作一个同步来源
+EXCHANGE_NAME = 'corpus_pool'
+
+
+class CorpusExchange:
+    def __init__(self, pool_root: str, interval: float = 60.0, max_file_size: int = 1024 * 1024):
+        """
+        :param pool_root: 共享池根目录，每个目标一个子目录，样本按sha256命名
+        :param interval: 导入/注入的周期（秒）
+        :param max_file_size: 超过该大小的队列样本不参与交换
+        """
+        self.pool_root = pool_root
+        self.interval = interval
+        self.max_file_size = max_file_size
+        # {目标: {campaign名: 输出目录}}
+        self._members: Dict[str, Dict[str, str]] = {}
+        # {目标: {sha256: 来源campaign}}，来源为空表示之前运行留下的样本
+        self._pool: Dict[str, Dict[str, str]] = {}
+        self._seen: Dict[str, Set[str]] = {}
+        self._injected: Dict[str, Set[str]] = {}
+        self._next_id: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        os.makedirs(self.pool_root, exist_ok=True)
+
+    def _group_dir(self, group: str) -> str:
+        return os.path.join(self.pool_root, group)
+
+    def register(self, group: str, name: str, output_dir: str):
+        """加入交换：在该campaign的同步目录下建立 corpus_pool/queue，afl-fuzz运行中即可同步，无需重启"""
+        exchange_dir = os.path.join(output_dir, EXCHANGE_NAME)
+        queue_dir = os.path.join(exchange_dir, 'queue')
+        os.makedirs(queue_dir, exist_ok=True)
+        # AFL++的从实例（包括未指定 -M/-S 时的默认实例）只从带 is_main_node 标记的目录同步
+        open(os.path.join(exchange_dir, 'is_main_node'), 'a').close()
+        with self._lock:
+            if group not in self._pool:
+                group_dir = self._group_dir(group)
+                os.makedirs(group_dir, exist_ok=True)
+                self._pool[group] = {digest: '' for digest in os.listdir(group_dir) if '.tmp' not in digest}
+            self._members.setdefault(group, {})[name] = output_dir
+            self._seen[name] = set()
+            # 续跑时保留之前注入过的样本编号
+            existing = sorted(os.listdir(queue_dir))
+            self._injected[name] = {entry.split('sha:', 1)[1] for entry in existing if 'sha:' in entry}
+            self._next_id[name] = len(existing)
+
+    def unregister(self, group: str, name: str):
+        with self._lock:
+            self._members.get(group, {}).pop(name, None)
+            self._seen.pop(name, None)
+            self._injected.pop(name, None)
+            self._next_id.pop(name, None)
+
+    def _import(self, group: str, name: str, output_dir: str) -> int:
+        """把该campaign新产生的队列样本导入共享池"""
+        imported = 0
+        for path in glob.glob(os.path.join(output_dir, '*', 'queue', 'id:*')):
+            if path in self._seen[name] or os.path.basename(os.path.dirname(os.path.dirname(path))) == EXCHANGE_NAME:
+                continue
+            self._seen[name].add(path)
+            try:
+                if os.path.getsize(path) > self.max_file_size:
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue
+            digest = hashlib.sha256(data).hexdigest()
+            # 该campaign自己已经有这个样本，不需要再注入给它
+            self._injected[name].add(digest)
+            if digest in self._pool[group]:
+                continue
+            pool_path = os.path.join(self._group_dir(group), digest)
+            tmp_path = f"{pool_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, pool_path)
+            self._pool[group][digest] = name
+            imported += 1
+        return imported
+
+    def _inject(self, group: str, name: str, output_dir: str) -> int:
+        """把其他campaign的样本按AFL队列命名写入 corpus_pool/queue（先写临时文件再rename）"""
+        exchange_dir = os.path.join(output_dir, EXCHANGE_NAME)
+        injected = 0
+        for digest, origin in self._pool[group].items():
+            if origin == name or digest in self._injected[name]:
+                continue
+            entry = f"id:{self._next_id[name]:06d},sync:{origin or 'pool'},sha:{digest}"
+            tmp_path = os.path.join(exchange_dir, f".{entry}.tmp")
+            shutil.copyfile(os.path.join(self._group_dir(group), digest), tmp_path)
+            os.replace(tmp_path, os.path.join(exchange_dir, 'queue', entry))
+            self._injected[name].add(digest)
+            self._next_id[name] += 1
+            injected += 1
+        return injected
+
+    def sync_once(self) -> Dict[str, int]:
+        """一轮交换：先导入所有成员的新样本，再注入到其他成员"""
+        result = {'imported': 0, 'injected': 0}
+        with self._lock:
+            for group, members in self._members.items():
+                for name, output_dir in members.items():
+                    result['imported'] += self._import(group, name, output_dir)
+                for name, output_dir in members.items():
+                    result['injected'] += self._inject(group, name, output_dir)
+        if result['imported'] or result['injected']:
+            logging.info(f"语料交换: 导入 {result['imported']} 个，注入 {result['injected']} 个")
+        return result
+
+    def start(self):
+        def run():
+            while not self._stop_event.wait(self.interval):
+                try:
+                    self.sync_once()
+                except Exception as e:
+                    logging.error(f"语料交换失败: {str(e)}")
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name="CorpusExchange", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
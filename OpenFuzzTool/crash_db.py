@@ -0,0 +1,197 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的崩溃数据库模块（按调用栈哈希去重，跨任务持久化）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# 栈帧位置中的源码行列号，比较调用栈时去掉，避免重新编译后同一个bug哈希变化；
+# 未符号化的帧只有 (模块+偏移)，偏移是区分不同位置的唯一信息，需要保留
+LINE_COL_RE = re.compile(r':\d+(:\d+)?$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    program TEXT NOT NULL,
+    workpath TEXT,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS bugs (
+    bug_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    program TEXT NOT NULL,
+    stack_hash TEXT NOT NULL,
+    bug_type TEXT,
+    sanitizer TEXT,
+    faulting_function TEXT,
+    summary TEXT,
+    first_run INTEGER,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (program, stack_hash)
+);
+CREATE TABLE IF NOT EXISTS crashes (
+    program TEXT NOT NULL,
+    input_sha256 TEXT NOT NULL,
+    bug_id INTEGER NOT NULL REFERENCES bugs(bug_id),
+    run_id INTEGER,
+    input_path TEXT,
+    first_seen REAL NOT NULL,
+    PRIMARY KEY (program, input_sha256)
+);
+CREATE INDEX IF NOT EXISTS idx_bugs_first_run ON bugs (program, first_run);
+CREATE INDEX IF NOT EXISTS idx_bugs_first_seen ON bugs (first_seen);
+CREATE INDEX IF NOT EXISTS idx_runs_program ON runs (program, run_id);
+"""
+
+
+def stack_hash(record: Dict, top_frames: int = 5) -> str:
+    """从出错栈帧开始取前N帧的函数名（无符号时为模块+偏移）计算哈希；没有符号化的调用栈时按输入内容区分，避免把不同崩溃误合并"""
+    stack = record.get('stack') or []
+    faulting = record.get('faulting_frame')
+    start = 0
+    if faulting in stack:
+        start = stack.index(faulting)
+    frames = []
+    symbolized = False
+    for frame in stack[start:start + top_frames]:
+        if frame.get('function'):
+            symbolized = True
+            frames.append(frame['function'])
+        else:
+            # 统一去掉括号，(/tmp/prog+0x4f5a3b) 与 /tmp/prog+0x4f5a3b 视为同一帧
+            location = frame.get('location', '').strip().strip('()')
+            frames.append(LINE_COL_RE.sub('', location))
+    # 整个窗口都没有符号时，模块偏移随编译变化，不能跨构建匹配，按输入内容区分
+    if frames and symbolized:
+        key = '|'.join([record.get('bug_type') or ''] + frames)
+    else:
+        key = f"nostack|{record.get('bug_type') or ''}|{record.get('input_sha256', '')}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class CrashDatabase:
+    def __init__(self, db_path: str, top_frames: int = 5):
+        """
+        :param db_path: SQLite数据库文件，多个任务（线程或进程）共享
+        :param top_frames: 计算调用栈哈希时使用的栈帧数
+        """
+        self.db_path = db_path
+        self.top_frames = top_frames
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            # WAL模式下读不阻塞写，多个进程同时分诊时也能写入
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------------- 运行记录 ----------------
+
+    def start_run(self, program: str, workpath: str = None) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute('INSERT INTO runs (program, workpath, started) VALUES (?, ?, ?)',
+                                        (program, workpath, time.time()))
+            return cursor.lastrowid
+
+    def finish_run(self, run_id: int):
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE runs SET finished = ? WHERE run_id = ?', (time.time(), run_id))
+
+    def last_run(self, program: str, before: int = None) -> Optional[int]:
+        """program 最近一次运行的ID；给定 before 时返回它之前的一次"""
+        with self._lock:
+            if before is None:
+                row = self._conn.execute('SELECT MAX(run_id) FROM runs WHERE program = ?', (program,)).fetchone()
+            else:
+                row = self._conn.execute('SELECT MAX(run_id) FROM runs WHERE program = ? AND run_id < ?',
+                                         (program, before)).fetchone()
+        return row[0] if row else None
+
+    # ---------------- 崩溃记录 ----------------
+
+    def known_input(self, program: str, input_sha256: str) -> bool:
+        """该输入是否已经分诊过（任意一次运行、任意实例）"""
+        with self._lock:
+            row = self._conn.execute('SELECT 1 FROM crashes WHERE program = ? AND input_sha256 = ?',
+                                     (program, input_sha256)).fetchone()
+        return row is not None
+
+    def record(self, program: str, record: Dict, run_id: int = None) -> Tuple[int, bool]:
+        """写入一条分诊记录，同一调用栈哈希合并为一个bug
+        :return: (bug_id, 是否为新bug)
+        """
+        digest = stack_hash(record, self.top_frames)
+        now = time.time()
+        faulting = (record.get('faulting_frame') or {}).get('function')
+        with self._lock, self._conn:
+            row = self._conn.execute('SELECT bug_id FROM bugs WHERE program = ? AND stack_hash = ?',
+                                     (program, digest)).fetchone()
+            is_new = row is None
+            if is_new:
+                cursor = self._conn.execute(
+                    'INSERT INTO bugs (program, stack_hash, bug_type, sanitizer, faulting_function, summary, '
+                    'first_run, first_seen, last_seen, hit_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)',
+                    (program, digest, record.get('bug_type'), record.get('sanitizer'), faulting,
+                     record.get('summary'), run_id, now, now))
+                bug_id = cursor.lastrowid
+            else:
+                bug_id = row['bug_id']
+                self._conn.execute('UPDATE bugs SET last_seen = ?, hit_count = hit_count + 1 WHERE bug_id = ?',
+                                   (now, bug_id))
+            self._conn.execute(
+                'INSERT OR IGNORE INTO crashes (program, input_sha256, bug_id, run_id, input_path, first_seen) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (program, record.get('input_sha256'), bug_id, run_id, record.get('input'), now))
+        if is_new:
+            logging.info(f"发现新bug #{bug_id}: {record.get('bug_type')} @ {faulting}")
+        return bug_id, is_new
+
+    # ---------------- 查询 ----------------
+
+    def new_bugs(self, program: str, run_id: int = None) -> List[Dict]:
+        """某次运行中首次出现的bug，缺省为该程序最近一次运行"""
+        if run_id is None:
+            run_id = self.last_run(program)
+            if run_id is None:
+                return []
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM bugs WHERE program = ? AND first_run = ? ORDER BY bug_id',
+                                      (program, run_id)).fetchall()
+        return [dict(row) for row in rows]
+
+    def bugs_since(self, timestamp: float, program: str = None) -> List[Dict]:
+        """某个时间点之后首次出现的bug"""
+        with self._lock:
+            if program is None:
+                rows = self._conn.execute('SELECT * FROM bugs WHERE first_seen > ? ORDER BY first_seen',
+                                          (timestamp,)).fetchall()
+            else:
+                rows = self._conn.execute('SELECT * FROM bugs WHERE first_seen > ? AND program = ? '
+                                          'ORDER BY first_seen', (timestamp, program)).fetchall()
+        return [dict(row) for row in rows]
+
+    def bug_summary(self, program: str) -> Dict:
+        with self._lock:
+            bugs = self._conn.execute('SELECT COUNT(*) FROM bugs WHERE program = ?', (program,)).fetchone()[0]
+            crashes = self._conn.execute('SELECT COUNT(*) FROM crashes WHERE program = ?', (program,)).fetchone()[0]
+        return {'bugs': bugs, 'crash_inputs': crashes}
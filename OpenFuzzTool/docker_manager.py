@@ -10,15 +10,48 @@
 🔥!! 运行前请准备三只烤鸡腿作为祭品！！
 """
 
-import docker
-from docker.models.containers import Container
+import os
+import time
+import uuid
+import shutil
+import logging
+import threading
+try:
+    import docker
+except ImportError:  # local后端不需要docker SDK
+    docker = None
 from typing import Dict
+from OpenFuzzTool.executor import DockerExecutor, LocalExecutor
+from OpenFuzzTool.agent import AgentExecutor
+
+AFL_IMAGE = "aflplusplus/aflplusplus"
 
 class DockerManager:
-    def __init__(self,container_name,bind_mount):
-        self.client = docker.from_env()
+    def __init__(self,container_name,bind_mount,pool=None,backend='docker',agent=False,tmpfs=None):
+        """
+        :param backend: 执行后端，docker 在AFL++容器内执行，local 在宿主机上用本地安装的AFL++执行
+        :param agent: docker后端下是否启用容器内常驻代理，所有命令经unix socket执行，避免每条命令一次docker exec
+        :param tmpfs: 容器内的tmpfs挂载 {容器内路径: 挂载选项（如 size=512m）}
+        """
+        self._client = None
         self.container_name = container_name
         self.bind_mount = bind_mount
+        # 可选的预热容器池，设置后从池中租用容器而不是新建
+        self.pool = pool if backend == 'docker' else None
+        self.backend = backend
+        self.agent = agent
+        self.tmpfs = tmpfs
+        # 命令执行后端（Executor），构建、fuzz、分诊都通过它执行命令
+        self.containerid = None
+
+    @property
+    def client(self):
+        # 延迟连接Docker守护进程，local后端不需要Docker
+        if self._client is None:
+            if docker is None:
+                raise RuntimeError("未安装docker SDK，请安装docker或使用local后端")
+            self._client = docker.from_env()
+        return self._client
 
 
     def CreateAFLDocker(self, use_existing=False):
@@ -33,9 +66,24 @@ class DockerManager:
         :param use_existing: 是否使用已经存在的容器，如果为 True 则返回已有容器
         :return: 启动的容器对象
         """
+        if self.backend == 'local':
+            self.containerid = LocalExecutor(self.bind_mount)
+            return self.containerid
+
+        if self.pool is not None and self.tmpfs:
+            # 预热容器创建时没有tmpfs，也无法在运行中添加
+            print("tmpfs mode requires a fresh container, skipping the container pool...")
+        elif self.pool is not None:
+            container = self.pool.lease(self.bind_mount)
+            if container is not None:
+                self.containerid = self._wrap(container)
+                return self.containerid
+            print("Container pool lease failed, falling back to a fresh container...")
+
         # 检查容器是否已经存在
+        client = self.client
         try:
-            existing_container = self.client.containers.get(self.container_name)
+            existing_container = client.containers.get(self.container_name)
             if use_existing:
                 print(f"Container {self.container_name} already exists. Returning the existing container.")
                 return existing_container
@@ -66,7 +114,7 @@ class DockerManager:
         try:
             # 启动新的容器
             containerid = self.client.containers.run(
-                "aflplusplus/aflplusplus",  # 假设使用 AFL++ 镜像
+                AFL_IMAGE,  # 假设使用 AFL++ 镜像
                 name=self.container_name,
                 detach=True,
                 auto_remove=True,  # 不自动删除容器，便于后续操作
@@ -74,14 +122,38 @@ class DockerManager:
                 volumes=volumes,  # 挂载文件夹
                 tty=True,  # 保持终端
                 stdin_open=True,  # 保持标准输入
+                **({'tmpfs': self.tmpfs} if self.tmpfs else {}),
             )
             print(f"Container {self.container_name} started successfully.")
-            self.containerid = containerid
+            self.containerid = self._wrap(containerid)
         except Exception as e:
             print(f"Failed to start container: {e}")
             return None
 
 
+    def _wrap(self, container):
+        """把容器包装为执行后端：启用代理且启动成功时使用 AgentExecutor"""
+        if self.agent:
+            host_dir = next((host for host, path in self.bind_mount.items() if path.rstrip('/') == '/tmp'), None)
+            if host_dir is not None:
+                executor = AgentExecutor(container, host_dir)
+                if executor.start():
+                    return executor
+        return DockerExecutor(container)
+
+    def image_digest(self) -> str:
+        """返回AFL++镜像的ID（内容摘要），用作构建缓存key的一部分；local后端使用宿主机afl-fuzz的路径和修改时间"""
+        if self.backend == 'local':
+            afl_fuzz = shutil.which('afl-fuzz')
+            if afl_fuzz is None:
+                return 'local'
+            return f"local:{os.path.realpath(afl_fuzz)}:{os.stat(afl_fuzz).st_mtime_ns}"
+        try:
+            return self.client.images.get(AFL_IMAGE).id
+        except Exception as e:
+            logging.error(f"Failed to get image digest: {e}")
+            return ''
+
     def stop_docker(self):
         """
         停止并删除指定名称的 Docker 容器。
@@ -89,9 +161,187 @@ class DockerManager:
         :param client: Docker 客户端对象
         :param container_name: 要停止和删除的容器名称
         """
+        if self.containerid is not None:
+            # 结束本后端启动的进程（local后端的子进程、容器内代理）
+            self.containerid.close()
+        if self.backend == 'local':
+            self.containerid = None
+            return
+        if self.pool is not None and self.containerid is not None and self.pool.owns(self.containerid.container):
+            self.pool.release(self.containerid.container)
+            self.containerid = None
+            return
         try:
             container = self.client.containers.get(self.container_name)
             container.stop()      
             print(f"Container {self.container_name} stopped and removed successfully.")
         except docker.errors.NotFound:
-            print(f"Container {self.container_name} not found.")
\ No newline at end of file
+            print(f"Container {self.container_name} not found.")
+
+
+class ContainerPool:
+    """预先启动的AFL++容器池
+    池中容器把整个 FuzzWorkDir 挂载到 /fuzzwork，租用时把任务的每个挂载点（如 /tmp）换成指向
+    /fuzzwork 下对应目录的符号链接，因此任务看到的路径与单独建容器时完全一致（/tmp 即工作目录）。
+    归还时杀掉残留进程并还原 /tmp；租用次数达到上限、健康检查失败或空闲过久的容器会被销毁。
+    """
+
+    POOL_LABEL = 'autofuzz-pool'
+    MOUNT_POINT = '/fuzzwork'
+
+    def __init__(self, host_root: str, size: int = 2, idle_timeout: int = 1800, max_leases: int = 20):
+        """
+        :param host_root: 宿主机上所有任务工作目录的根目录（FuzzWorkDir）
+        :param size: 池中保持的空闲容器数量
+        :param idle_timeout: 空闲超过该秒数的容器被销毁
+        :param max_leases: 单个容器最多被租用的次数，之后销毁重建，避免构建残留累积
+        """
+        if docker is None:
+            raise RuntimeError("未安装docker SDK，无法使用容器池")
+        self.client = docker.from_env()
+        self.host_root = os.path.abspath(host_root)
+        self.size = max(0, size)
+        self.idle_timeout = idle_timeout
+        self.max_leases = max_leases
+        self._idle = []       # [(container, 归还时间)]
+        self._leased = {}     # container.id -> container
+        self._links = {}      # container.id -> 租用时创建的符号链接路径
+        self._lease_count = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.host_root, exist_ok=True)
+
+    def warm_up(self):
+        """补足空闲容器到池大小"""
+        with self._lock:
+            missing = self.size - len(self._idle)
+        for _ in range(missing):
+            container = self._start_container()
+            if container is None:
+                break
+            with self._lock:
+                self._idle.append((container, time.time()))
+
+    def _start_container(self):
+        name = f"autofuzz_pool_{uuid.uuid4().hex[:8]}"
+        volumes = {
+            '/etc/localtime': {'bind': '/etc/localtime', 'mode': 'ro'},
+            '/etc/timezone': {'bind': '/etc/timezone', 'mode': 'ro'},
+            self.host_root: {'bind': self.MOUNT_POINT, 'mode': 'rw'},
+        }
+        try:
+            container = self.client.containers.run(
+                AFL_IMAGE,
+                name=name,
+                detach=True,
+                auto_remove=True,
+                labels={'project': name, self.POOL_LABEL: '1'},
+                volumes=volumes,
+                tty=True,
+                stdin_open=True,
+            )
+            self._lease_count[container.id] = 0
+            logging.info(f"Pool container {name} started.")
+            return container
+        except Exception as e:
+            logging.error(f"Failed to start pool container: {e}")
+            return None
+
+    def _healthy(self, container) -> bool:
+        try:
+            container.reload()
+            if container.status != 'running':
+                return False
+            return container.exec_run('true').exit_code in (0, None)
+        except Exception:
+            return False
+
+    def _destroy(self, container):
+        self._lease_count.pop(container.id, None)
+        try:
+            container.stop(timeout=2)
+        except Exception as e:
+            logging.info(f"Pool container {container.name} already gone: {e}")
+
+    def evict_idle(self):
+        """销毁空闲超时的容器"""
+        now = time.time()
+        with self._lock:
+            expired = [c for c, t in self._idle if now - t > self.idle_timeout]
+            self._idle = [(c, t) for c, t in self._idle if now - t <= self.idle_timeout]
+        for container in expired:
+            logging.info(f"Evicting idle pool container {container.name}")
+            self._destroy(container)
+
+    def owns(self, container) -> bool:
+        return container is not None and container.id in self._leased
+
+    def lease(self, bind_mount: Dict[str, str]):
+        """租用一个容器，并把任务的挂载目录映射到容器内（工作目录即 /tmp）
+        :param bind_mount: 任务的挂载映射 {宿主机目录: 容器内路径}，宿主机目录必须位于 host_root 之下
+        :return: 容器对象，失败返回 None
+        """
+        # 每个挂载点都在容器内用符号链接指向 /fuzzwork 下的对应目录
+        links = {}
+        for local_path, container_path in bind_mount.items():
+            local_path = os.path.abspath(local_path)
+            if os.path.commonpath([local_path, self.host_root]) != self.host_root:
+                logging.error(f"挂载目录 {local_path} 不在容器池挂载目录 {self.host_root} 下，无法使用容器池")
+                return None
+            links[container_path.rstrip('/')] = f"{self.MOUNT_POINT}/{os.path.relpath(local_path, self.host_root)}"
+        link_cmd = ' && '.join(f'rm -rf "{path}" && ln -sfn "{target}" "{path}"' for path, target in links.items())
+
+        self.evict_idle()
+        while True:
+            with self._lock:
+                container = self._idle.pop()[0] if self._idle else None
+            if container is None:
+                container = self._start_container()
+                if container is None:
+                    return None
+            if not self._healthy(container):
+                self._destroy(container)
+                continue
+            result = container.exec_run(['sh', '-c', link_cmd])
+            if result.exit_code not in (0, None):
+                logging.error(f"Failed to map workspace into pool container: {result.output.decode()}")
+                self._destroy(container)
+                continue
+            with self._lock:
+                self._leased[container.id] = container
+                self._links[container.id] = list(links)
+                self._lease_count[container.id] = self._lease_count.get(container.id, 0) + 1
+            logging.info(f"Leased pool container {container.name} for {bind_mount}")
+            return container
+
+    def release(self, container):
+        """归还容器：杀掉残留进程、还原 /tmp，然后放回空闲队列"""
+        with self._lock:
+            self._leased.pop(container.id, None)
+            links = [path for path in self._links.pop(container.id, []) if path != '/tmp']
+        reset_cmd = 'kill -9 -1; rm -f /tmp; mkdir -p /tmp && chmod 1777 /tmp'
+        if links:
+            reset_cmd += ' && rm -f ' + ' '.join(f'"{path}"' for path in links)
+        try:
+            result = container.exec_run(['sh', '-c', reset_cmd])
+            reset_ok = result.exit_code in (0, None)
+        except Exception as e:
+            logging.error(f"Failed to reset pool container {container.name}: {e}")
+            reset_ok = False
+
+        with self._lock:
+            keep = (reset_ok and len(self._idle) < self.size
+                    and self._lease_count.get(container.id, 0) < self.max_leases)
+            if keep:
+                self._idle.append((container, time.time()))
+        if not keep:
+            self._destroy(container)
+        self.warm_up()
+
+    def shutdown(self):
+        """销毁池中所有容器"""
+        with self._lock:
+            containers = [c for c, _ in self._idle] + list(self._leased.values())
+            self._idle = []
+            self._leased = {}
+        for container in containers:
+            self._destroy(container)
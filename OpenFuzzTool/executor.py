@@ -0,0 +1,259 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的命令执行后端模块（Docker容器 / 宿主机本地进程）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import io
+import os
+import re
+import shlex
+import signal
+import tarfile
+import logging
+import threading
+import subprocess
+from collections import namedtuple
+from typing import Dict, List, Union
+
+# 与 docker SDK 的 ExecResult 结构相同，调用方既可以解包也可以按属性访问
+ExecResult = namedtuple('ExecResult', ['exit_code', 'output'])
+
+Command = Union[str, List[str]]
+
+_CALLS_LOCK = threading.Lock()
+
+
+class Executor:
+    """命令执行后端接口：run / stream / kill / 文件读写
+    同时提供与 docker Container.exec_run 兼容的 exec_run，构建、fuzz、分诊等模块无需区分后端。
+    命令和路径都使用容器内的视角（工作目录为 /tmp），由后端负责映射。
+    """
+
+    # 实际创建的执行会话数（docker exec 或本地子进程），用于统计开销
+    calls = 0
+
+    def _count_call(self):
+        with _CALLS_LOCK:
+            self.calls += 1
+
+    def run(self, command: Command, workdir: str = '/tmp', env: Dict[str, str] = None,
+            timeout: int = None) -> ExecResult:
+        raise NotImplementedError
+
+    def stream(self, command: Command, workdir: str = '/tmp', env: Dict[str, str] = None) -> ExecResult:
+        """流式执行，output 为按块产生的bytes迭代器，exit_code 为 None（与docker一致）"""
+        raise NotImplementedError
+
+    def kill(self, pattern: str, sig: str = 'TERM', exact: bool = False) -> bool:
+        """向匹配的进程发送信号；exact=True 时按进程名精确匹配，否则匹配完整命令行"""
+        raise NotImplementedError
+
+    def read_file(self, path: str) -> bytes:
+        raise NotImplementedError
+
+    def write_file(self, path: str, data: bytes, mode: int = 0o644):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def exec_run(self, cmd: Command, workdir: str = None, environment: Dict[str, str] = None, stream: bool = False,
+                 **kwargs) -> ExecResult:
+        if stream:
+            return self.stream(cmd, workdir or '/tmp', environment)
+        return self.run(cmd, workdir or '/tmp', environment)
+
+
+def with_timeout(command: Command, timeout: int = None) -> Command:
+    if not timeout:
+        return command
+    if isinstance(command, str):
+        return f"timeout -s KILL {timeout} {command}"
+    return ['timeout', '-s', 'KILL', str(timeout)] + list(command)
+
+
+class DockerExecutor(Executor):
+    """在Docker容器内执行（原有实现）"""
+
+    def __init__(self, container):
+        self.container = container
+
+    def __getattr__(self, name):
+        # id、name、reload、status 等属性直接转给容器对象
+        return getattr(self.container, name)
+
+    def run(self, command, workdir='/tmp', env=None, timeout=None):
+        self._count_call()
+        exit_code, output = self.container.exec_run(with_timeout(command, timeout), workdir=workdir,
+                                                    environment=env or {})
+        return ExecResult(exit_code, output)
+
+    def stream(self, command, workdir='/tmp', env=None):
+        self._count_call()
+        exit_code, output = self.container.exec_run(command, workdir=workdir, environment=env or {}, stream=True)
+        return ExecResult(exit_code, output)
+
+    def kill(self, pattern, sig='TERM', exact=False):
+        result = self.run(['pkill', f'-{sig}', '-x' if exact else '-f', pattern])
+        return result.exit_code in (0, None)
+
+    def read_file(self, path):
+        stream, _ = self.container.get_archive(path)
+        with tarfile.open(fileobj=io.BytesIO(b''.join(stream))) as tar:
+            return tar.extractfile(tar.getmembers()[0]).read()
+
+    def write_file(self, path, data, mode=0o644):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w') as tar:
+            info = tarfile.TarInfo(os.path.basename(path))
+            info.size = len(data)
+            info.mode = mode
+            tar.addfile(info, io.BytesIO(data))
+        self.container.put_archive(os.path.dirname(path) or '/', buffer.getvalue())
+
+
+class LocalExecutor(Executor):
+    """在宿主机上用子进程执行，使用宿主机安装的AFL++工具
+    bind_mount 与Docker后端相同（{宿主机目录: 容器内路径}），命令、工作目录和环境变量中的
+    容器内路径会被替换为对应的宿主机路径，因此上层模块生成的命令不需要修改。
+    """
+
+    def __init__(self, bind_mount: Dict[str, str]):
+        self.bind_mount = dict(bind_mount)
+        self._patterns = []
+        for host_dir, container_dir in sorted(bind_mount.items(), key=lambda item: -len(item[1])):
+            container_dir = container_dir.rstrip('/') or '/'
+            pattern = re.compile(r'(?<![\w./-])' + re.escape(container_dir) + r'(?=/|\s|$|[\'";:)`])')
+            self._patterns.append((pattern, os.path.abspath(host_dir)))
+        self._procs: Dict[int, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def id(self):
+        return f"local-{os.getpid()}-{id(self):x}"
+
+    @property
+    def name(self):
+        return 'local'
+
+    def translate(self, text: str) -> str:
+        """把字符串中的容器内路径替换为宿主机路径"""
+        for pattern, host_dir in self._patterns:
+            text = pattern.sub(lambda _: host_dir, text)
+        return text
+
+    def _argv(self, command: Command) -> List[str]:
+        # 与docker exec一致：字符串命令按shell规则分词，但不经过shell
+        if isinstance(command, str):
+            return shlex.split(self.translate(command))
+        return [self.translate(arg) for arg in command]
+
+    def _env(self, env: Dict[str, str] = None) -> Dict[str, str]:
+        merged = dict(os.environ)
+        for key, value in (env or {}).items():
+            merged[key] = self.translate(str(value))
+        return merged
+
+    def _popen(self, command, workdir, env):
+        self._count_call()
+        proc = subprocess.Popen(self._argv(command), cwd=self.translate(workdir), env=self._env(env),
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                start_new_session=True)
+        with self._lock:
+            self._procs[proc.pid] = proc
+        return proc
+
+    def _forget(self, proc):
+        with self._lock:
+            self._procs.pop(proc.pid, None)
+
+    def run(self, command, workdir='/tmp', env=None, timeout=None):
+        try:
+            proc = self._popen(command, workdir, env)
+        except OSError as e:
+            # 与shell一致：找不到命令返回127
+            return ExecResult(127, str(e).encode())
+        try:
+            output, _ = proc.communicate(timeout=timeout)
+            return ExecResult(proc.returncode, output)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            output, _ = proc.communicate()
+            return ExecResult(137, output)
+        finally:
+            self._forget(proc)
+
+    def stream(self, command, workdir='/tmp', env=None):
+        try:
+            proc = self._popen(command, workdir, env)
+        except OSError as e:
+            return ExecResult(127, iter([str(e).encode()]))
+
+        def output():
+            try:
+                for line in iter(proc.stdout.readline, b''):
+                    yield line
+                proc.wait()
+            finally:
+                proc.stdout.close()
+                self._forget(proc)
+
+        return ExecResult(None, output())
+
+    def kill(self, pattern, sig='TERM', exact=False):
+        """只向本后端启动的进程组发送信号，不影响宿主机上的其他进程"""
+        signum = getattr(signal, f'SIG{sig}')
+        killed = False
+        with self._lock:
+            procs = list(self._procs.values())
+        for proc in procs:
+            argv = proc.args if isinstance(proc.args, list) else [proc.args]
+            if exact:
+                matched = any(os.path.basename(arg) == pattern for arg in argv)
+            else:
+                matched = pattern in ' '.join(argv) or self.translate(pattern) in ' '.join(argv)
+            if matched and proc.poll() is None:
+                try:
+                    os.killpg(proc.pid, signum)
+                    killed = True
+                except ProcessLookupError:
+                    pass
+        return killed
+
+    def read_file(self, path):
+        with open(self.translate(path), 'rb') as f:
+            return f.read()
+
+    def write_file(self, path, data, mode=0o644):
+        host_path = self.translate(path)
+        with open(host_path, 'wb') as f:
+            f.write(data)
+        os.chmod(host_path, mode)
+
+    def close(self):
+        """结束所有仍在运行的子进程"""
+        with self._lock:
+            procs = list(self._procs.values())
+        killed = 0
+        for proc in procs:
+            if proc.poll() is None:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                    killed += 1
+                except ProcessLookupError:
+                    pass
+        logging.info(f"本地执行后端已关闭，结束 {killed} 个进程")
+
+
+def as_executor(container) -> Executor:
+    """把docker容器对象包装为 Executor，已经是 Executor 的直接返回"""
+    if container is None or isinstance(container, Executor):
+        return container
+    return DockerExecutor(container)
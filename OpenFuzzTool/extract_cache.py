@@ -0,0 +1,260 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的解压缓存模块（按压缩包内容寻址，硬链接/reflink生成工作目录）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+# Linux FICLONE ioctl，btrfs/xfs 等文件系统上实现真正的写时复制
+FICLONE = 0x40049409
+
+FILE_INFO_NAME = 'FileInfo.json'
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractCache:
+    def __init__(self, cache_root: str, mode: str = 'auto'):
+        """
+        :param cache_root: 缓存根目录，必须与工作目录在同一文件系统（reflink/硬链接要求）
+        :param mode: 生成工作目录的方式：reflink、hardlink、copy，auto 表示优先reflink，不支持时复制。
+                     hardlink 让工作目录与缓存树共享inode，构建中的原地修改和 chmod 会改到缓存，只在确认构建不改源码时使用
+        """
+        self.cache_root = cache_root
+        self.mode = mode
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_root, exist_ok=True)
+
+    # ---------------- 压缩包哈希 ----------------
+
+    def archive_hash(self, archive_path: str) -> str:
+        """压缩包内容的sha256；按 (路径, 大小, mtime) 记忆，未变化的压缩包不重复计算"""
+        st = os.stat(archive_path)
+        memo_key = f"{os.path.realpath(archive_path)}|{st.st_size}|{st.st_mtime_ns}"
+        index_path = os.path.join(self.cache_root, 'archive_index.json')
+        with self._lock:
+            index = self._load_json(index_path, {})
+            if memo_key in index:
+                return index[memo_key]
+        digest = file_sha256(archive_path)
+        with self._lock:
+            index = self._load_json(index_path, {})
+            index[memo_key] = digest
+            self._write_json(index_path, index)
+        return digest
+
+    # ---------------- 缓存项 ----------------
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_root, key)
+
+    @contextmanager
+    def _key_lock(self, key: str, exclusive: bool):
+        """缓存项的文件锁：生成工作目录时持共享锁，重新解压替换缓存项时持排他锁（多进程批量任务之间也有效）"""
+        with open(f"{self._entry_dir(key)}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _make_readonly(tree: str):
+        """缓存树去掉写权限，工作目录中的修改不会写回缓存"""
+        for root, dirs, names in os.walk(tree, topdown=False):
+            for name in names:
+                path = os.path.join(root, name)
+                if not os.path.islink(path):
+                    os.chmod(path, os.stat(path).st_mode & ~0o222)
+            os.chmod(root, os.stat(root).st_mode & ~0o222)
+
+    @staticmethod
+    def _remove_tree(path: str):
+        """删除只读的缓存项：先恢复目录的写权限"""
+        if not os.path.exists(path):
+            return
+        for root, dirs, names in os.walk(path):
+            os.chmod(root, 0o755)
+            for name in dirs:
+                dir_path = os.path.join(root, name)
+                if not os.path.islink(dir_path):
+                    os.chmod(dir_path, 0o755)
+        shutil.rmtree(path, ignore_errors=True)
+
+    def _valid(self, key: str) -> bool:
+        """校验缓存树未被硬链接的工作目录原地修改过（比较大小和mtime）"""
+        manifest = self._load_json(os.path.join(self._entry_dir(key), 'manifest.json'), None)
+        if manifest is None:
+            return False
+        tree = os.path.join(self._entry_dir(key), 'tree')
+        for rel_path in manifest.get('dirs', []):
+            if not os.path.isdir(os.path.join(tree, rel_path)):
+                return False
+        for item in manifest['files']:
+            if item.get('link') is not None:
+                continue
+            try:
+                st = os.stat(os.path.join(tree, item['path']))
+            except OSError:
+                return False
+            if st.st_size != item['size'] or st.st_mtime_ns != item['mtime_ns']:
+                logging.warning(f"解压缓存 {key[:12]} 已被修改（{item['path']}），重新解压")
+                return False
+        return True
+
+    def _populate(self, key: str, archive_path: str, extract_func: Callable) -> bool:
+        """解压到临时目录，生成文件信息表后rename为缓存项；调用方需持有该缓存项的排他锁"""
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.tmp.{os.getpid()}.{threading.get_ident()}"
+        self._remove_tree(tmp_dir)
+        tree = os.path.join(tmp_dir, 'tree')
+        if extract_func(archive_path, tree) is None:
+            self._remove_tree(tmp_dir)
+            return False
+
+        files = self.build_manifest(tree)
+        dirs = self.build_dir_list(tree)
+        self._make_readonly(tree)
+        self._write_json(os.path.join(tmp_dir, 'manifest.json'),
+                         {'archive': archive_path, 'sha256': key, 'created': time.time(), 'dirs': dirs,
+                          'files': files})
+        self._remove_tree(entry_dir)
+        os.rename(tmp_dir, entry_dir)
+        return True
+
+    @staticmethod
+    def build_dir_list(tree: str) -> List[str]:
+        """解压出的全部目录（包括空目录），生成工作目录时按原样创建"""
+        result = []
+        for root, dirs, names in os.walk(tree):
+            dirs.sort()
+            for name in dirs:
+                full_path = os.path.join(root, name)
+                if not os.path.islink(full_path):
+                    result.append(os.path.relpath(full_path, tree))
+        return result
+
+    @staticmethod
+    def build_manifest(tree: str) -> List[Dict]:
+        """生成解压后的文件信息表：路径、大小、sha256、权限"""
+        files = []
+        for root, dirs, names in os.walk(tree):
+            dirs.sort()
+            for name in sorted(names):
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, tree)
+                if os.path.islink(full_path):
+                    files.append({'path': rel_path, 'link': os.readlink(full_path)})
+                    continue
+                st = os.stat(full_path)
+                files.append({'path': rel_path, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                              'mode': st.st_mode & 0o7777, 'sha256': file_sha256(full_path)})
+        return files
+
+    # ---------------- 生成工作目录 ----------------
+
+    def materialize(self, archive_path: str, workspace: str, extract_func: Callable) -> str:
+        """用缓存的解压结果生成工作目录，未命中时先调用 extract_func(archive, dir) 解压
+        :return: 工作目录，失败返回 None
+        """
+        key = self.archive_hash(archive_path)
+        with self._key_lock(key, exclusive=False):
+            hit = self._valid(key)
+        if hit:
+            logging.info(f"解压缓存命中 {key[:12]}")
+        else:
+            with self._key_lock(key, exclusive=True):
+                # 等锁期间其他任务可能已经解压完成
+                if not self._valid(key):
+                    logging.info(f"解压缓存未命中 {key[:12]}，开始解压 {archive_path}")
+                    if not self._populate(key, archive_path, extract_func):
+                        return None
+
+        with self._key_lock(key, exclusive=False):
+            return self._materialize_entry(key, archive_path, workspace)
+
+    def _materialize_entry(self, key: str, archive_path: str, workspace: str) -> str:
+        start_time = time.time()
+        entry_dir = self._entry_dir(key)
+        manifest = self._load_json(os.path.join(entry_dir, 'manifest.json'), None)
+        tree = os.path.join(entry_dir, 'tree')
+        os.makedirs(workspace, exist_ok=True)
+        for rel_path in manifest.get('dirs', []):
+            os.makedirs(os.path.join(workspace, rel_path), exist_ok=True)
+        mode = self.mode
+        for item in manifest['files']:
+            src = os.path.join(tree, item['path'])
+            dst = os.path.join(workspace, item['path'])
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            if item.get('link') is not None:
+                os.symlink(item['link'], dst)
+                continue
+            mode = self._link_file(src, dst, mode)
+            if mode != 'hardlink':
+                # 缓存树是只读的，工作目录中的副本恢复解压时的权限
+                os.chmod(dst, item['mode'])
+
+        # 文件信息表随工作目录一起保存，供后续阶段使用
+        self._write_json(os.path.join(workspace, FILE_INFO_NAME), {'archive': archive_path, 'sha256': key,
+                                                                   'files': manifest['files']})
+        logging.info(f"工作目录已生成 {workspace}（{len(manifest['files'])} 个文件，方式 {mode}，"
+                     f"耗时 {time.time() - start_time:.3f} 秒）")
+        return workspace
+
+    def _link_file(self, src: str, dst: str, mode: str) -> str:
+        """按 mode 生成单个文件，返回实际使用的方式（auto 在第一次reflink失败后退化为复制）"""
+        if mode in ('auto', 'reflink'):
+            try:
+                with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                shutil.copystat(src, dst)
+                return 'reflink'
+            except OSError:
+                if os.path.lexists(dst):
+                    os.remove(dst)
+                mode = 'copy'
+        if mode == 'hardlink':
+            try:
+                os.link(src, dst)
+                return 'hardlink'
+            except OSError:
+                mode = 'copy'
+        shutil.copy2(src, dst)
+        return mode
+
+    @staticmethod
+    def _load_json(path: str, default):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    @staticmethod
+    def _write_json(path: str, data):
+        tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, path)
@@ -0,0 +1,135 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的压缩格式识别模块（按文件头签名识别，libmagic兜底）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# 文件开头一次读取的字节数，覆盖除ISO以外所有签名（tar的ustar位于257）
+HEAD_SIZE = 512
+
+
+class FormatRegistry:
+    def __init__(self):
+        # 按注册顺序匹配：[(格式名, [(偏移, 签名字节)], [扩展名])]
+        self._formats: List[Tuple[str, List[Tuple[int, bytes]], List[str]]] = []
+        # libmagic 描述到格式名的映射，仅在签名和扩展名都无法识别时使用
+        self._magic_aliases: List[Tuple[str, str]] = []
+        self._magic_local = threading.local()
+        self._magic_cache: Dict[Tuple[str, int, int], Optional[str]] = {}
+
+    def register(self, name: str, signatures: List[Tuple[int, bytes]], extensions: List[str] = None,
+                 magic_descriptions: List[str] = None):
+        """注册一种格式
+        :param name: 格式名，与 FilePreprocessor 中的处理函数对应
+        :param signatures: [(偏移, 签名字节)]，任一匹配即识别为该格式
+        :param extensions: 扩展名（小写，含点），签名无法识别时使用
+        :param magic_descriptions: libmagic 输出中的关键字
+        """
+        self._formats.append((name, signatures, extensions or []))
+        for description in magic_descriptions or []:
+            self._magic_aliases.append((description, name))
+
+    def names(self) -> List[str]:
+        return [name for name, _, _ in self._formats]
+
+    def sniff_bytes(self, head: bytes) -> Optional[str]:
+        """只根据给定的文件头字节识别格式"""
+        for name, signatures, _ in self._formats:
+            for offset, signature in signatures:
+                if head[offset:offset + len(signature)] == signature:
+                    return name
+        return None
+
+    def sniff(self, file_path: str) -> Optional[str]:
+        """读取文件头识别格式：先读开头 HEAD_SIZE 字节，偏移更大的签名用 pread 单独读取"""
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            head = os.pread(fd, HEAD_SIZE, 0)
+            for name, signatures, _ in self._formats:
+                for offset, signature in signatures:
+                    if offset + len(signature) <= HEAD_SIZE:
+                        data = head[offset:offset + len(signature)]
+                    else:
+                        data = os.pread(fd, len(signature), offset)
+                    if data == signature:
+                        return name
+        finally:
+            os.close(fd)
+        return None
+
+    def by_extension(self, file_path: str) -> Optional[str]:
+        """按最长匹配的扩展名识别（.tar.gz 优先于 .gz）"""
+        lower = file_path.lower()
+        best, best_len = None, 0
+        for name, _, extensions in self._formats:
+            for ext in extensions:
+                if lower.endswith(ext) and len(ext) > best_len:
+                    best, best_len = name, len(ext)
+        return best
+
+    def by_libmagic(self, file_path: str) -> Optional[str]:
+        """最后手段：调用libmagic；每个线程复用一个Magic实例，结果按 (路径, 大小, mtime) 缓存"""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        cache_key = (os.path.realpath(file_path), st.st_size, st.st_mtime_ns)
+        if cache_key in self._magic_cache:
+            return self._magic_cache[cache_key]
+        result = None
+        try:
+            m = getattr(self._magic_local, 'magic', None)
+            if m is None:
+                import magic
+                m = self._magic_local.magic = magic.Magic()
+            file_type = m.from_file(file_path)
+            logging.info(f"libmagic检测到文件类型: {file_type}")
+            for description, name in self._magic_aliases:
+                if description in file_type:
+                    result = name
+                    break
+        except Exception as e:
+            logging.error(f"libmagic检测失败 {file_path}: {str(e)}")
+        self._magic_cache[cache_key] = result
+        return result
+
+    def detect(self, file_path: str) -> Optional[str]:
+        """识别顺序：文件头签名 -> 扩展名 -> libmagic"""
+        return self.sniff(file_path) or self.by_extension(file_path) or self.by_libmagic(file_path)
+
+
+def default_registry() -> FormatRegistry:
+    registry = FormatRegistry()
+    registry.register('zip', [(0, b'PK\x03\x04'), (0, b'PK\x05\x06'), (0, b'PK\x07\x08')], ['.zip'],
+                      ['Zip archive data'])
+    registry.register('gzip', [(0, b'\x1f\x8b')], ['.tar.gz', '.tgz', '.gz'], ['gzip compressed data'])
+    registry.register('xz', [(0, b'\xfd7zXZ\x00')], ['.xz'], ['XZ compressed data'])
+    registry.register('bz2', [(0, b'BZh')], ['.bz2'], ['bzip2 compressed data'])
+    registry.register('7z', [(0, b"7z\xbc\xaf'\x1c")], ['.7z'], ['7-zip archive data'])
+    registry.register('rar', [(0, b'Rar!\x1a\x07')], ['.rar'], ['RAR archive data'])
+    registry.register('rpm', [(0, b'\xed\xab\xee\xdb')], ['.rpm'], ['RPM'])
+    registry.register('deb', [(0, b'!<arch>\ndebian-binary')], ['.deb'], ['Debian binary package'])
+    registry.register('cab', [(0, b'MSCF')], ['.cab'], ['Microsoft Cabinet archive'])
+    registry.register('zstd', [(0, b'\x28\xb5\x2f\xfd')], ['.tar.zst', '.tzst', '.zst'],
+                      ['Zstandard compressed data'])
+    registry.register('tar', [(257, b'ustar')], ['.tar'], ['tar archive'])
+    registry.register('iso', [(0x8001, b'CD001'), (0x8801, b'CD001'), (0x9001, b'CD001')], ['.iso'],
+                      ['ISO 9660'])
+    return registry
+
+
+FORMAT_REGISTRY = default_registry()
@@ -10,51 +10,152 @@
 🔥!! 运行前请准备三只烤鸡腿作为祭品！！
 """
 
+import os
 import time
 import logging
 import concurrent.futures
 from typing import List, Dict, Any
-from docker.models.containers import Container
+try:
+    from docker.models.containers import Container
+except ImportError:  # local后端不需要docker SDK
+    Container = Any
 import re
 import json
+import weakref
+from OpenFuzzTool.stats_watcher import FuzzStatsWatcher
+from OpenFuzzTool.timeseries import TimeSeriesStore
+from OpenFuzzTool.executor import as_executor
+from OpenFuzzTool.log_sink import BoundedLogSink
 
 class AFLRunner:
-    def __init__(self,fuzzbincmd,fuzztime,fuzzing_status_file):
-        self.fuzzparallel = 1
+    # 正在运行的实例，收到SIGTERM等抢占信号时统一优雅停止
+    _active = weakref.WeakSet()
+
+    def __init__(self,fuzzbincmd,fuzztime,fuzzing_status_file,fuzzparallel=1,host_output_dir=None,input_dir='./input',
+                 resume=False,extra_env=None,headless=False,profile=None,output_dir='./output'):
+        self.fuzzparallel = max(1, int(fuzzparallel))
         self.fuzzbincmd = fuzzbincmd
         self.fuzztime = fuzztime
         self.fuzzing_status_file = fuzzing_status_file
+        # afl-fuzz -i 使用的种子目录（容器内相对/tmp的路径）
+        self.input_dir = input_dir
+        # afl-fuzz -o 使用的输出目录（容器内路径）；tmpfs模式下位于容器内存中，host_output_dir 是它的同步副本
+        self.output_dir = output_dir
+        # 续跑：输出目录中已有AFL状态时从中恢复（AFL_AUTORESUME，等价于 -i -）
+        self.resume = resume
+        # 额外的afl-fuzz环境变量（如语料交换时缩短AFL_SYNC_TIME）
+        self.extra_env = dict(extra_env or {})
+        # 目标校准结果（TargetCalibrator.calibrate），提供 -t/-m 参数和 AFL_MAP_SIZE 等环境变量
+        self.profile = profile or {}
+        # 无界面模式：AFL_NO_UI，输出只进入内存环形缓冲和压缩轮转日志，不逐块写logging
+        self.headless = headless
+        self.log_dir = os.path.join(os.path.dirname(os.path.abspath(fuzzing_status_file)), 'logs')
+        self._container = None
+        self._stop_fuzz_flag = False
+        self.stopped = False
+        # 宿主机上的AFL输出目录（工作目录通过bind mount挂载到容器/tmp），默认与状态文件同级
+        if host_output_dir is None:
+            host_output_dir = os.path.join(os.path.dirname(os.path.abspath(fuzzing_status_file)), 'output')
+        self.host_output_dir = host_output_dir
+        self.stats_interval = 2
+        # plot_data时间序列的保存目录
+        self.timeseries_dir = os.path.join(os.path.dirname(os.path.abspath(fuzzing_status_file)), 'timeseries')
         self.max_retries = 3
         self.timeout = 600  # 10分钟超时
         self.parallel_jobs = 4
 
     def start_fuzzing(self, container: Container):
+        container = as_executor(container)
         try:
             env: Dict[str, str] = {}
+            # 未校准时沿用固定的大map
             env["AFL_MAP_SIZE"] = "10000000"
-            commands = f"afl-fuzz -i ./input -o ./output -- {self.fuzzbincmd}"
+            env.update(self.profile.get('env', {}))
+            if self.resume:
+                # 已有实例目录时从其队列续跑，新增的实例仍从 -i 指定的种子开始
+                env["AFL_AUTORESUME"] = "1"
+            if self.headless:
+                env["AFL_NO_UI"] = "1"
+            env.update(self.extra_env)
+            commands = self.build_fuzz_commands()
 
-            logging.info(f"Executing {commands} ...")
+            logging.info(f"Executing {len(commands)} afl-fuzz instance(s): {commands} ...")
             start_time = time.time()
 
-            # 并行执行命令
-            success = self.fuzzexecute_command(container, commands, env=env, timeout=self.fuzztime)
+            # 状态监视线程在宿主机侧轮询fuzzer_stats，与输出消费循环解耦
+            timeseries = TimeSeriesStore(self.host_output_dir, self.timeseries_dir)
+            watcher = FuzzStatsWatcher(self.host_output_dir, self.fuzzing_status_file, self.stats_interval, timeseries)
+            watcher.start()
+            self._container = container
+            AFLRunner._active.add(self)
+            try:
+                if len(commands) == 1:
+                    success = self.fuzzexecute_command(container, commands[0], env=env, timeout=self.fuzztime)
+                else:
+                    # 并行执行命令
+                    with concurrent.futures.ThreadPoolExecutor(max_workers=len(commands)) as executor:
+                        futures = []
+                        for cmd in commands:
+                            futures.append(executor.submit(self.fuzzexecute_command, container, cmd, "/tmp",
+                                                           env, self.fuzztime))
+                        results = []
+                        for future in concurrent.futures.as_completed(futures):
+                            try:
+                                results.append(future.result())
+                            except Exception as e:
+                                logging.error(f"Fuzz instance failed: {str(e)}")
+                                results.append(False)
+                    success = all(results)
+            finally:
+                AFLRunner._active.discard(self)
+                self._container = None
+                watcher.stop()
 
             execution_time = time.time() - start_time
-            logging.info(f"Initialization completed in {execution_time:.2f} seconds")
+            logging.info(f"Fuzzing completed in {execution_time:.2f} seconds")
 
             if not success:
-                raise RuntimeError("One or more initialization commands failed")
+                raise RuntimeError("One or more afl-fuzz instances failed")
 
             return True
 
         except Exception as e:
-            logging.error(f"Initialization failed: {str(e)}")
+            logging.error(f"Fuzzing failed: {str(e)}")
             return False
 
+    def build_fuzz_commands(self) -> List[str]:
+        """根据并行数生成afl-fuzz命令，多实例时共享 ./output 同步目录"""
+        options = ''.join(f" {arg}" for arg in self.profile.get('args', []))
+        if self.fuzzparallel <= 1:
+            return [f"afl-fuzz -i {self.input_dir} -o {self.output_dir}{options} -- {self.fuzzbincmd}"]
+
+        cpu_count = os.cpu_count() or 1
+        if self.fuzzparallel > cpu_count:
+            logging.warning(f"并行实例数 {self.fuzzparallel} 超过CPU核数 {cpu_count}")
+
+        commands = [f"afl-fuzz -i {self.input_dir} -o {self.output_dir}{options} -M main -- {self.fuzzbincmd}"]
+        for index in range(1, self.fuzzparallel):
+            commands.append(f"afl-fuzz -i {self.input_dir} -o {self.output_dir}{options} -S secondary{index:02d} "
+                            f"-- {self.fuzzbincmd}")
+        return commands
+
     def stop_fuzz(self):
-        """设置标志以停止当前正在运行的fuzz命令"""
+        """设置标志以停止当前正在运行的fuzz命令；fuzz进行中时向afl-fuzz发送SIGINT，
+        AFL会写完队列和统计后退出，之后可以保存检查点"""
         self._stop_fuzz_flag = True
+        self.stopped = True
+        container = self._container
+        if container is not None:
+            try:
+                container.kill('afl-fuzz', 'INT', exact=True)
+            except Exception as e:
+                logging.error(f"停止afl-fuzz失败: {str(e)}")
+
+    @classmethod
+    def stop_all(cls):
+        """优雅停止所有正在运行的fuzz（用于抢占）"""
+        for runner in list(cls._active):
+            runner.stop_fuzz()
 
     def fuzzexecute_command(self, container: Container, command: str, workdir: str = "/tmp", 
                            env: Dict[str, str] = {}, timeout: int = None) -> bool:
@@ -64,6 +165,8 @@ class AFLRunner:
             command = f"timeout {timeout} {command}"
         
         for attempt in range(self.max_retries):
+            if self.stopped:
+                return True
             self._stop_fuzz_flag = False  # 每次重试前重置停止标志
             try:
                 exit_code, output = container.exec_run(
@@ -73,17 +176,19 @@ class AFLRunner:
                     stream=True
                 )
 
+                if self.headless:
+                    self._consume_headless(container, command, output)
+                    output = []
+
                 #时时输出的原理是output是一个不断迭代的对象（由docker构造），所以可以直接用for循环来遍历
                 for line in output:
                     logging.info(f"Command output: {line.decode().strip()}")
-                    print(self.fuzzing_status_file)
-                    self.get_fuzzing_status(container=container,output_file=self.fuzzing_status_file )
                     #如果检测到模糊测试启动失败，抛出异常
                     if re.search(r"PROGRAM ABORT", line.decode().strip()):  
                         raise Exception("模糊测试启动失败！")
                     if self._stop_fuzz_flag:
                         logging.info("Received stop signal, terminating command...")
-                        container.exec_run(f"pkill -f '{command}'")  # 尝试终止命令
+                        as_executor(container).kill(command)  # 尝试终止命令
                         break
 
                 
@@ -109,6 +214,28 @@ class AFLRunner:
                 return False
         return False
 
+    @staticmethod
+    def instance_name(command: str) -> str:
+        match = re.search(r'\s-[MS]\s+(\S+)', command)
+        return match.group(1) if match else 'default'
+
+    def _consume_headless(self, container: Container, command: str, output):
+        """无界面模式下消费afl-fuzz输出：完整输出写入压缩日志，只检查新产生的行"""
+        sink = BoundedLogSink(os.path.join(self.log_dir, f"{self.instance_name(command)}.log.gz"))
+        try:
+            for chunk in output:
+                for line in sink.write(chunk):
+                    if "PROGRAM ABORT" in line:
+                        logging.error("afl-fuzz 最近的输出:\n" + "\n".join(sink.tail(50)))
+                        raise Exception("模糊测试启动失败！")
+                if self._stop_fuzz_flag:
+                    logging.info("Received stop signal, terminating command...")
+                    as_executor(container).kill(command)
+                    break
+        finally:
+            sink.close()
+        logging.info(f"afl-fuzz 输出 {sink.total_bytes} 字节，已写入 {sink.log_path}")
+
     def execute_command(self, container: Container, command: str, workdir: str = "/tmp", env: Dict[str, str] = {}) -> bool:
         """执行单个命令并处理结果"""
         for attempt in range(self.max_retries):
@@ -173,40 +300,40 @@ class AFLRunner:
             container: Docker容器实例
             output_file: 输出JSON文件的路径（可选）
         Returns:
-            dict: 包含fuzzing状态的字典，包括总执行次数、路径数等信息
+            dict: 包含fuzzing状态的字典，包括总执行次数、路径数等信息；
+                  多实例时为所有实例 fuzzer_stats 合并后的结果
         """
 
         try:
-            print("获取AFL fuzzing的实时状态，并将结果写入JSON文件")
-            result = container.exec_run('cat /tmp/output/default/fuzzer_stats ')
+            logging.debug("获取AFL fuzzing的实时状态，并将结果写入JSON文件")
+            # 每个实例的统计前输出一行分隔符，便于一次exec读取全部实例；读取afl-fuzz正在写的输出目录
+            stats_glob = f"{os.path.normpath(os.path.join('/tmp', self.output_dir))}/*/fuzzer_stats"
+            result = container.exec_run(['sh', '-c',
+                                         f'for f in {stats_glob}; do '
+                                         '[ -f "$f" ] && echo "==> $f" && cat "$f"; done'])
             if result.exit_code != 0 and result.exit_code != None:
                 logging.info(f"执行后的状态码: {result.exit_code} ")
                 return {'error': '无法读取fuzzer_stats文件'}
-            logging.info(f"执行读取文件: cat /tmp/output/default/fuzzer_stats ")
-            stats = {}
+            logging.info(f"执行读取文件: {stats_glob} ")
+
+            instances = {}
+            current = None
             for line in result.output.decode().splitlines():
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    stats[key.strip()] = value.strip()
-            
-            status = {
-                'total_execs': stats.get('execs_done', '0'),
-                'paths_total': stats.get('paths_total', '0'),
-                'paths_found': stats.get('paths_found', '0'),
-                'unique_crashes': stats.get('unique_crashes', '0'),
-                'last_path': stats.get('last_path', 'none'),
-                'last_crash': stats.get('last_crash', 'none')
-            }
-            
+                if line.startswith('==> '):
+                    current = line[4:].strip().split('/')[-2]
+                    instances[current] = []
+                elif current is not None:
+                    instances[current].append(line)
+            if not instances:
+                return {'error': '无法读取fuzzer_stats文件'}
+
+            status = FuzzStatsWatcher.merge_fuzzer_stats(
+                {name: FuzzStatsWatcher.parse_stats_text('\n'.join(lines)) for name, lines in instances.items()})
+
             # 如果指定了输出文件路径，则将状态写入JSON文件
             if output_file:
-                try:
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        json.dump(status, f, indent=4)
-                    logging.info(f"状态已写入文件: {output_file}")
-                except Exception as e:
-                    logging.error(f"写入JSON文件时出错: {str(e)}")
+                FuzzStatsWatcher.write_json_atomic(output_file, status)
             
             return status
         except Exception as e:
-            return {'error': f'获取状态时出错: {str(e)}'}
\ No newline at end of file
+            return {'error': f'获取状态时出错: {str(e)}'}
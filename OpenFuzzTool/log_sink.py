@@ -0,0 +1,91 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的fuzz输出日志模块（内存中只保留最近若干行，完整日志压缩并按大小轮转）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import re
+import gzip
+import threading
+from collections import deque
+from typing import List
+
+# 终端控制序列（颜色、光标移动等），只在写入内存环形缓冲前去掉，压缩日志保留原始输出
+ANSI_RE = re.compile(rb'\x1b(\[[0-9;?]*[ -/]*[@-~]|[()][0-9A-Za-z]|[=>])')
+
+
+class BoundedLogSink:
+    def __init__(self, log_path: str, max_bytes: int = 16 * 1024 * 1024, backups: int = 3, ring_lines: int = 200):
+        """
+        :param log_path: 压缩日志路径（.log.gz），轮转后的旧日志为 .1.gz、.2.gz ...
+        :param max_bytes: 单个日志文件的未压缩大小上限
+        :param backups: 保留的旧日志数量
+        :param ring_lines: 内存中保留的最近行数，用于失败诊断
+        """
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.ring = deque(maxlen=ring_lines)
+        self.total_bytes = 0
+        self._written = 0
+        self._partial = b''
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+        self._file = gzip.open(log_path, 'ab', compresslevel=1)
+
+    def _rotate(self):
+        self._file.close()
+        base = self.log_path[:-3] if self.log_path.endswith('.gz') else self.log_path
+        for index in range(self.backups - 1, 0, -1):
+            src = f"{base}.{index}.gz"
+            if os.path.exists(src):
+                os.replace(src, f"{base}.{index + 1}.gz")
+        if self.backups > 0:
+            os.replace(self.log_path, f"{base}.1.gz")
+        else:
+            os.remove(self.log_path)
+        self._file = gzip.open(self.log_path, 'wb', compresslevel=1)
+        self._written = 0
+
+    def write(self, chunk: bytes) -> List[str]:
+        """写入一块输出，返回本次新产生的完整行（已去掉控制序列）"""
+        with self._lock:
+            self._file.write(chunk)
+            self._written += len(chunk)
+            self.total_bytes += len(chunk)
+            if self._written >= self.max_bytes:
+                self._rotate()
+            # curses界面用 \r 刷新同一行，按 \r 和 \n 都切分
+            data = self._partial + chunk
+            parts = re.split(rb'[\r\n]', data)
+            self._partial = parts.pop()
+            if len(self._partial) > 4096:
+                parts.append(self._partial)
+                self._partial = b''
+            lines = []
+            for part in parts:
+                line = ANSI_RE.sub(b'', part).strip()
+                if line:
+                    text = line.decode(errors='replace')
+                    self.ring.append(text)
+                    lines.append(text)
+            return lines
+
+    def tail(self, count: int = None) -> List[str]:
+        with self._lock:
+            lines = list(self.ring)
+        return lines if count is None else lines[-count:]
+
+    def close(self):
+        with self._lock:
+            if self._partial:
+                self.ring.append(ANSI_RE.sub(b'', self._partial).decode(errors='replace'))
+                self._partial = b''
+            self._file.close()
@@ -0,0 +1,157 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的样本精简模块（afl-cmin多线程精简 + afl-tmin并行最小化）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import glob
+import shutil
+import logging
+import threading
+import concurrent.futures
+from typing import Callable, Dict, List, Optional
+from OpenFuzzTool.extract_cache import file_sha256
+
+
+class CorpusMinimizer:
+    def __init__(self, container, target_cmd: str, path_mapper: Callable[[str], str], cache_dir: str,
+                 target_key: str = '', max_workers: int = 4, timeout: int = 60, exec_timeout: int = 1000):
+        """
+        Args:
+            container: Docker容器实例
+            target_cmd: 容器内的目标命令，@@ 表示输入文件
+            path_mapper: 宿主机路径 -> 容器内路径
+            cache_dir: 宿主机上的最小化结果缓存目录，按 (目标, 输入sha256) 保存
+            target_key: 目标程序的标识（通常是二进制的sha256），目标变化后缓存失效
+            max_workers: afl-cmin 的线程数和 afl-tmin 的并发数
+            timeout: 单个 afl-tmin 任务的超时（秒）
+            exec_timeout: 传给 afl-cmin/afl-tmin 的单次执行超时（毫秒）
+        """
+        self.container = container
+        self.target_cmd = target_cmd
+        self.path_mapper = path_mapper
+        self.cache_dir = os.path.join(cache_dir, (target_key or 'default')[:16])
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.exec_timeout = exec_timeout
+        self.stats = {'cmin_in': 0, 'cmin_out': 0, 'tmin_cached': 0, 'tmin_done': 0, 'tmin_failed': 0,
+                      'bytes_before': 0, 'bytes_after': 0}
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _count(self, key: str, value: int = 1):
+        with self._lock:
+            self.stats[key] += value
+
+    def _exec(self, command: List[str]):
+        exit_code, output = self.container.exec_run(command, workdir='/tmp', environment={'AFL_NO_UI': '1'})
+        return exit_code, output.decode(errors='replace') if output else ''
+
+    # ---------------- afl-cmin ----------------
+
+    def cmin(self, input_dir: str, output_dir: str, crash_mode: bool = False) -> Optional[str]:
+        """用 afl-cmin -T 多线程精简目录，失败时返回 None（调用方继续使用原目录）"""
+        files = [f for f in os.listdir(input_dir) if os.path.isfile(os.path.join(input_dir, f))] \
+            if os.path.isdir(input_dir) else []
+        if not files:
+            return None
+        shutil.rmtree(output_dir, ignore_errors=True)
+        command = ['afl-cmin', '-T', str(self.max_workers), '-t', str(self.exec_timeout), '-m', 'none',
+                   '-i', self.path_mapper(input_dir), '-o', self.path_mapper(output_dir)]
+        if crash_mode:
+            # 只保留仍能触发崩溃的样本
+            command.append('-C')
+        command += ['--'] + self.target_cmd.split()
+        exit_code, output = self._exec(command)
+        if exit_code not in (0, None) or not os.path.isdir(output_dir):
+            logging.error(f"afl-cmin 执行失败（{exit_code}）: {output[-2000:]}")
+            return None
+        kept = len(os.listdir(output_dir))
+        self._count('cmin_in', len(files))
+        self._count('cmin_out', kept)
+        logging.info(f"afl-cmin 精简 {input_dir}: {len(files)} -> {kept}")
+        return output_dir
+
+    # ---------------- afl-tmin ----------------
+
+    def tmin_one(self, input_file: str, output_file: str) -> str:
+        """最小化单个样本；结果按输入内容哈希缓存，失败时保留原样本"""
+        digest = file_sha256(input_file)
+        cached = os.path.join(self.cache_dir, digest)
+        self._count('bytes_before', os.path.getsize(input_file))
+        if os.path.exists(cached):
+            shutil.copyfile(cached, output_file)
+            self._count('tmin_cached')
+            self._count('bytes_after', os.path.getsize(output_file))
+            return output_file
+
+        command = ['timeout', '-s', 'KILL', str(self.timeout), 'afl-tmin', '-t', str(self.exec_timeout),
+                   '-m', 'none', '-i', self.path_mapper(input_file), '-o', self.path_mapper(output_file),
+                   '--'] + self.target_cmd.split()
+        try:
+            exit_code, output = self._exec(command)
+        except Exception as e:
+            exit_code, output = -1, str(e)
+        if exit_code not in (0, None) or not os.path.exists(output_file):
+            logging.warning(f"afl-tmin 失败（{exit_code}），保留原样本 {input_file}: {output[-500:]}")
+            shutil.copyfile(input_file, output_file)
+            self._count('tmin_failed')
+        else:
+            self._count('tmin_done')
+            tmp_path = f"{cached}.tmp.{threading.get_ident()}"
+            shutil.copyfile(output_file, tmp_path)
+            os.replace(tmp_path, cached)
+        self._count('bytes_after', os.path.getsize(output_file))
+        return output_file
+
+    def tmin_all(self, input_files: List[str], output_dir: str) -> List[str]:
+        """在线程池中并行最小化，每个样本是容器内一个独立的 afl-tmin 进程"""
+        os.makedirs(output_dir, exist_ok=True)
+        jobs = [(path, os.path.join(output_dir, os.path.basename(path))) for path in input_files]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda job: self.tmin_one(*job), jobs))
+
+    # ---------------- 整体流程 ----------------
+
+    @staticmethod
+    def collect(output_dir: str, subdir: str, staging_dir: str) -> str:
+        """把所有AFL实例的 crashes/queue 样本硬链接到同一个目录，文件名带实例名前缀"""
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+        for path in glob.glob(os.path.join(output_dir, '*', subdir, 'id:*')):
+            instance = os.path.basename(os.path.dirname(os.path.dirname(path)))
+            dst = os.path.join(staging_dir, f"{instance}_{os.path.basename(path)}")
+            try:
+                os.link(path, dst)
+            except OSError:
+                shutil.copyfile(path, dst)
+        return staging_dir
+
+    def minimize(self, output_dir: str, work_dir: str, subdir: str) -> Optional[str]:
+        """collect -> afl-cmin -> afl-tmin，返回最小化后的目录"""
+        crash_mode = subdir == 'crashes'
+        staging = self.collect(output_dir, subdir, os.path.join(work_dir, f"{subdir}_all"))
+        if not os.listdir(staging):
+            return None
+        selected = self.cmin(staging, os.path.join(work_dir, f"{subdir}_cmin"), crash_mode) or staging
+        files = sorted(os.path.join(selected, name) for name in os.listdir(selected))
+        result_dir = os.path.join(work_dir, f"{subdir}_min")
+        shutil.rmtree(result_dir, ignore_errors=True)
+        self.tmin_all(files, result_dir)
+        return result_dir
+
+    def run(self, output_dir: str, work_dir: str, include_queue: bool = True) -> Dict:
+        """精简崩溃样本（更小的复现样本）和队列（更小的续跑语料）"""
+        result = {'crashes': self.minimize(output_dir, work_dir, 'crashes')}
+        if include_queue:
+            result['queue'] = self.minimize(output_dir, work_dir, 'queue')
+        result['stats'] = dict(self.stats)
+        logging.info(f"样本精简完成: {result['stats']}")
+        return result
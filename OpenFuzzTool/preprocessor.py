@@ -12,15 +12,255 @@
 
 
 import os
-import magic
+import re
+import shlex
 import subprocess
-from zipfile import ZipFile
+from zipfile import ZipFile, is_zipfile
 import py7zr
 import rarfile
 import shutil
 from tqdm import tqdm
 import logging
-from pathlib import Path
+import stat
+import concurrent.futures
+import multiprocessing
+import tarfile
+import gzip
+import bz2
+import lzma
+from collections import deque
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, List, Optional, Tuple
+from OpenFuzzTool.formats import FORMAT_REGISTRY
+
+# 单个成员解压后超过该大小时交给进程池并行解压
+PARALLEL_MEMBER_SIZE = 8 * 1024 * 1024
+
+# 递归解压的默认限制，防止上传文件中的解压炸弹耗尽磁盘或拖慢同机的其他fuzz任务
+RECURSIVE_MAX_DEPTH = 3
+RECURSIVE_MAX_BYTES = 10 * 1024 ** 3
+RECURSIVE_MAX_ENTRIES = 200000
+
+# 单流压缩格式及其Python解压模块
+STREAM_OPENERS = {'gzip': gzip.open, 'xz': lzma.open, 'bz2': bz2.open}
+
+# 只能交给外部工具解压的格式：解压前用列表命令读取声明的文件大小，(命令, 每个文件一行的大小正则)
+# rpm 的列表需要把 cpio 流完整解出一遍，但只经过管道不落盘
+LISTING_COMMANDS = {
+    'iso': ('7z l -slt {path}', re.compile(r'^Size = (\d+)$', re.M)),
+    'cab': ('cabextract -l {path}', re.compile(r'^\s*(\d+) \|', re.M)),
+    'deb': ('dpkg-deb -c {path}', re.compile(r'^-\S*\s+\S+\s+(\d+)\s', re.M)),
+    'rpm': ('rpm2cpio {path} | cpio -itv --quiet', re.compile(r'^-\S*\s+\d+\s+\S+\s+\S+\s+(\d+)\s', re.M)),
+}
+
+
+class DecompressionLimitError(Exception):
+    """递归解压超过了总字节数或文件数限制"""
+
+
+# 进程池中各工作进程共享的解压预算（由 _init_decompress_budget 在进程启动时设置）
+_budget_bytes = None
+_budget_entries = None
+
+
+def _init_decompress_budget(bytes_left, entries_left):
+    global _budget_bytes, _budget_entries
+    _budget_bytes = bytes_left
+    _budget_entries = entries_left
+
+
+def _reserve(counter, amount: int, what: str):
+    """从共享预算中扣除，预算不足时抛出 DecompressionLimitError"""
+    with counter.get_lock():
+        if counter.value < amount:
+            counter.value = -1
+            raise DecompressionLimitError(f"超过递归解压的{what}上限")
+        counter.value -= amount
+
+
+def _copy_with_budget(src, dst_path: str, chunk_size: int = 1024 * 1024) -> int:
+    written = 0
+    with open(dst_path, 'wb') as dst:
+        for chunk in iter(lambda: src.read(chunk_size), b''):
+            _reserve(_budget_bytes, len(chunk), '总字节数')
+            dst.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def _safe_target(output_dir: str, name: str):
+    """成员路径不能是绝对路径或包含 ..，返回目标路径，不安全时返回 None"""
+    member = PurePosixPath(name)
+    if member.is_absolute() or '..' in member.parts or not member.parts:
+        return None
+    return os.path.join(output_dir, *member.parts)
+
+
+def _within(path: str, root: str) -> bool:
+    """path 解析符号链接后是否仍在 root 之内"""
+    real_root = os.path.realpath(root)
+    real_path = os.path.realpath(path)
+    return real_path == real_root or real_path.startswith(real_root + os.sep)
+
+
+def _open_nofollow(path: str):
+    """写入解压文件：目标本身是符号链接时失败，不会跟随链接写到工作目录之外"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_NOFOLLOW', 0), 0o644)
+    return os.fdopen(fd, 'wb')
+
+
+def _count_tree(directory: str) -> Tuple[int, int]:
+    total_bytes, entries = 0, 0
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            entries += 1
+            try:
+                total_bytes += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total_bytes, entries
+
+
+def _stream_contains_tar(file_path: str, fmt: str) -> bool:
+    """解压单流压缩文件的开头，检查其中是否是tar包"""
+    try:
+        with STREAM_OPENERS[fmt](file_path, 'rb') as f:
+            return FORMAT_REGISTRY.sniff_bytes(f.read(512)) == 'tar'
+    except Exception:
+        return False
+
+
+def _declared_contents(file_path: str, fmt: str) -> Optional[Tuple[int, int]]:
+    """从压缩包索引读取解压后的 (总字节数, 文件数)，不解压数据；无法读取时返回 None"""
+    if fmt == '7z':
+        with py7zr.SevenZipFile(file_path, 'r') as sz:
+            infos = [info for info in sz.list() if not info.is_directory]
+        return sum(info.uncompressed or 0 for info in infos), len(infos)
+    if fmt == 'rar':
+        with rarfile.RarFile(file_path) as rf:
+            infos = [info for info in rf.infolist() if not info.is_dir()]
+        return sum(info.file_size for info in infos), len(infos)
+    if fmt not in LISTING_COMMANDS:
+        return None
+    command, size_re = LISTING_COMMANDS[fmt]
+    result = subprocess.run(command.format(path=shlex.quote(file_path)), shell=True, capture_output=True)
+    if result.returncode != 0:
+        return None
+    output = result.stdout.decode(errors='replace')
+    if fmt == 'iso':
+        # 7z -slt 的第一段是压缩包本身的属性
+        output = output.split('----------', 1)[-1]
+    sizes = [int(size) for size in size_re.findall(output)]
+    return sum(sizes), len(sizes)
+
+
+def _extract_zstd_bounded(file_path: str, output_dir: str) -> Tuple[int, int]:
+    """zstd 没有Python标准库模块：用 zstd -dc 的输出流边解压边扣预算，内部是tar包时直接展开"""
+    def open_stream():
+        return subprocess.Popen(['zstd', '-dc', file_path], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    # 先读开头判断是否是tar包（只解压512字节）
+    proc = open_stream()
+    head = proc.stdout.read(512)
+    proc.kill()
+    proc.wait()
+    proc = open_stream()
+    total_bytes, entries = 0, 0
+    try:
+        if FORMAT_REGISTRY.sniff_bytes(head) == 'tar':
+            with tarfile.open(fileobj=proc.stdout, mode='r|') as tf:
+                total_bytes, entries = _extract_tar_stream(tf, output_dir)
+        else:
+            _reserve(_budget_entries, 1, '文件数')
+            name = Path(file_path).stem if file_path.lower().endswith('.zst') else Path(file_path).name + '.out'
+            total_bytes += _copy_with_budget(proc.stdout, os.path.join(output_dir, name))
+            entries += 1
+    finally:
+        proc.kill()
+        proc.wait()
+    return total_bytes, entries
+
+
+def _extract_tar_stream(tf, output_dir: str) -> Tuple[int, int]:
+    total_bytes, entries = 0, 0
+    for member in tf:
+        target = _safe_target(output_dir, member.name)
+        if target is None:
+            continue
+        _reserve(_budget_entries, 1, '文件数')
+        if member.isdir():
+            os.makedirs(target, exist_ok=True)
+        elif member.isfile():
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            total_bytes += _copy_with_budget(tf.extractfile(member), target)
+            os.chmod(target, member.mode & 0o777)
+            entries += 1
+        # 链接、设备文件等在嵌套解压中直接跳过
+    return total_bytes, entries
+
+
+def _extract_bounded(file_path: str, output_dir: str) -> Tuple[str, int, int]:
+    """进程池工作函数：在共享预算内解压单个压缩包，返回 (输出目录, 字节数, 文件数)
+    按文件头识别格式：zip、tar 系列、单文件 gz/xz/bz2 和 zstd 边解压边扣预算；
+    其他格式先按索引中声明的大小扣预算再交给 decompressionALL，解压后超出声明的部分再补扣。
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    fmt = FORMAT_REGISTRY.detect(file_path)
+    total_bytes, entries = 0, 0
+    if fmt == 'zip':
+        with ZipFile(file_path, "r") as zp:
+            for info in zp.infolist():
+                target = _safe_target(output_dir, info.filename)
+                if target is None:
+                    continue
+                _reserve(_budget_entries, 1, '文件数')
+                if info.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zp.open(info) as src:
+                    total_bytes += _copy_with_budget(src, target)
+                entries += 1
+    elif fmt in STREAM_OPENERS and not _stream_contains_tar(file_path, fmt):
+        _reserve(_budget_entries, 1, '文件数')
+        with STREAM_OPENERS[fmt](file_path, 'rb') as src:
+            total_bytes += _copy_with_budget(src, os.path.join(output_dir, Path(file_path).stem))
+        entries += 1
+    elif fmt == 'tar' or fmt in STREAM_OPENERS:
+        with tarfile.open(file_path, 'r|*') as tf:
+            total_bytes, entries = _extract_tar_stream(tf, output_dir)
+    elif fmt == 'zstd':
+        total_bytes, entries = _extract_zstd_bounded(file_path, output_dir)
+    else:
+        # 解压炸弹在写盘之前按声明的大小拒绝；读取不到索引的压缩包不解压
+        declared = _declared_contents(file_path, fmt)
+        if declared is None:
+            raise RuntimeError(f"无法读取压缩包索引: {file_path}")
+        _reserve(_budget_entries, declared[1], '文件数')
+        _reserve(_budget_bytes, declared[0], '总字节数')
+        if FilePreprocessor().decompressionALL(file_path, output_dir) is None:
+            raise RuntimeError(f"解压失败: {file_path}")
+        total_bytes, entries = _count_tree(output_dir)
+        # 索引中的大小可能不实，超出声明的部分补扣
+        _reserve(_budget_entries, max(0, entries - declared[1]), '文件数')
+        _reserve(_budget_bytes, max(0, total_bytes - declared[0]), '总字节数')
+    return output_dir, total_bytes, entries
+
+
+def _extract_zip_members(zip_path: str, members: List[Tuple[str, str]]) -> int:
+    """进程池工作函数：每个进程单独打开zip，把指定成员写到目标路径，返回写入字节数"""
+    written = 0
+    with ZipFile(zip_path, "r") as zp:
+        for name, target in members:
+            info = zp.getinfo(name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with zp.open(info) as src, _open_nofollow(target) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            mode = (info.external_attr >> 16) & 0o7777
+            if mode:
+                os.chmod(target, mode)
+            written += info.file_size
+    return written
 
 class FilePreprocessor:
     # 配置日志记录
@@ -29,6 +269,9 @@ class FilePreprocessor:
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
+    # 最近一次 extract_to_workspace 实际解压写入的字节数
+    bytes_extracted = 0
+
     def clean_workspace(self, workspace: str):
         """安全清空工作目录"""
         if os.path.exists(workspace):
@@ -56,10 +299,139 @@ class FilePreprocessor:
             else:
                 print("No Build.sh file found in the extracted package.")
 
+    def extract_to_workspace(self, zip_path, workspace, max_workers=None):
+        """单遍解压：直接把 Build.sh 所在目录解压到工作目录，不再经过 extractdir 二次复制
+        zip 格式先读取中央目录定位 Build.sh 根目录，只解压该目录下的成员，大成员用进程池并行解压；
+        其他格式解压到工作目录内的临时目录后，通过 rename（同一文件系统，不复制数据）移动到位。
+        :param zip_path: 压缩文件的绝对路径
+        :param workspace: 工作目录
+        :return: 工作目录，失败返回 None
+        """
+        logging.info(f"开始处理文件: {zip_path}")
+        os.makedirs(workspace, exist_ok=True)
+        self.bytes_extracted = 0
+        try:
+            if is_zipfile(zip_path):
+                return self._extract_zip_to_workspace(zip_path, workspace, max_workers)
+        except Exception as e:
+            logging.error(f"ZIP解压失败 {zip_path}: {str(e)}")
+            return None
+        return self._extract_and_move_to_workspace(zip_path, workspace)
+
+    def _extract_zip_to_workspace(self, zip_path, workspace, max_workers=None):
+        with ZipFile(zip_path, "r") as zp:
+            infos = zp.infolist()
+            # 取层级最浅的 Build.sh 所在目录作为根目录
+            build_roots = sorted((PurePosixPath(info.filename).parent for info in infos
+                                  if PurePosixPath(info.filename).name == 'Build.sh'),
+                                 key=lambda p: len(p.parts))
+            root = build_roots[0] if build_roots else PurePosixPath('.')
+            if not build_roots:
+                print("No Build.sh file found in the extracted package.")
+
+            small, large, links = [], [], []
+            total_size = 0
+            workspace_abs = os.path.abspath(workspace)
+            for info in infos:
+                member = PurePosixPath(info.filename)
+                if root.parts and member.parts[:len(root.parts)] != root.parts:
+                    continue
+                relative = member.parts[len(root.parts):]
+                if not relative or member.is_absolute() or '..' in relative:
+                    continue
+                target = os.path.join(workspace_abs, *relative)
+                if info.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    continue
+                if stat.S_ISLNK((info.external_attr >> 16)):
+                    # 符号链接在普通成员全部写完后再创建，避免后续成员经由链接写到工作目录之外
+                    links.append((zp.read(info).decode(errors='replace'), target))
+                    continue
+                total_size += info.file_size
+                (large if info.file_size >= PARALLEL_MEMBER_SIZE else small).append((info.filename, target))
+
+        written = 0
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_extract_zip_members, zip_path, [member]) for member in large]
+            # 小文件在当前进程解压，与进程池中的大文件同时进行
+            written += _extract_zip_members(zip_path, small)
+            for future in concurrent.futures.as_completed(futures):
+                written += future.result()
+        self.bytes_extracted = written
+        for link_target, target in links:
+            self._create_safe_link(link_target, target, workspace_abs)
+
+        logging.info(f"成功解压 {zip_path} 到 {workspace}（{len(small) + len(large)} 个文件，{written} 字节，"
+                     f"并行解压大文件 {len(large)} 个）")
+        return workspace
+
+    @staticmethod
+    def _create_safe_link(link_target: str, target: str, workspace_abs: str) -> bool:
+        """只创建指向工作目录内部的相对链接，绝对路径、.. 越界或指向工作目录之外的链接直接丢弃"""
+        resolved = os.path.join(os.path.dirname(target), link_target)
+        if (os.path.isabs(link_target) or not _within(os.path.dirname(target), workspace_abs)
+                or not _within(resolved, workspace_abs)):
+            logging.warning(f"跳过指向工作目录之外的符号链接 {target} -> {link_target}")
+            return False
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.isdir(target) and not os.path.islink(target):
+            logging.warning(f"跳过与目录同名的符号链接 {target}")
+            return False
+        if os.path.lexists(target):
+            os.remove(target)
+        os.symlink(link_target, target)
+        return True
+
+    def _extract_and_move_to_workspace(self, zip_path, workspace):
+        staging = os.path.join(workspace, '.extract_staging')
+        if os.path.exists(staging):
+            shutil.rmtree(staging)
+        if self.decompressionALL(zip_path, staging) is None:
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+        self.bytes_extracted, _ = _count_tree(staging)
+
+        # 取层级最浅的 Build.sh 所在目录
+        build_dir = None
+        for root, dirs, files in os.walk(staging):
+            if 'Build.sh' in files and (build_dir is None or root.count(os.sep) < build_dir.count(os.sep)):
+                build_dir = root
+        if build_dir is None:
+            print("No Build.sh file found in the extracted package.")
+            build_dir = staging
+
+        for entry in os.listdir(build_dir):
+            target = os.path.join(workspace, entry)
+            if os.path.isdir(target) and not os.path.islink(target):
+                shutil.rmtree(target)
+            elif os.path.lexists(target):
+                os.remove(target)
+            os.rename(os.path.join(build_dir, entry), target)
+        shutil.rmtree(staging, ignore_errors=True)
+        logging.info(f"成功解压 {zip_path} 到 {workspace}")
+        return workspace
+
     def get_file_extension(self, file_path):
         """获取文件扩展名"""
         return Path(file_path).suffix.lower()
 
+    def format_handlers(self) -> Dict[str, Callable]:
+        """格式名到解压函数的映射，新增格式时在 FORMAT_REGISTRY 注册签名并在此添加处理函数"""
+        return {
+            'zip': self.unzip_zipfile,
+            'gzip': self.unzip_targzfile,
+            'tar': self.unzip_tarfile,
+            '7z': self.unzip_7z_file,
+            'rar': self.unzip_rar_file,
+            'xz': self.unzip_xz_file,
+            'bz2': self.unzip_bz2_file,
+            'iso': self.unzip_iso_file,
+            'rpm': self.unzip_RPMfile,
+            'deb': self.unzip_deb_file,
+            'cab': self.unzip_cab_file,
+            'zstd': self.unzip_zst_file,
+        }
+
     def decompressionALL(self, zip_path, FuzzWorkPath):
         """智能识别压缩包类型并解压
         :param zip_path: 压缩文件的绝对路径
@@ -68,37 +440,16 @@ class FilePreprocessor:
         """
         logging.info(f"开始处理文件: {zip_path}")
         
-        # 使用 magic 模块检测文件类型
-        m = magic.Magic(uncompress=True)
+        # 按文件头签名识别格式，识别不了时再看扩展名，最后才调用libmagic
         try:
-            file_type = m.from_file(zip_path)
-            ext = self.get_file_extension(zip_path)
-            logging.info(f"检测到文件类型: {file_type}，扩展名: {ext}")
-
-            # 根据文件类型和扩展名调用相应的解压函数
-            if "Zip archive data" in file_type or ext == '.zip':
-                return self.unzip_zipfile(zip_path, FuzzWorkPath)
-            elif "gzip compressed data" in file_type or "tar archive" in file_type or ext in ['.tar', '.gz', '.tgz']:
-                return self.unzip_targzfile(zip_path, FuzzWorkPath)
-            elif "7-zip archive data" in file_type or ext == '.7z':
-                return self.unzip_7z_file(zip_path, FuzzWorkPath)
-            elif "RAR archive data" in file_type or ext == '.rar':
-                return self.unzip_rar_file(zip_path, FuzzWorkPath)
-            elif "XZ compressed data" in file_type or ext == '.xz':
-                return self.unzip_xz_file(zip_path, FuzzWorkPath)
-            elif "bzip2 compressed data" in file_type or ext == '.bz2':
-                return self.unzip_bz2_file(zip_path, FuzzWorkPath)
-            elif "ISO 9660" in file_type or ext == '.iso':
-                return self.unzip_iso_file(zip_path, FuzzWorkPath)
-            elif "RPM" in file_type or ext == '.rpm':
-                return self.unzip_RPMfile(zip_path, FuzzWorkPath)
-            elif "Debian binary package" in file_type or ext == '.deb':
-                return self.unzip_deb_file(zip_path, FuzzWorkPath)
-            elif "Microsoft Cabinet archive" in file_type or ext == '.cab':
-                return self.unzip_cab_file(zip_path, FuzzWorkPath)
-            else:
+            file_type = FORMAT_REGISTRY.detect(zip_path)
+            logging.info(f"检测到文件类型: {file_type}，扩展名: {self.get_file_extension(zip_path)}")
+
+            handler = self.format_handlers().get(file_type)
+            if handler is None:
                 logging.error(f"不支持的文件类型: {file_type}")
                 return None
+            return handler(zip_path, FuzzWorkPath)
         except Exception as e:
             logging.error(f"文件检测或解压失败 {zip_path}: {str(e)}")
             return None
@@ -140,6 +491,33 @@ class FilePreprocessor:
             logging.error(f"TAR.GZ解压失败 {file_path}: {str(e)}")
             return None
 
+    def unzip_tarfile(self, file_path, output_dir):
+        """解压 tar 文件到指定目录"""
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            cmd = f"tar -xf {file_path} -C {output_dir}"
+            subprocess.run(cmd, shell=True, check=True)
+            logging.info(f"成功解压 {file_path} 到 {output_dir}")
+            return output_dir
+        except Exception as e:
+            logging.error(f"TAR解压失败 {file_path}: {str(e)}")
+            return None
+
+    def unzip_zst_file(self, file_path, output_dir):
+        """解压 zstd 文件到指定目录，内部是tar包时直接展开"""
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            if file_path.lower().endswith(('.tar.zst', '.tzst')):
+                cmd = f"tar --zstd -xf {file_path} -C {output_dir}"
+            else:
+                cmd = f"zstd -d -k {file_path} -o {output_dir}/{Path(file_path).stem}"
+            subprocess.run(cmd, shell=True, check=True)
+            logging.info(f"成功解压 {file_path} 到 {output_dir}")
+            return output_dir
+        except Exception as e:
+            logging.error(f"ZSTD解压失败 {file_path}: {str(e)}")
+            return None
+
     def unzip_7z_file(self, file_path, output_dir):
         """解压 7z 文件到指定目录"""
         try:
@@ -236,27 +614,59 @@ class FilePreprocessor:
             logging.error(f"CAB解压失败 {file_path}: {str(e)}")
             return None
 
-    def recursive_decompress(self,file_path, output_dir):
+    def recursive_decompress(self, file_path, output_dir, max_depth=RECURSIVE_MAX_DEPTH,
+                             max_total_bytes=RECURSIVE_MAX_BYTES, max_entries=RECURSIVE_MAX_ENTRIES,
+                             max_workers=None):
         """递归解压文件
+        使用工作队列逐层展开嵌套压缩包，同一层发现的压缩包在进程池中并发解压；
+        所有层共享总字节数和文件数预算，超出时停止并删除超限的输出，防止解压炸弹。
         :param file_path: 压缩文件的绝对路径
         :param output_dir: 解压目标路径的绝对路径
+        :param max_depth: 最大嵌套层数（最外层为第0层）
+        :param max_total_bytes: 所有层解压出的总字节数上限
+        :param max_entries: 所有层解压出的文件数上限
+        :param max_workers: 进程池大小，缺省为CPU核数
         :return: 最终解压后的目录路径列表
         """
         result_dirs = []
-        initial_dir = self.decompressionALL(file_path, output_dir)
-        
-        if initial_dir:
-            result_dirs.append(initial_dir)
-            # 遍历解压后的目录，查找嵌套的压缩文件
-            for root, _, files in os.walk(initial_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    if any(file.lower().endswith(ext) for ext in 
-                        ['.zip', '.tar.gz', '.tgz', '.7z', '.rar', '.xz', '.bz2', 
-                            '.iso', '.rpm', '.deb', '.cab']):
-                        nested_output_dir = os.path.join(root, 'nested_' + Path(file).stem)
-                        nested_result = self.decompressionALL(file_path, nested_output_dir)
-                        if nested_result:
-                            result_dirs.append(nested_result)
-        
-        return result_dirs
\ No newline at end of file
+        bytes_left = multiprocessing.Value('q', max_total_bytes)
+        entries_left = multiprocessing.Value('q', max_entries)
+        # 队列中每项为 (压缩包路径, 输出目录, 深度)
+        queue = deque([(file_path, output_dir, 0)])
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers,
+                                                    initializer=_init_decompress_budget,
+                                                    initargs=(bytes_left, entries_left)) as executor:
+            running = {}
+            while queue or running:
+                while queue:
+                    archive, target_dir, depth = queue.popleft()
+                    running[executor.submit(_extract_bounded, archive, target_dir)] = (archive, target_dir, depth)
+
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    archive, target_dir, depth = running.pop(future)
+                    try:
+                        extracted_dir, _, _ = future.result()
+                    except DecompressionLimitError as e:
+                        logging.error(f"递归解压中止 {archive}: {str(e)}")
+                        shutil.rmtree(target_dir, ignore_errors=True)
+                        for pending in running:
+                            pending.cancel()
+                        queue.clear()
+                        continue
+                    except Exception as e:
+                        logging.error(f"文件检测或解压失败 {archive}: {str(e)}")
+                        continue
+                    result_dirs.append(extracted_dir)
+                    if depth >= max_depth:
+                        continue
+                    # 只扫描本次新解压出的目录，查找嵌套的压缩文件
+                    for root, _, files in os.walk(extracted_dir):
+                        for file in files:
+                            if FORMAT_REGISTRY.sniff(os.path.join(root, file)) is not None:
+                                nested_output_dir = os.path.join(root, 'nested_' + Path(file).stem)
+                                queue.append((os.path.join(root, file), nested_output_dir, depth + 1))
+
+        logging.info(f"递归解压完成，共 {len(result_dirs)} 个目录，"
+                     f"剩余预算 {max(bytes_left.value, 0)} 字节 / {max(entries_left.value, 0)} 个文件")
+        return result_dirs
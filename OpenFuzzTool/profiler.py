@@ -0,0 +1,116 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的阶段耗时统计模块（嵌套span + 计数器，导出Chrome trace和Prometheus文本）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class Profiler:
+    def __init__(self, task_name: str):
+        self.task_name = task_name
+        self.spans: List[Dict] = []
+        self.counters: Dict[str, float] = {}
+        self._origin = time.perf_counter()
+        self._wall_origin = time.time()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> List[str]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """记录一个阶段的耗时，可以嵌套；异常时记录错误信息后继续抛出"""
+        stack = self._stack()
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            args['error'] = str(e)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self.spans.append({'name': name, 'parent': stack[-1] if stack else None, 'depth': len(stack),
+                                   'start': start - self._origin, 'duration': duration,
+                                   'tid': threading.get_ident(), 'args': args})
+            logging.info(f"[{self.task_name}] {name} 耗时 {duration:.2f} 秒")
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name: str, value: float):
+        with self._lock:
+            self.counters[name] = value
+
+    def stage_seconds(self) -> Dict[str, float]:
+        """按阶段名汇总耗时（同名阶段累加）"""
+        result: Dict[str, float] = {}
+        with self._lock:
+            for span in self.spans:
+                result[span['name']] = result.get(span['name'], 0) + span['duration']
+        return result
+
+    def chrome_trace(self) -> Dict:
+        """Chrome trace格式（chrome://tracing、Perfetto可直接打开），时间单位为微秒"""
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': self.task_name}}]
+        with self._lock:
+            for span in sorted(self.spans, key=lambda item: item['start']):
+                events.append({'name': span['name'], 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': span['tid'],
+                               'ts': round(span['start'] * 1e6), 'dur': round(span['duration'] * 1e6),
+                               'args': span['args']})
+            end = max((span['start'] + span['duration'] for span in self.spans), default=0)
+            events.append({'name': 'counters', 'ph': 'C', 'pid': pid, 'ts': round(end * 1e6),
+                           'args': dict(self.counters)})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'task': self.task_name, 'started': self._wall_origin}}
+
+    @staticmethod
+    def _metric_name(name: str) -> str:
+        return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+    def prometheus_text(self) -> str:
+        """Prometheus文本格式，可由node_exporter的textfile collector采集"""
+        task = self.task_name.replace('\\', '\\\\').replace('"', '\\"')
+        lines = ['# HELP autofuzz_stage_duration_seconds Wall time spent in each pipeline stage.',
+                 '# TYPE autofuzz_stage_duration_seconds gauge']
+        for stage, seconds in sorted(self.stage_seconds().items()):
+            lines.append(f'autofuzz_stage_duration_seconds{{task="{task}",stage="{stage}"}} {seconds:.6f}')
+        with self._lock:
+            counters = sorted(self.counters.items())
+        for name, value in counters:
+            metric = f"autofuzz_{self._metric_name(name)}_total"
+            lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{{task="{task}"}} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, directory: str, prefix: str = 'Profile') -> Dict[str, str]:
+        """导出 <prefix>.trace.json 和 <prefix>.prom，返回文件路径"""
+        paths = {'trace': os.path.join(directory, f"{prefix}.trace.json"),
+                 'prometheus': os.path.join(directory, f"{prefix}.prom")}
+        with open(paths['trace'], 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+        with open(paths['prometheus'], 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        return paths
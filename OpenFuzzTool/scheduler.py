@@ -0,0 +1,149 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的批量任务调度模块
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import glob
+import json
+import time
+import logging
+import threading
+import concurrent.futures
+from contextlib import contextmanager
+from typing import Callable, List
+
+
+class BatchScheduler:
+    def __init__(self, task_func: Callable, max_workers: int = None, mem_per_task_mb: int = 2048,
+                 max_concurrent_builds: int = None):
+        """
+        Args:
+            task_func: 执行单个任务的函数，签名为 task_func(config_path, scheduler=...) -> dict
+            max_workers: 同时进行的任务数上限；缺省时根据CPU核数和可用内存计算
+            mem_per_task_mb: 每个任务（容器）预估占用的内存，用于计算并发上限
+            max_concurrent_builds: 同时进行构建的任务数上限，缺省为CPU核数的一半
+        """
+        self.task_func = task_func
+        self.cpu_count = os.cpu_count() or 1
+        self.mem_per_task_mb = mem_per_task_mb
+        # fuzz阶段按内存记账的总量（启动时的可用内存），读取不到时不按内存限制
+        self.memory_budget_mb = self.available_memory_mb()
+        if max_workers is None:
+            max_workers = self.default_max_workers()
+        self.max_workers = max(1, max_workers)
+        if max_concurrent_builds is None:
+            max_concurrent_builds = max(1, self.cpu_count // 2)
+        self._build_slots = threading.Semaphore(max_concurrent_builds)
+        # fuzz阶段按核数记账：每个任务占用的核数等于其afl-fuzz实例数
+        self._free_cores = self.cpu_count
+        self._free_memory_mb = self.memory_budget_mb
+        self._cores_cond = threading.Condition()
+
+    def default_max_workers(self) -> int:
+        """并发任务数 = min(CPU核数, 可用内存 / 每任务内存)"""
+        available_mb = self.available_memory_mb()
+        by_memory = available_mb // self.mem_per_task_mb if available_mb else self.cpu_count
+        return int(max(1, min(self.cpu_count, by_memory)))
+
+    @staticmethod
+    def available_memory_mb() -> int:
+        """读取 /proc/meminfo 的 MemAvailable，无法读取时返回0"""
+        try:
+            with open('/proc/meminfo') as f:
+                for line in f:
+                    if line.startswith('MemAvailable:'):
+                        return int(line.split()[1]) // 1024
+        except OSError:
+            pass
+        try:
+            return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // (1024 * 1024)
+        except (ValueError, OSError, AttributeError):
+            return 0
+
+    @contextmanager
+    def build_slot(self):
+        """构建阶段的并发限制，避免同时编译过多项目拖慢正在fuzz的任务"""
+        with self._build_slots:
+            yield
+
+    @contextmanager
+    def fuzz_slot(self, cores: int = 1, memory_mb: int = 0):
+        """fuzz阶段按核数和内存申请资源，超过总量的请求按总量上限处理（等其他任务结束后单独运行）
+        Args:
+            memory_mb: 任务在每任务预估内存之外额外占用的宿主机内存（如容器tmpfs）
+        """
+        cores = max(1, min(cores, self.cpu_count))
+        memory = min(self.mem_per_task_mb + max(0, memory_mb), self.memory_budget_mb)
+        with self._cores_cond:
+            while self._free_cores < cores or self._free_memory_mb < memory:
+                self._cores_cond.wait()
+            self._free_cores -= cores
+            self._free_memory_mb -= memory
+        try:
+            yield
+        finally:
+            with self._cores_cond:
+                self._free_cores += cores
+                self._free_memory_mb += memory
+                self._cores_cond.notify_all()
+
+    @staticmethod
+    def collect_task_files(paths: List[str]) -> List[str]:
+        """将目录和文件列表展开为任务JSON文件列表（目录下按文件名排序）"""
+        task_files = []
+        for path in paths:
+            if os.path.isdir(path):
+                task_files.extend(sorted(glob.glob(os.path.join(path, '*.json'))))
+            elif os.path.isfile(path):
+                task_files.append(path)
+            else:
+                logging.error(f"任务文件不存在: {path}")
+        return task_files
+
+    def run(self, task_files: List[str], summary_file: str = None) -> dict:
+        """并发执行所有任务，返回并可选写入汇总结果"""
+        logging.info(f"批量任务数: {len(task_files)}，并发上限: {self.max_workers}")
+        start_time = time.time()
+        results = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._run_task, path): path for path in task_files}
+            for future in concurrent.futures.as_completed(futures):
+                results.append(future.result())
+
+        summary = {
+            'total': len(results),
+            'succeeded': sum(1 for r in results if r.get('status') == 'success'),
+            'failed': sum(1 for r in results if r.get('status') != 'success'),
+            'max_workers': self.max_workers,
+            'elapsed_seconds': round(time.time() - start_time, 2),
+            'tasks': sorted(results, key=lambda r: r.get('config_path', '')),
+        }
+        if summary_file:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(summary_file)), exist_ok=True)
+                with open(summary_file, 'w', encoding='utf-8') as f:
+                    json.dump(summary, f, indent=4, ensure_ascii=False)
+                logging.info(f"批量汇总已写入文件: {summary_file}")
+            except Exception as e:
+                logging.error(f"写入批量汇总时出错: {str(e)}")
+        return summary
+
+    def _run_task(self, config_path: str) -> dict:
+        start_time = time.time()
+        try:
+            result = self.task_func(config_path, scheduler=self) or {}
+        except Exception as e:
+            logging.error(f"任务执行失败 {config_path}: {str(e)}")
+            result = {'status': 'failed', 'error': str(e)}
+        result.setdefault('status', 'success')
+        result['config_path'] = config_path
+        result.setdefault('elapsed_seconds', round(time.time() - start_time, 2))
+        return result
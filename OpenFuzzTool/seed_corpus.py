@@ -0,0 +1,120 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的种子语料准备模块（去重、大小限制、覆盖率精简、缓存）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Optional
+from OpenFuzzTool.extract_cache import file_sha256
+
+# AFL++ 的 MAX_FILE 默认为1MB，更大的种子会被afl-fuzz拒绝
+DEFAULT_MAX_SEED_SIZE = 1024 * 1024
+
+
+class SeedCorpus:
+    def __init__(self, cache_root: Optional[str], max_seed_size: int = DEFAULT_MAX_SEED_SIZE):
+        """
+        :param cache_root: 精简结果的缓存目录，按 (种子集合哈希, 目标二进制哈希) 保存；None 表示不缓存
+        :param max_seed_size: 单个种子的大小上限（字节），超过的种子直接丢弃
+        """
+        self.cache_root = cache_root
+        self.max_seed_size = max_seed_size
+        if cache_root:
+            os.makedirs(cache_root, exist_ok=True)
+
+    def dedupe(self, input_dir: str, max_seed_size: int = None) -> Dict[str, str]:
+        """按内容哈希去重并丢弃超过大小上限的种子，返回 {sha256: 路径}"""
+        max_seed_size = max_seed_size or self.max_seed_size
+        seeds: Dict[str, str] = {}
+        oversized = duplicates = 0
+        for root, dirs, names in os.walk(input_dir):
+            dirs.sort()
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                if os.path.islink(path) or not os.path.isfile(path):
+                    continue
+                size = os.path.getsize(path)
+                if size == 0 or size > max_seed_size:
+                    oversized += 1
+                    continue
+                digest = file_sha256(path)
+                if digest in seeds:
+                    duplicates += 1
+                    continue
+                seeds[digest] = path
+        logging.info(f"种子去重: 保留 {len(seeds)} 个，重复 {duplicates} 个，空文件或超过大小上限 {oversized} 个")
+        return seeds
+
+    def seed_set_hash(self, seeds: Dict[str, str], max_seed_size: int = None) -> str:
+        digest = hashlib.sha256(f"max_size={max_seed_size or self.max_seed_size}\0".encode())
+        for seed_hash in sorted(seeds):
+            digest.update(seed_hash.encode())
+        return digest.hexdigest()
+
+    def prepare(self, input_dir: str, output_dir: str, binary_hash: str,
+                cmin: Callable[[str, str], Optional[str]] = None, max_seed_size: int = None) -> Dict:
+        """生成给 afl-fuzz -i 使用的种子目录
+        :param input_dir: 任务原始的种子目录
+        :param output_dir: 准备好的种子目录
+        :param binary_hash: 目标二进制的哈希，目标重新构建后缓存失效
+        :param cmin: 覆盖率精简函数 cmin(输入目录, 输出目录)，失败返回 None
+        :param max_seed_size: 覆盖构造函数中的大小上限（任务配置中的 seed_max_size）
+        :return: 准备结果的统计信息
+        """
+        seeds = self.dedupe(input_dir, max_seed_size) if os.path.isdir(input_dir) else {}
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.makedirs(output_dir)
+        if not seeds:
+            # afl-fuzz 至少需要一个种子
+            with open(os.path.join(output_dir, 'seed_default'), 'wb') as f:
+                f.write(b'0')
+            logging.warning(f"{input_dir} 中没有可用的种子，使用默认种子")
+            return {'input_seeds': 0, 'unique_seeds': 0, 'prepared_seeds': 1, 'cache_hit': False}
+
+        key = hashlib.sha256(f"{self.seed_set_hash(seeds, max_seed_size)}|{binary_hash}".encode()).hexdigest()
+        result = {'unique_seeds': len(seeds), 'key': key, 'cache_hit': False}
+        cache_dir = os.path.join(self.cache_root, key) if self.cache_root else None
+        if cache_dir and os.path.exists(os.path.join(cache_dir, 'manifest.json')):
+            for name in os.listdir(os.path.join(cache_dir, 'seeds')):
+                shutil.copyfile(os.path.join(cache_dir, 'seeds', name), os.path.join(output_dir, name))
+            result.update(cache_hit=True, prepared_seeds=len(os.listdir(output_dir)))
+            logging.info(f"种子精简缓存命中 {key[:12]}：{result['prepared_seeds']} 个种子")
+            return result
+
+        # 去重后的种子以内容哈希命名，afl-cmin 的输入目录中不会出现同名文件
+        staging = f"{output_dir}_dedup"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for digest, path in seeds.items():
+            shutil.copyfile(path, os.path.join(staging, digest[:16]))
+        minimized = cmin(staging, f"{output_dir}_cmin") if cmin is not None and len(seeds) > 1 else None
+        source = minimized or staging
+        for name in os.listdir(source):
+            shutil.copyfile(os.path.join(source, name), os.path.join(output_dir, name))
+        result['prepared_seeds'] = len(os.listdir(output_dir))
+        result['minimized'] = minimized is not None
+        logging.info(f"种子准备完成: {len(seeds)} -> {result['prepared_seeds']}")
+
+        if cache_dir and minimized is not None:
+            tmp_dir = f"{cache_dir}.tmp.{os.getpid()}.{threading.get_ident()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            shutil.copytree(output_dir, os.path.join(tmp_dir, 'seeds'))
+            with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=4)
+            try:
+                os.rename(tmp_dir, cache_dir)
+            except OSError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        return result
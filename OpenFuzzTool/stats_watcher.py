@@ -0,0 +1,163 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的fuzz状态监视模块（宿主机侧读取fuzzer_stats）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import glob
+import json
+import logging
+import tempfile
+import threading
+from typing import Dict, Tuple
+
+
+class FuzzStatsWatcher:
+    def __init__(self, host_output_dir: str, output_file: str, interval: float = 2.0, timeseries=None):
+        """
+        Args:
+            host_output_dir: 宿主机上AFL的输出目录（通过bind mount可见）
+            output_file: 合并后状态写入的JSON文件路径
+            interval: 轮询间隔（秒）
+            timeseries: 可选的 TimeSeriesStore，每次轮询时顺带增量读取plot_data
+        """
+        self.host_output_dir = host_output_dir
+        self.output_file = output_file
+        self.interval = interval
+        self.timeseries = timeseries
+        self._signatures: Dict[str, Tuple[float, int]] = {}
+        self._instances: Dict[str, Dict[str, str]] = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.status = {}
+
+    def start(self):
+        """启动后台轮询线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="FuzzStatsWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止轮询线程，并做最后一次刷新"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.poll_once()
+        if self.timeseries is not None:
+            self.timeseries.save()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.poll_once()
+            self._stop_event.wait(self.interval)
+
+    def poll_once(self) -> bool:
+        """检查各实例的fuzzer_stats，仅在mtime/size变化时重新解析
+        Returns:
+            bool: 状态是否发生变化并已写入文件
+        """
+        changed = False
+        for stats_file in glob.glob(os.path.join(self.host_output_dir, '*', 'fuzzer_stats')):
+            try:
+                st = os.stat(stats_file)
+            except OSError:
+                continue
+            signature = (st.st_mtime, st.st_size)
+            if self._signatures.get(stats_file) == signature:
+                continue
+            try:
+                with open(stats_file, encoding='utf-8', errors='replace') as f:
+                    stats = self.parse_stats_text(f.read())
+            except OSError as e:
+                logging.error(f"读取 {stats_file} 失败: {str(e)}")
+                continue
+            self._signatures[stats_file] = signature
+            self._instances[os.path.basename(os.path.dirname(stats_file))] = stats
+            changed = True
+
+        if self.timeseries is not None:
+            try:
+                self.timeseries.poll()
+            except Exception as e:
+                logging.error(f"读取plot_data失败: {str(e)}")
+
+        if changed:
+            self.status = self.merge_fuzzer_stats(self._instances)
+            if self.output_file:
+                self.write_json_atomic(self.output_file, self.status)
+        return changed
+
+    @staticmethod
+    def parse_stats_text(text: str) -> Dict[str, str]:
+        """解析fuzzer_stats文本为字典"""
+        stats = {}
+        for line in text.splitlines():
+            if ':' in line:
+                key, value = line.split(':', 1)
+                stats[key.strip()] = value.strip()
+        return stats
+
+    @staticmethod
+    def merge_fuzzer_stats(instances: Dict[str, Dict[str, str]]) -> dict:
+        """合并多个实例的fuzzer_stats
+        执行次数、新发现路径、崩溃数按实例求和；路径总数取最大值（各实例会同步彼此的队列）；
+        最后发现时间取最新值。兼容AFL++的新字段名（corpus_count、saved_crashes等）。
+        """
+        def as_int(stats, *keys):
+            for key in keys:
+                if key in stats:
+                    try:
+                        return int(float(stats[key]))
+                    except ValueError:
+                        pass
+            return 0
+
+        all_stats = list(instances.values())
+        if not all_stats:
+            return {}
+        status = {
+            'total_execs': str(sum(as_int(s, 'execs_done') for s in all_stats)),
+            'paths_total': str(max(as_int(s, 'paths_total', 'corpus_count') for s in all_stats)),
+            'paths_found': str(sum(as_int(s, 'paths_found', 'corpus_found') for s in all_stats)),
+            'unique_crashes': str(sum(as_int(s, 'unique_crashes', 'saved_crashes') for s in all_stats)),
+            'last_path': str(max(as_int(s, 'last_path', 'last_find') for s in all_stats)),
+            'last_crash': str(max(as_int(s, 'last_crash') for s in all_stats)),
+        }
+        # 单实例时保持原有的字段含义
+        if len(all_stats) == 1:
+            stats = all_stats[0]
+            status['last_path'] = stats.get('last_path', stats.get('last_find', 'none'))
+            status['last_crash'] = stats.get('last_crash', 'none')
+        else:
+            status['instances'] = {name: {
+                'execs_done': stats.get('execs_done', '0'),
+                'execs_per_sec': stats.get('execs_per_sec', '0'),
+                'corpus_count': stats.get('corpus_count', stats.get('paths_total', '0')),
+                'saved_crashes': stats.get('saved_crashes', stats.get('unique_crashes', '0')),
+            } for name, stats in instances.items()}
+        return status
+
+    @staticmethod
+    def write_json_atomic(output_file: str, data: dict):
+        """先写临时文件再rename，读者永远不会看到写了一半的JSON"""
+        directory = os.path.dirname(os.path.abspath(output_file))
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix='.FuzzStatus.', suffix='.tmp', dir=directory)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp_path, output_file)
+            logging.info(f"状态已写入文件: {output_file}")
+        except Exception as e:
+            logging.error(f"写入JSON文件时出错: {str(e)}")
+            if 'tmp_path' in locals() and os.path.exists(tmp_path):
+                os.remove(tmp_path)
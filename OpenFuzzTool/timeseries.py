@@ -0,0 +1,268 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的时间序列模块（增量读取plot_data，紧凑存储与统计查询）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import glob
+import struct
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+# 存储的列，均为float64；plot_data中不存在的列填0
+COLUMNS = ['time', 'corpus_count', 'map_size', 'saved_crashes', 'saved_hangs',
+           'execs_per_sec', 'total_execs', 'edges_found']
+
+# plot_data表头字段到存储列的映射（兼容AFL与AFL++的字段名）
+HEADER_ALIASES = {
+    'relative_time': 'time',
+    'unix_time': 'time',
+    'corpus_count': 'corpus_count',
+    'paths_total': 'corpus_count',
+    'map_size': 'map_size',
+    'saved_crashes': 'saved_crashes',
+    'unique_crashes': 'saved_crashes',
+    'saved_hangs': 'saved_hangs',
+    'unique_hangs': 'saved_hangs',
+    'execs_per_sec': 'execs_per_sec',
+    'total_execs': 'total_execs',
+    'edges_found': 'edges_found',
+}
+
+FILE_MAGIC = b'AFTS'
+FILE_VERSION = 1
+
+
+class TimeSeriesBuffer:
+    """按列存储的定长时间序列缓冲区
+    每列是一个 array('d')，容量写满后将较旧的一半按2:1抽稀，
+    因此最近的数据保持原始分辨率，越旧的数据越稀疏，内存占用有上限。
+    """
+
+    def __init__(self, capacity: int = 65536):
+        self.capacity = max(16, capacity)
+        self.columns: Dict[str, array] = {name: array('d') for name in COLUMNS}
+        self.t0 = 0.0
+
+    def __len__(self):
+        return len(self.columns['time'])
+
+    def append(self, row: Dict[str, float]):
+        if len(self) >= self.capacity:
+            self._downsample()
+        for name in COLUMNS:
+            self.columns[name].append(row.get(name, 0.0))
+
+    def _downsample(self):
+        """将较旧一半的数据每两点保留后一个点（计数类字段单调递增，取后一点不丢失累计值）"""
+        half = len(self) // 2
+        for name, column in self.columns.items():
+            self.columns[name] = column[1:half:2] + column[half:]
+
+    def column(self, name: str) -> array:
+        return self.columns[name]
+
+    # ---------------- 查询 ----------------
+
+    def coverage_growth_rate(self, window: float = 3600.0, field: str = 'edges_found') -> float:
+        """最近 window 秒内覆盖率（默认edges_found）的增长速率，单位：每秒"""
+        times = self.columns['time']
+        if len(times) < 2:
+            return 0.0
+        values = self.columns[field]
+        start = bisect_left(times, times[-1] - window)
+        start = min(start, len(times) - 2)
+        elapsed = times[-1] - times[start]
+        if elapsed <= 0:
+            return 0.0
+        return (values[-1] - values[start]) / elapsed
+
+    def execs_per_sec_percentiles(self, percentiles=(50, 90, 99)) -> Dict[int, float]:
+        """execs_per_sec 的分位数（最近邻插值）"""
+        values = sorted(self.columns['execs_per_sec'])
+        if not values:
+            return {p: 0.0 for p in percentiles}
+        last = len(values) - 1
+        return {p: values[min(last, max(0, int(round(p / 100.0 * last))))] for p in percentiles}
+
+    def time_to_first_crash(self) -> Optional[float]:
+        """首次出现crash相对于开始时间的秒数；saved_crashes单调递增，可二分查找"""
+        crashes = self.columns['saved_crashes']
+        index = bisect_right(crashes, 0.0)
+        if index >= len(crashes):
+            return None
+        return self.columns['time'][index] - self.t0
+
+    # ---------------- 持久化 ----------------
+
+    def save(self, path: str):
+        """以二进制列式格式写入文件：文件头 + 每列连续的float64"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            names = ','.join(COLUMNS).encode()
+            f.write(FILE_MAGIC)
+            f.write(struct.pack('<HIQdH', FILE_VERSION, self.capacity, len(self), self.t0, len(names)))
+            f.write(names)
+            for name in COLUMNS:
+                column = self.columns[name]
+                if column.itemsize != 8:
+                    raise ValueError("unexpected array itemsize")
+                column.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'TimeSeriesBuffer':
+        with open(path, 'rb') as f:
+            if f.read(4) != FILE_MAGIC:
+                raise ValueError(f"不是时间序列文件: {path}")
+            version, capacity, rows, t0, name_len = struct.unpack('<HIQdH', f.read(struct.calcsize('<HIQdH')))
+            if version != FILE_VERSION:
+                raise ValueError(f"不支持的时间序列文件版本: {version}")
+            names = f.read(name_len).decode().split(',')
+            buffer = cls(capacity)
+            buffer.t0 = t0
+            for name in names:
+                column = array('d')
+                column.fromfile(f, rows)
+                if name in buffer.columns:
+                    buffer.columns[name] = column
+        return buffer
+
+
+class PlotDataTailer:
+    """增量读取单个plot_data文件，只解析上次读取位置之后新增的完整行"""
+
+    def __init__(self, path: str, buffer: TimeSeriesBuffer):
+        self.path = path
+        self.buffer = buffer
+        self.offset = 0
+        self._partial = b''
+        self._mapping: Optional[List[Optional[str]]] = None
+        self._relative_time = True
+
+    def poll(self) -> int:
+        """读取新增行写入缓冲区，返回新增的行数"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0
+        if size < self.offset:
+            # 文件被截断（实例重新启动），从头读取
+            self.offset = 0
+            self._partial = b''
+        if size == self.offset:
+            return 0
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        self.offset += len(data)
+
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        added = 0
+        for raw in lines:
+            line = raw.decode(errors='replace').strip()
+            if not line:
+                continue
+            if line.startswith('#'):
+                fields = [field.strip() for field in line[1:].split(',')]
+                self._mapping = [HEADER_ALIASES.get(field) for field in fields]
+                self._relative_time = 'relative_time' in fields
+                continue
+            row = self._parse_row(line)
+            if row is None:
+                continue
+            if len(self.buffer) == 0 and not self._relative_time:
+                # 旧版AFL记录的是unix时间戳，以首个数据点作为起点
+                self.buffer.t0 = row.get('time', 0.0)
+            self.buffer.append(row)
+            added += 1
+        return added
+
+    def _parse_row(self, line: str) -> Optional[Dict[str, float]]:
+        if self._mapping is None:
+            return None
+        row = {}
+        for name, value in zip(self._mapping, line.split(',')):
+            if name is None:
+                continue
+            try:
+                row[name] = float(value.strip().rstrip('%'))
+            except ValueError:
+                return None
+        return row
+
+
+class TimeSeriesStore:
+    """管理一个AFL输出目录下所有实例的plot_data，并持久化到单个目录"""
+
+    def __init__(self, host_output_dir: str, store_dir: str, capacity: int = 65536):
+        """
+        Args:
+            host_output_dir: 宿主机上AFL的输出目录（包含 default/ 或 main/、secondaryNN/ 子目录）
+            store_dir: 时间序列文件的保存目录，每个实例一个 <实例名>.afts 文件
+            capacity: 每个实例缓冲区的最大行数
+        """
+        self.host_output_dir = host_output_dir
+        self.store_dir = store_dir
+        self.capacity = capacity
+        self.buffers: Dict[str, TimeSeriesBuffer] = {}
+        self._tailers: Dict[str, PlotDataTailer] = {}
+
+    def poll(self) -> int:
+        """读取所有实例新增的plot_data行，返回新增的总行数"""
+        added = 0
+        for plot_file in glob.glob(os.path.join(self.host_output_dir, '*', 'plot_data')):
+            instance = os.path.basename(os.path.dirname(plot_file))
+            tailer = self._tailers.get(instance)
+            if tailer is None:
+                buffer = self.buffers.setdefault(instance, TimeSeriesBuffer(self.capacity))
+                tailer = self._tailers[instance] = PlotDataTailer(plot_file, buffer)
+            added += tailer.poll()
+        return added
+
+    def save(self):
+        os.makedirs(self.store_dir, exist_ok=True)
+        for instance, buffer in self.buffers.items():
+            try:
+                buffer.save(os.path.join(self.store_dir, f"{instance}.afts"))
+            except Exception as e:
+                logging.error(f"保存时间序列失败 {instance}: {str(e)}")
+
+    @classmethod
+    def load(cls, store_dir: str) -> 'TimeSeriesStore':
+        store = cls(host_output_dir='', store_dir=store_dir)
+        for path in glob.glob(os.path.join(store_dir, '*.afts')):
+            instance = os.path.splitext(os.path.basename(path))[0]
+            try:
+                store.buffers[instance] = TimeSeriesBuffer.load(path)
+            except Exception as e:
+                logging.error(f"读取时间序列失败 {path}: {str(e)}")
+        return store
+
+    def summary(self, window: float = 3600.0) -> dict:
+        """汇总所有实例的统计指标"""
+        instances = {}
+        for instance, buffer in self.buffers.items():
+            instances[instance] = {
+                'rows': len(buffer),
+                'coverage_growth_rate': buffer.coverage_growth_rate(window),
+                'execs_per_sec_percentiles': buffer.execs_per_sec_percentiles(),
+                'time_to_first_crash': buffer.time_to_first_crash(),
+            }
+        crash_times = [info['time_to_first_crash'] for info in instances.values()
+                       if info['time_to_first_crash'] is not None]
+        return {
+            'time_to_first_crash': min(crash_times) if crash_times else None,
+            'instances': instances,
+        }
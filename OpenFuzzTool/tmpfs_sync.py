@@ -0,0 +1,186 @@
+"""
+ /≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡\
+ |✨            CyberPunk Code Annotation v2.0            ✨|
+ \≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡≡/
+
+(ﾉ>ω<)ﾉ 作者: liyong @ 2025-02-25-00:49
+ヽ(>▽<)ノ 作者:  @
+🛸 模块功能：自动Fuzz测试引擎的内存工作目录模块（AFL输出目录放在容器tmpfs中，定期增量同步到工作目录）
+🔥!! 此代码可能召唤电子恶魔！！
+🔥!! 运行前请准备三只烤鸡腿作为祭品！！
+"""
+
+import os
+import re
+import time
+import shutil
+import logging
+import threading
+from typing import Dict, Optional
+
+# 容器内tmpfs挂载点，AFL输出目录和 AFL_TMPDIR 都在其下
+TMPFS_MOUNT = '/fuzzram'
+RAM_OUTPUT_DIR = f'{TMPFS_MOUNT}/output'
+RAM_TMP_DIR = f'{TMPFS_MOUNT}/tmp'
+# tmpfs使用率超过该比例时告警（写满后afl-fuzz会因无法写入队列而退出）
+USAGE_WARN_RATIO = 0.9
+# 工作目录中的同步暂存目录，文件先解包到这里，再在宿主机侧逐个rename到输出目录
+STAGING_NAME = '.tmpfs_staging'
+# 语料交换注入的伪实例目录，需要从工作目录推送到tmpfs
+PUSH_DIRS = ('corpus_pool',)
+
+# 拉取：打包上次同步之后修改过的文件（跳过afl-fuzz的临时文件），解包到工作目录的暂存目录。
+# 先记录本轮的时间戳再查找，打包期间被修改的文件下一轮会再次同步；tar的 "file changed" 不视为失败
+PULL_SCRIPT = r'''
+RAM={ram}; STAGE={stage}; MARK={mount}/.sync_mark; NEXT={mount}/.sync_next
+mkdir -p "$STAGE" "$RAM"
+touch "$NEXT"
+NEWER=""
+[ -f "$MARK" ] && NEWER="-newer $MARK"
+cd "$RAM" && find . $NEWER -type f ! -name '.cur_input*' ! -name '.fuzzer_stats_tmp' {excludes} -print0 \
+    | tar --null -T - -cf - 2>/dev/null | tar -xf - -C "$STAGE"
+mv "$NEXT" "$MARK"
+'''
+
+# 推送：把工作目录中语料交换注入的新样本复制到tmpfs（先写临时文件再rename，afl-fuzz不会读到半个文件）
+PUSH_SCRIPT = r'''
+if [ -d {host}/{name} ]; then
+    mkdir -p {ram}/{name}/queue
+    [ -f {host}/{name}/is_main_node ] && touch {ram}/{name}/is_main_node
+    for f in {host}/{name}/queue/*; do
+        [ -f "$f" ] || continue
+        dst={ram}/{name}/queue/"${{f##*/}}"
+        [ -e "$dst" ] || {{ cp "$f" {ram}/{name}/.push_tmp && mv {ram}/{name}/.push_tmp "$dst"; }}
+    done
+fi
+'''
+
+USAGE_SCRIPT = f"df -k {TMPFS_MOUNT} | tail -n 1"
+
+
+def size_to_mb(size: str) -> int:
+    """解析 tmpfs 大小（如 512m、2g、1048576），返回MB"""
+    match = re.fullmatch(r'(\d+)\s*([kmg]?)b?', str(size).strip().lower())
+    if not match:
+        raise ValueError(f"无效的tmpfs大小: {size}")
+    value, unit = int(match.group(1)), match.group(2)
+    return {'': value // (1024 * 1024), 'k': value // 1024, 'm': value, 'g': value * 1024}[unit]
+
+
+class TmpfsSyncer:
+    def __init__(self, container, host_output_dir: str, container_output_dir: str = '/tmp/output',
+                 interval: float = 30.0):
+        """
+        Args:
+            container: 命令执行后端，容器需要以 tmpfs={TMPFS_MOUNT: 'size=...'} 启动
+            host_output_dir: 宿主机上的持久化输出目录（stats监视、崩溃分诊、检查点都读取这里）
+            container_output_dir: 持久化输出目录在容器内的路径（bind mount）
+            interval: 同步周期（秒）
+        """
+        self.container = container
+        self.host_output_dir = host_output_dir
+        self.container_output_dir = container_output_dir.rstrip('/')
+        self.interval = interval
+        self.host_staging = os.path.join(os.path.dirname(os.path.abspath(host_output_dir)), STAGING_NAME)
+        self.container_staging = f"{os.path.dirname(self.container_output_dir)}/{STAGING_NAME}"
+        self.stats = {'syncs': 0, 'files': 0, 'bytes': 0, 'failures': 0, 'last_sync_seconds': 0.0,
+                      'usage_kb': 0, 'size_kb': 0, 'peak_usage_kb': 0}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _exec(self, script: str):
+        exit_code, output = self.container.exec_run(['sh', '-c', script], workdir='/tmp')
+        return exit_code, output.decode(errors='replace') if output else ''
+
+    def prepare(self) -> bool:
+        """创建tmpfs中的目录；工作目录中已有AFL状态（续跑、语料交换目录）时先复制到tmpfs"""
+        script = f"mkdir -p {RAM_OUTPUT_DIR} {RAM_TMP_DIR}"
+        if os.path.isdir(self.host_output_dir) and os.listdir(self.host_output_dir):
+            script += f" && cp -a {self.container_output_dir}/. {RAM_OUTPUT_DIR}/"
+        # 已经在工作目录中的文件不需要再同步回来
+        script += f" && touch {TMPFS_MOUNT}/.sync_mark"
+        exit_code, output = self._exec(script)
+        if exit_code not in (0, None):
+            logging.error(f"初始化tmpfs工作目录失败: {output}")
+            return False
+        self._update_usage()
+        logging.info(f"AFL输出目录位于容器tmpfs {RAM_OUTPUT_DIR}，容量 {self.stats['size_kb'] // 1024} MB")
+        return True
+
+    def _update_usage(self):
+        exit_code, output = self._exec(USAGE_SCRIPT)
+        fields = output.split()
+        if len(fields) < 4 or not fields[1].isdigit():
+            return
+        size_kb, used_kb = int(fields[1]), int(fields[2])
+        self.stats.update(size_kb=size_kb, usage_kb=used_kb, peak_usage_kb=max(self.stats['peak_usage_kb'], used_kb))
+        if size_kb and used_kb > size_kb * USAGE_WARN_RATIO:
+            logging.warning(f"tmpfs使用率 {used_kb * 100 // size_kb}%（{used_kb // 1024}/{size_kb // 1024} MB），"
+                            f"写满后afl-fuzz将无法保存新样本")
+
+    def _move_staged(self):
+        """在宿主机侧把暂存目录中的文件逐个rename到输出目录，读取方不会看到写了一半的文件"""
+        files, total = 0, 0
+        for root, dirs, names in os.walk(self.host_staging):
+            rel_root = os.path.relpath(root, self.host_staging)
+            target_root = os.path.normpath(os.path.join(self.host_output_dir, rel_root))
+            for name in names:
+                src = os.path.join(root, name)
+                try:
+                    total += os.lstat(src).st_size
+                    os.makedirs(target_root, exist_ok=True)
+                    os.replace(src, os.path.join(target_root, name))
+                    files += 1
+                except OSError as e:
+                    logging.warning(f"同步文件失败 {src}: {e}")
+        shutil.rmtree(self.host_staging, ignore_errors=True)
+        return files, total
+
+    def sync_once(self) -> Dict:
+        """一轮同步：拉取tmpfs中新增/修改的文件，推送语料交换的注入样本，更新tmpfs使用量"""
+        with self._lock:
+            start = time.time()
+            excludes = ' '.join(f"! -path './{name}/*'" for name in PUSH_DIRS)
+            script = PULL_SCRIPT.format(ram=RAM_OUTPUT_DIR, stage=self.container_staging, mount=TMPFS_MOUNT,
+                                        excludes=excludes)
+            for name in PUSH_DIRS:
+                script += PUSH_SCRIPT.format(host=self.container_output_dir, ram=RAM_OUTPUT_DIR, name=name)
+            exit_code, output = self._exec(script)
+            if exit_code not in (0, None):
+                self.stats['failures'] += 1
+                logging.error(f"tmpfs同步失败（退出码 {exit_code}）: {output[-500:]}")
+            files, total = self._move_staged()
+            self._update_usage()
+            self.stats['syncs'] += 1
+            self.stats['files'] += files
+            self.stats['bytes'] += total
+            self.stats['last_sync_seconds'] = round(time.time() - start, 3)
+            return {'files': files, 'bytes': total}
+
+    def start(self):
+        def run():
+            while not self._stop_event.wait(self.interval):
+                try:
+                    self.sync_once()
+                except Exception as e:
+                    logging.error(f"tmpfs同步失败: {str(e)}")
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name="TmpfsSyncer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Optional[Dict]:
+        """停止周期同步并做最后一次完整同步（必须在容器销毁前调用）"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            result = self.sync_once()
+        except Exception as e:
+            logging.error(f"tmpfs最终同步失败: {str(e)}")
+            return None
+        logging.info(f"tmpfs最终同步 {result['files']} 个文件（{result['bytes']} 字节），"
+                     f"峰值使用 {self.stats['peak_usage_kb'] // 1024} MB")
+        return result
@@ -12,15 +12,38 @@
 
 import argparse
 import os
+import json
+import time
+import signal
+import logging
+from functools import partial
+from contextlib import nullcontext
 from OpenFuzzTool.config import ConfigLoader
 from OpenFuzzTool.preprocessor import FilePreprocessor
-from OpenFuzzTool.docker_manager import DockerManager
+from OpenFuzzTool.docker_manager import DockerManager, ContainerPool
 from OpenFuzzTool.build import BuildExecutor
+from OpenFuzzTool.artifacts import ArtifactIndexer
+from OpenFuzzTool.build_cache import BuildCache
+from OpenFuzzTool.compiler_cache import CompilerCache
+from OpenFuzzTool.extract_cache import ExtractCache, file_sha256
+from OpenFuzzTool.minimizer import CorpusMinimizer
+from OpenFuzzTool.seed_corpus import SeedCorpus
+from OpenFuzzTool.calibration import TargetCalibrator
+from OpenFuzzTool.tmpfs_sync import TmpfsSyncer, TMPFS_MOUNT, RAM_OUTPUT_DIR, RAM_TMP_DIR, size_to_mb
+from OpenFuzzTool.campaign import CampaignStore
+from OpenFuzzTool.corpus_sync import CorpusExchange
 from OpenFuzzTool.fuzzer import AFLRunner
-from OpenFuzzTool.analyzer import ResultAnalyzer, ReportGenerator
+from OpenFuzzTool.timeseries import TimeSeriesStore
+from OpenFuzzTool.analyzer import ResultAnalyzer, ReportGenerator, CrashTriager
+from OpenFuzzTool.crash_db import CrashDatabase
+from OpenFuzzTool.scheduler import BatchScheduler
+from OpenFuzzTool.profiler import Profiler
 
 
-def AutoFuzzMain(config_path):
+def AutoFuzzMain(config_path, scheduler=None, pool=None, build_cache=None, compiler_cache=None,
+                 extract_cache=None, crash_db=None, minimize_cache=None, seed_corpus=None, campaigns=None,
+                 corpus_exchange=None, backend='docker', agent=False, headless=False, tmpfs_interval=0,
+                 tmpfs_size='1g'):
     # 获取当前文件的绝对路径
     current_file_path = os.path.abspath(__file__)
     # 获取当前文件所在的目录
@@ -34,32 +57,287 @@ def AutoFuzzMain(config_path):
     loader.generate_config(config_path)
     fuzzconfig = loader
     bind_mount = {f'{fuzzconfig.currentworkpath}': '/tmp'}
-    docker_mgr = DockerManager(fuzzconfig.container_name,bind_mount)
+    #内存工作目录：AFL输出目录放在容器tmpfs中，按 tmpfs_interval 周期同步回工作目录
+    tmpfs = None
+    if tmpfs_interval > 0 and backend == 'local':
+        logging.warning("local后端没有容器tmpfs，AFL输出目录直接写入工作目录")
+        tmpfs_interval = 0
+    if tmpfs_interval > 0:
+        tmpfs_size = fuzzconfig.tmpfs_size or tmpfs_size
+        # 无效的大小在创建容器前报错，批量调度也按它记账内存
+        size_to_mb(tmpfs_size)
+        tmpfs = {TMPFS_MOUNT: f'size={tmpfs_size},mode=1777'}
+    docker_mgr = DockerManager(fuzzconfig.container_name,bind_mount,pool,backend,agent,tmpfs)
 
+    #阶段耗时统计：结束后导出 Profile.trace.json（Chrome trace）和 Profile.prom（Prometheus文本）
+    profiler = Profiler(fuzzconfig.container_name)
+    try:
+        with profiler.span('task', program=fuzzconfig.program_name):
+            summary = _run_pipeline(fuzzconfig, processor, docker_mgr, bind_mount, profiler, scheduler,
+                                    build_cache, compiler_cache, extract_cache, crash_db, minimize_cache,
+                                    seed_corpus, campaigns, corpus_exchange, backend, headless,
+                                    tmpfs_interval, tmpfs_size)
+    finally:
+        _record_exec_counters(profiler, docker_mgr)
+        try:
+            profile_paths = profiler.export(str(fuzzconfig.currentworkpath))
+        except OSError as e:
+            logging.error(f"导出阶段耗时统计失败: {str(e)}")
+            profile_paths = None
+    if profile_paths is not None:
+        summary['profile'] = dict(profile_paths, stage_seconds=profiler.stage_seconds(),
+                                  counters=dict(profiler.counters))
+        with open(fuzzconfig.currentworkpath.joinpath("TaskSummary.json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=4, ensure_ascii=False)
+    return summary
+
+
+def _record_exec_counters(profiler, docker_mgr):
+    """执行后端在 stop_docker 后会被释放，需要在此之前读取计数"""
+    executor = docker_mgr.containerid
+    if executor is not None:
+        profiler.set('exec_calls', executor.calls)
+        profiler.set('agent_requests', getattr(executor, 'requests', 0))
+
+
+def _run_pipeline(fuzzconfig, processor, docker_mgr, bind_mount, profiler, scheduler, build_cache, compiler_cache,
+                  extract_cache, crash_db, minimize_cache, seed_corpus, campaigns, corpus_exchange, backend, headless,
+                  tmpfs_interval=0, tmpfs_size='1g'):
+    """AutoFuzzMain 的各个阶段，每个阶段记录一个span"""
     #清理工作目录
-    processor.clean_workspace(fuzzconfig.currentworkpath)
+    with profiler.span('clean'):
+        processor.clean_workspace(fuzzconfig.currentworkpath)
 
     #解压文件
-    processor.decompressionALL(fuzzconfig.UpladFile,fuzzconfig.extractdir)
-    processor.copy_files_to_workspace(fuzzconfig.extractdir,fuzzconfig.currentworkpath)
+    with profiler.span('extract', cached=extract_cache is not None):
+        if extract_cache is not None:
+            #解压缓存：同一压缩包只解压一次，之后用硬链接/reflink生成工作目录
+            workspace = extract_cache.materialize(fuzzconfig.UpladFile,str(fuzzconfig.currentworkpath),
+                                                  processor.extract_to_workspace)
+        else:
+            workspace = processor.extract_to_workspace(fuzzconfig.UpladFile,str(fuzzconfig.currentworkpath))
+    if workspace is None:
+        raise Exception("解压失败！")
+    #解压缓存命中时没有调用解压函数，计数为0
+    profiler.set('bytes_extracted', processor.bytes_extracted)
+
+    #编译缓存：按编译器/插桩设置挂载持久化的ccache目录
+    if compiler_cache is not None and backend == 'local':
+        logging.warning("local后端使用宿主机编译器，不启用容器ccache")
+        compiler_cache = None
+    if compiler_cache is not None:
+        ccache_dir = compiler_cache.variant_dir(fuzzconfig.default_compiler, docker_mgr.image_digest(),
+                                                {'CC_module': fuzzconfig.afl_fuzz_args.get('CC_module', ''),
+                                                 'CXX_module': fuzzconfig.afl_fuzz_args.get('CXX_module', '')})
+        bind_mount[ccache_dir] = compiler_cache.CONTAINER_DIR
 
     #创建docker
-    docker_mgr.CreateAFLDocker()
+    with profiler.span('container_create', backend=backend):
+        docker_mgr.CreateAFLDocker()
 
     buildexe = BuildExecutor()
+    #构建前记录工作目录快照，构建后只解析新增/修改的文件
+    indexer = ArtifactIndexer(str(fuzzconfig.currentworkpath))
+    with profiler.span('snapshot'):
+        indexer.take_snapshot()
 
-    buildexe.inital_build(docker_mgr.containerid)
-    IsBuildSuccess = buildexe.check_buildsuccess(docker_mgr.containerid,fuzzconfig.currentworkpath,fuzzconfig.executable)
+    #批量模式下由调度器限制同时构建的任务数，单任务模式不做限制
+    with (scheduler.build_slot() if scheduler else nullcontext()):
+        with profiler.span('build', cached=build_cache is not None):
+            if build_cache is not None:
+                #构建缓存：源码、Build.sh、编译器设置和镜像都没变时直接恢复上次的构建产物
+                cache_key = build_cache.compute_key(str(fuzzconfig.currentworkpath), fuzzconfig.default_compiler,
+                                                    docker_mgr.image_digest(),
+                                                    {'CC_module': fuzzconfig.afl_fuzz_args.get('CC_module', ''),
+                                                     'CXX_module': fuzzconfig.afl_fuzz_args.get('CXX_module', '')})
+                buildexe.cached_build(docker_mgr.containerid, str(fuzzconfig.currentworkpath), build_cache, cache_key,
+                                      compiler_cache, indexer.before)
+            else:
+                buildexe.inital_build(docker_mgr.containerid, compiler_cache)
+    with profiler.span('artifact_detect'):
+        IsBuildSuccess = buildexe.check_buildsuccess(docker_mgr.containerid,str(fuzzconfig.currentworkpath),fuzzconfig.executable,indexer)
+    profiler.set('files_walked', indexer.files_walked)
     if IsBuildSuccess == None :
+        _record_exec_counters(profiler, docker_mgr)
+        with profiler.span('teardown'):
+            docker_mgr.stop_docker()
         raise Exception("构建失败！")
     fuzzconfig.updatebin_cmd(buildexe.binpath,bind_mount)
 
-    aflrunner = AFLRunner(fuzzconfig.bin_cmd,fuzzconfig.fuzz_time,str(fuzzconfig.currentworkpath.joinpath("FuzzStatus.json")))
-    aflrunner.start_fuzzing(docker_mgr.containerid)
+    binary_hash = file_sha256(buildexe.binpath)
+    minimizer = CorpusMinimizer(docker_mgr.containerid, fuzzconfig.bin_cmd,
+                                lambda path: fuzzconfig.convert_path(path, bind_mount, to_docker=True),
+                                minimize_cache or str(fuzzconfig.currentworkpath.joinpath("minimize", "cache")),
+                                binary_hash, max_workers=fuzzconfig.triage_workers)
+
+    #种子准备：去重、丢弃过大的种子，用新构建的目标做afl-cmin精简，结果按 (种子集合, 二进制) 缓存
+    fuzz_input_dir = './input'
+    seed_stats = None
+    if seed_corpus is not None:
+        with profiler.span('seed_prep'):
+            seed_stats = seed_corpus.prepare(str(fuzzconfig.currentworkpath.joinpath("input")),
+                                             str(fuzzconfig.currentworkpath.joinpath("seeds")), binary_hash,
+                                             minimizer.cmin, fuzzconfig.seed_max_size)
+        fuzz_input_dir = './seeds'
+
+    #目标校准：探测插桩map大小、persistent/deferred模式和单次执行耗时，生成 -t 和 AFL_MAP_SIZE（-m 仅在配置时使用）
+    calibrator = TargetCalibrator(docker_mgr.containerid, fuzzconfig.bin_cmd,
+                                  lambda path: fuzzconfig.convert_path(path, bind_mount, to_docker=True),
+                                  memory_limit=fuzzconfig.memory_limit)
+    with profiler.span('calibrate'):
+        calibration = calibrator.calibrate(buildexe.binpath,
+                                           str(fuzzconfig.currentworkpath.joinpath(fuzz_input_dir)),
+                                           buildexe.artifact)
+    if 'timeout_ms' in calibration:
+        minimizer.exec_timeout = calibration['timeout_ms']
+
+    #崩溃分诊：优先使用sanitizer构建回放崩溃样本，fuzz期间增量处理新样本
+    triage_cmd = fuzzconfig.bin_cmd
+    if fuzzconfig.sanitizer_cmd:
+        sanitizer_target = indexer.select_target(fuzzconfig.sanitizer_cmd.split()[0])
+        if sanitizer_target:
+            triage_cmd = fuzzconfig.convert_cmd(sanitizer_target['path'],fuzzconfig.sanitizer_cmd,bind_mount)
+        else:
+            logging.warning(f"未找到sanitizer构建 {fuzzconfig.sanitizer_cmd}，使用fuzz目标回放崩溃样本")
+    output_dir = str(fuzzconfig.currentworkpath.joinpath("output"))
+    #崩溃数据库：跨运行去重，已分诊过的样本内容不再回放
+    run_id = crash_db.start_run(fuzzconfig.program_name, str(fuzzconfig.currentworkpath)) if crash_db else None
+    triager = CrashTriager(docker_mgr.containerid, triage_cmd,
+                           lambda path: fuzzconfig.convert_path(path, bind_mount, to_docker=True),
+                           str(fuzzconfig.currentworkpath.joinpath("triage")), max_workers=fuzzconfig.triage_workers,
+                           crash_db=crash_db, program=fuzzconfig.program_name, run_id=run_id)
+
+    #断点续跑：同一程序+源码的campaign从上次保存的AFL输出目录继续
+    campaign_id = None
+    resumed = False
+    if campaigns is not None:
+        source_hash = extract_cache.archive_hash(fuzzconfig.UpladFile) if extract_cache else file_sha256(fuzzconfig.UpladFile)
+        campaign_id = campaigns.campaign_id(fuzzconfig.program_name, source_hash, fuzzconfig.bin_cmd)
+        with profiler.span('campaign_restore'):
+            resumed = campaigns.restore(campaign_id, output_dir)
+
+    status_file = str(fuzzconfig.currentworkpath.joinpath("FuzzStatus.json"))
+    extra_env = {}
+    if corpus_exchange is not None:
+        extra_env['AFL_SYNC_TIME'] = '1'
+    syncer = None
+    if tmpfs_interval > 0:
+        #afl-fuzz写tmpfs中的输出目录，监视、分诊、检查点仍读取工作目录中的同步副本
+        syncer = TmpfsSyncer(docker_mgr.containerid, output_dir, interval=tmpfs_interval)
+        extra_env['AFL_TMPDIR'] = RAM_TMP_DIR
+    aflrunner = AFLRunner(fuzzconfig.bin_cmd,fuzzconfig.fuzz_time,status_file,fuzzconfig.fuzz_parallel,
+                          input_dir=fuzz_input_dir, resume=campaigns is not None, extra_env=extra_env or None,
+                          headless=headless, profile=calibration,
+                          output_dir=RAM_OUTPUT_DIR if syncer is not None else './output')
+    #语料交换：同一程序的其他campaign发现的队列样本在运行中注入本campaign的同步目录
+    if corpus_exchange is not None:
+        corpus_exchange.register(fuzzconfig.program_name, fuzzconfig.container_name, output_dir)
+    #续跑恢复的AFL状态和语料交换目录都在工作目录中，先复制到tmpfs
+    if syncer is not None and not syncer.prepare():
+        logging.warning("tmpfs初始化失败，AFL输出目录直接写入工作目录")
+        syncer = None
+        aflrunner.output_dir = './output'
+        aflrunner.extra_env.pop('AFL_TMPDIR', None)
+
+    #tmpfs占用宿主机内存，按任务自己的容量（任务json的 tmpfs_size 优先）申请
+    fuzz_memory_mb = size_to_mb(tmpfs_size) if syncer is not None else 0
+    with (scheduler.fuzz_slot(fuzzconfig.fuzz_parallel, fuzz_memory_mb) if scheduler else nullcontext()):
+        triager.start_watching(output_dir)
+        checkpoint_stop = campaigns.start_periodic(campaign_id, output_dir) if campaigns is not None else None
+        if syncer is not None:
+            syncer.start()
+        fuzz_start = time.time()
+        try:
+            with profiler.span('fuzz', parallel=fuzzconfig.fuzz_parallel, fuzz_time=fuzzconfig.fuzz_time):
+                fuzz_success = aflrunner.start_fuzzing(docker_mgr.containerid)
+        finally:
+            if checkpoint_stop is not None:
+                checkpoint_stop.set()
+            #最后一次同步必须在检查点、分诊之前完成，它们只读取工作目录
+            if syncer is not None:
+                with profiler.span('tmpfs_flush'):
+                    syncer.stop()
+                profiler.set('tmpfs_synced_files', syncer.stats['files'])
+                profiler.set('tmpfs_synced_bytes', syncer.stats['bytes'])
+            if corpus_exchange is not None:
+                corpus_exchange.unregister(fuzzconfig.program_name, fuzzconfig.container_name)
+            if campaigns is not None:
+                with profiler.span('checkpoint'):
+                    campaigns.checkpoint(campaign_id, output_dir, time.time() - fuzz_start, finished=True)
+            #fuzz期间的增量分诊与fuzz重叠，这里只统计收尾的最后一轮
+            with profiler.span('triage'):
+                triager.stop_watching(output_dir)
+            profiler.set('crashes_triaged', triager.replayed)
+            profiler.set('known_inputs_skipped', triager.skipped)
+            if crash_db is not None:
+                crash_db.finish_run(run_id)
 
-    buildexe.inital_env(docker_mgr.containerid)
+    #样本精简：afl-cmin多线程去重后并行afl-tmin，结果按输入哈希缓存
+    minimize_stats = None
+    if minimize_cache is not None:
+        with profiler.span('minimize'):
+            minimize_stats = minimizer.run(output_dir, str(fuzzconfig.currentworkpath.joinpath("minimize")))
 
-    docker_mgr.stop_docker()
+    _record_exec_counters(profiler, docker_mgr)
+    with profiler.span('teardown'):
+        buildexe.inital_env(docker_mgr.containerid)
+        docker_mgr.stop_docker()
+
+    crash_summary = None
+    if crash_db is not None:
+        crash_summary = dict(crash_db.bug_summary(fuzzconfig.program_name), run_id=run_id,
+                             skipped_known_inputs=triager.skipped,
+                             new_bugs=[bug['bug_id'] for bug in crash_db.new_bugs(fuzzconfig.program_name, run_id)])
+
+    campaign_info = None
+    if campaigns is not None:
+        campaign_info = dict(campaigns.info(campaign_id), resumed=resumed, preempted=aflrunner.stopped)
+
+    tmpfs_info = None
+    if syncer is not None:
+        tmpfs_info = dict(syncer.stats, size=tmpfs_size, interval=tmpfs_interval)
+
+    return write_task_summary(fuzzconfig, buildexe, status_file, fuzz_success, crash_summary, minimize_stats,
+                              seed_stats, campaign_info, calibration, tmpfs_info, aflrunner.timeseries_dir)
+
+
+def write_task_summary(fuzzconfig, buildexe, status_file, fuzz_success, crash_summary=None, minimize_stats=None,
+                       seed_stats=None, campaign_info=None, calibration=None, tmpfs_info=None,
+                       timeseries_dir=None):
+    """生成单个任务的汇总信息并写入工作目录下的 TaskSummary.json"""
+    fuzz_status = {}
+    if os.path.exists(status_file):
+        with open(status_file, encoding='utf-8') as f:
+            fuzz_status = json.load(f)
+    summary = {
+        'program_name': fuzzconfig.program_name,
+        'workpath': str(fuzzconfig.currentworkpath),
+        'status': 'success' if fuzz_success else 'failed',
+        'fuzz_time': fuzzconfig.fuzz_time,
+        'fuzz_parallel': fuzzconfig.fuzz_parallel,
+        'build_cache_hit': buildexe.cache_hit,
+        'compiler_cache': buildexe.compiler_cache_stats,
+        'fuzz_status': fuzz_status,
+    }
+    if crash_summary is not None:
+        summary['crash_db'] = crash_summary
+    if minimize_stats is not None:
+        summary['minimize'] = minimize_stats
+    if seed_stats is not None:
+        summary['seed_corpus'] = seed_stats
+    if campaign_info is not None:
+        summary['campaign'] = campaign_info
+    if calibration is not None:
+        # 与 fuzz_status 中的 execs_per_sec 对照，评估校准参数的效果
+        summary['calibration'] = calibration
+    if tmpfs_info is not None:
+        summary['tmpfs'] = tmpfs_info
+    if timeseries_dir and os.path.isdir(timeseries_dir):
+        #fuzz期间记录的时间序列：覆盖率增长、执行速度分位数、首个崩溃时间
+        summary['timeseries'] = TimeSeriesStore.load(timeseries_dir).summary()
+    with open(fuzzconfig.currentworkpath.joinpath("TaskSummary.json"), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=4, ensure_ascii=False)
+    return summary
     
 
 
@@ -76,13 +354,127 @@ if __name__ == '__main__':
                         help='调用 analyze_fuzz_results 函数分析fuzz结果',
                         action='store_true', default=False)
 
+    parser.add_argument('-batch',
+                        help='批量模式：任务JSON所在目录或JSON文件列表',
+                        nargs='+', default=None)
+
+    parser.add_argument('-workers',
+                        help='批量模式的并发任务数，缺省按CPU核数和可用内存计算',
+                        type=int, default=None)
+
+    parser.add_argument('-pool',
+                        help='批量模式下预热的AFL++容器数量，0表示每个任务新建容器',
+                        type=int, default=0)
+
+    parser.add_argument('-buildcache',
+                        help='启用构建产物缓存，参数为缓存大小上限（GB）',
+                        type=float, default=0)
+
+    parser.add_argument('-ccache',
+                        help='启用容器内构建的持久化ccache，参数为每种编译设置的缓存上限（如 5G），AFL++镜像中需要预装ccache',
+                        type=str, default=None)
+
+    parser.add_argument('-extractcache',
+                        help='启用解压缓存，相同压缩包直接用硬链接/reflink生成工作目录',
+                        action='store_true', default=False)
+
+    parser.add_argument('-crashdb',
+                        help='启用崩溃数据库，跨运行按调用栈哈希去重（FuzzWorkDir/CrashDB.sqlite3）',
+                        action='store_true', default=False)
+
+    parser.add_argument('-minimize',
+                        help='fuzz结束后用afl-cmin/afl-tmin精简崩溃样本和队列（结果缓存在FuzzWorkDir/.min_cache）',
+                        action='store_true', default=False)
+
+    parser.add_argument('-seedprep',
+                        help='fuzz前准备种子：去重、大小限制、afl-cmin精简（结果缓存在FuzzWorkDir/.seed_cache）',
+                        action='store_true', default=False)
+
+    parser.add_argument('-resume',
+                        help='启用断点续跑：按程序和源码哈希保存AFL状态，参数为检查点间隔（秒），0表示只在结束时保存',
+                        type=int, default=None)
+
+    parser.add_argument('-corpussync',
+                        help='启用同一程序多个campaign之间的语料交换，参数为交换周期（秒）',
+                        type=float, default=0)
+
+    parser.add_argument('-backend',
+                        help='命令执行后端：docker 在AFL++容器内执行，local 使用宿主机安装的AFL++（无需Docker）',
+                        choices=['docker', 'local'], default='docker')
+
+    parser.add_argument('-agent',
+                        help='docker后端下启用容器内常驻代理，命令经unix socket执行而不是每条命令一次docker exec',
+                        action='store_true', default=False)
+
+    parser.add_argument('-headless',
+                        help='无界面fuzz（AFL_NO_UI），输出写入 logs/ 下的压缩轮转日志，内存只保留最近的行',
+                        action='store_true', default=False)
+
+    parser.add_argument('-tmpfs',
+                        help='AFL输出目录放在容器tmpfs中，参数为同步回工作目录的周期（秒），0表示不启用',
+                        type=float, default=0)
+
+    parser.add_argument('-tmpfssize',
+                        help='每个任务的tmpfs容量（如 512m、2g），任务json中的 tmpfs_size 优先',
+                        type=str, default='1g')
+
     args = parser.parse_args()
 
-    if args.jsonfile:
+    fuzz_work_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'FuzzWorkDir')
+    build_cache = None
+    if args.buildcache > 0:
+        build_cache = BuildCache(os.path.join(fuzz_work_dir, '.build_cache'), int(args.buildcache * 1024 ** 3))
+    compiler_cache = None
+    if args.ccache:
+        compiler_cache = CompilerCache(os.path.join(fuzz_work_dir, '.ccache'), args.ccache)
+    extract_cache = None
+    if args.extractcache:
+        extract_cache = ExtractCache(os.path.join(fuzz_work_dir, '.extract_cache'))
+    crash_db = None
+    if args.crashdb:
+        os.makedirs(fuzz_work_dir, exist_ok=True)
+        crash_db = CrashDatabase(os.path.join(fuzz_work_dir, 'CrashDB.sqlite3'))
+    minimize_cache = os.path.join(fuzz_work_dir, '.min_cache') if args.minimize else None
+    seed_corpus = SeedCorpus(os.path.join(fuzz_work_dir, '.seed_cache')) if args.seedprep else None
+    campaigns = None
+    if args.resume is not None:
+        campaigns = CampaignStore(os.path.join(fuzz_work_dir, '.campaigns'), args.resume)
+        # 被抢占（SIGTERM）时让afl-fuzz正常退出并保存检查点，下次运行继续
+        signal.signal(signal.SIGTERM, lambda signum, frame: AFLRunner.stop_all())
+
+    corpus_exchange = None
+    if args.corpussync > 0:
+        corpus_exchange = CorpusExchange(os.path.join(fuzz_work_dir, '.corpus_pool'), args.corpussync)
+        corpus_exchange.start()
+
+    if args.batch:
+        pool = None
+        if args.pool > 0 and args.backend == 'docker':
+            pool = ContainerPool(fuzz_work_dir, size=args.pool)
+            pool.warm_up()
+        try:
+            scheduler = BatchScheduler(partial(AutoFuzzMain, pool=pool, build_cache=build_cache,
+                                               compiler_cache=compiler_cache, extract_cache=extract_cache,
+                                               crash_db=crash_db, minimize_cache=minimize_cache,
+                                               seed_corpus=seed_corpus, campaigns=campaigns,
+                                               corpus_exchange=corpus_exchange, backend=args.backend,
+                                               agent=args.agent, headless=args.headless,
+                                               tmpfs_interval=args.tmpfs, tmpfs_size=args.tmpfssize),
+                                       max_workers=args.workers)
+            task_files = scheduler.collect_task_files(args.batch)
+            scheduler.run(task_files, os.path.join(fuzz_work_dir, 'BatchSummary.json'))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    elif args.jsonfile:
         if args.analyze:
             # 调用 analyze_fuzz_results 函数分析fuzz结果
             analyze_fuzz_results(args.jsonfile)
             pass
 
         # 调用 AutoFuzzMain 函数，自动化Fuuzz
-        AutoFuzzMain(args.jsonfile)
\ No newline at end of file
+        AutoFuzzMain(args.jsonfile, build_cache=build_cache, compiler_cache=compiler_cache,
+                     extract_cache=extract_cache, crash_db=crash_db, minimize_cache=minimize_cache,
+                     seed_corpus=seed_corpus, campaigns=campaigns, corpus_exchange=corpus_exchange,
+                     backend=args.backend, agent=args.agent, headless=args.headless,
+                     tmpfs_interval=args.tmpfs, tmpfs_size=args.tmpfssize)